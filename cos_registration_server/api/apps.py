@@ -8,3 +8,9 @@ class ApiConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self) -> None:
+        """Connect the API signals once the models are loaded."""
+        from api.signals import connect_signals
+
+        connect_signals()
@@ -0,0 +1,359 @@
+"""Applications archive import.
+
+A tar (optionally compressed) or zip archive bootstraps the dashboards
+and alert rule files of a COS model in one go. Files are recognised by
+their parent directory and extension, the uid being the file name:
+
+    grafana/<uid>.json
+    foxglove/<uid>.json
+    prometheus/<uid>.yaml
+    loki/<uid>.yaml
+
+Tar archives are read as a stream, zip archives are spooled to a
+temporary file since their index is at the end. Files are validated
+in a thread pool while the archive is being read, then every file is
+upserted with one bulk statement per model within a transaction.
+Nothing is imported if one of the files is invalid.
+"""
+
+import io
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import PurePosixPath
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from api.cache import bump_model_version, deferred_version_bumps
+from api.serializer import (
+    FoxgloveDashboardSerializer,
+    GrafanaDashboardSerializer,
+    LokiAlertRuleFileSerializer,
+    PrometheusAlertRuleFileSerializer,
+)
+from applications.models import (
+    DashboardBlob,
+    FoxgloveDashboard,
+    GrafanaDashboard,
+    LokiAlertRuleFile,
+    PrometheusAlertRuleFile,
+    hash_dashboard,
+    serialize_dashboard,
+)
+from applications.utils import is_alert_rule_a_jinja_template
+from applications.validators import is_valid_uid, validate_uid
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+ZIP_MAGIC = b"PK\x03\x04"
+COPY_CHUNK_SIZE = 64 * 1024
+
+# archive directory: (model, serializer, file extensions)
+ARCHIVE_KINDS: Dict[str, Tuple[Type[Any], Type[Any], Tuple[str, ...]]] = {
+    "grafana": (GrafanaDashboard, GrafanaDashboardSerializer, (".json",)),
+    "foxglove": (FoxgloveDashboard, FoxgloveDashboardSerializer, (".json",)),
+    "prometheus": (
+        PrometheusAlertRuleFile,
+        PrometheusAlertRuleFileSerializer,
+        (".yaml", ".yml", ".rules"),
+    ),
+    "loki": (
+        LokiAlertRuleFile,
+        LokiAlertRuleFileSerializer,
+        (".yaml", ".yml", ".rules"),
+    ),
+}
+
+CREATED = "created"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+SKIPPED = "skipped"
+INVALID = "invalid"
+NOT_IMPORTED = "not_imported"
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be read."""
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Stream replaying the bytes read to detect the archive format."""
+
+    def __init__(self, prefix: bytes, stream: IO[bytes]) -> None:
+        self.prefix = prefix
+        self.stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if not self.prefix:
+            return self.stream.read(size)
+        if size < 0:
+            data = self.prefix + self.stream.read()
+            self.prefix = b""
+            return data
+        data, self.prefix = self.prefix[:size], self.prefix[size:]
+        if len(data) < size:
+            data += self.stream.read(size - len(data))
+        return data
+
+
+def _read_limited(member: IO[bytes], budget: List[int]) -> bytes:
+    data = member.read(budget[0] + 1)
+    if len(data) > budget[0]:
+        raise ArchiveError(
+            "Archive content exceeds "
+            f"{settings.DECOMPRESSED_REQUEST_MAX_SIZE} bytes."
+        )
+    budget[0] -= len(data)
+    return data
+
+
+def archive_files(stream: IO[bytes]) -> Iterator[Tuple[str, bytes]]:
+    """Read the regular files of a tar or zip archive.
+
+    The extracted content is capped to DECOMPRESSED_REQUEST_MAX_SIZE.
+
+    stream: the archive, tar archives can be gzip, bz2 or xz compressed.
+    return: iterator of (path, content).
+    raise: ArchiveError if the archive is invalid or too large.
+    """
+    budget = [settings.DECOMPRESSED_REQUEST_MAX_SIZE]
+    prefix = stream.read(len(ZIP_MAGIC))
+    try:
+        if prefix == ZIP_MAGIC:
+            with tempfile.SpooledTemporaryFile(
+                max_size=COPY_CHUNK_SIZE * 16
+            ) as spooled:
+                spooled.write(prefix)
+                while chunk := stream.read(COPY_CHUNK_SIZE):
+                    spooled.write(chunk)
+                with zipfile.ZipFile(spooled) as archive:
+                    for info in archive.infolist():
+                        if info.is_dir():
+                            continue
+                        with archive.open(info) as member:
+                            yield info.filename, _read_limited(member, budget)
+            return
+
+        with tarfile.open(
+            fileobj=_PrefixedStream(prefix, stream), mode="r|*"
+        ) as tar:
+            for tar_info in tar:
+                if not tar_info.isfile():
+                    continue
+                extracted = tar.extractfile(tar_info)
+                if extracted is None:
+                    continue
+                yield tar_info.name, _read_limited(extracted, budget)
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError, OSError) as e:
+        raise ArchiveError(f"Invalid archive: {e}") from e
+
+
+def _archive_kind(path: str) -> Optional[Tuple[str, str]]:
+    """Return the kind and uid of an archive file, None if unknown."""
+    file_path = PurePosixPath(path)
+    if len(file_path.parts) < 2:
+        return None
+    kind = file_path.parts[-2]
+    if kind not in ARCHIVE_KINDS:
+        return None
+    if file_path.suffix not in ARCHIVE_KINDS[kind][2]:
+        return None
+    return kind, file_path.stem
+
+
+def _validate_file(kind: str, uid: str, content: bytes) -> Dict[str, Any]:
+    """Validate the content of an archive file.
+
+    return: the values to store.
+    raise: serializers.ValidationError if the file is invalid.
+    """
+    model, serializer_class, _ = ARCHIVE_KINDS[kind]
+    if len(uid) > model._meta.get_field("uid").max_length:
+        raise serializers.ValidationError("The uid is too long.")
+    if not is_valid_uid(uid):
+        raise serializers.ValidationError(str(validate_uid.message))
+    try:
+        text = content.decode()
+    except UnicodeDecodeError:
+        raise serializers.ValidationError("The file is not UTF-8 encoded.")
+
+    serializer = serializer_class()
+    if kind in ("grafana", "foxglove"):
+        dashboard = serializer.validate_dashboard(text)
+        serialized = serialize_dashboard(dashboard)
+        return {
+            "dashboard": dashboard,
+            "serialized": serialized,
+            "hash": hash_dashboard(serialized),
+        }
+    rules = serializer.validate_rules(text)
+    try:
+        template = is_alert_rule_a_jinja_template(rules)
+    except RuntimeError as e:
+        raise serializers.ValidationError(str(e))
+    return {"rules": rules, "template": template}
+
+
+def _error_message(error: serializers.ValidationError) -> str:
+    detail = error.detail
+    if isinstance(detail, list):
+        return " ".join(str(message) for message in detail)
+    return str(detail)
+
+
+def _upsert_dashboards(model: Type[Any], files: List[Dict[str, Any]]) -> None:
+    uids = [file["uid"] for file in files]
+    previous = dict(
+        model.objects.filter(uid__in=uids).values_list("uid", "blob_id")
+    )
+    changed = []
+    for file in files:
+        if file["uid"] not in previous:
+            file["status"] = CREATED
+        elif previous[file["uid"]] != file["values"]["hash"]:
+            file["status"] = UPDATED
+        else:
+            file["status"] = UNCHANGED
+            continue
+        changed.append(file)
+    if not changed:
+        return
+
+    DashboardBlob.objects.bulk_create(
+        [
+            DashboardBlob(
+                hash=file["values"]["hash"], data=file["values"]["serialized"]
+            )
+            for file in changed
+        ],
+        ignore_conflicts=True,
+    )
+    # lock the existing blobs until they are referenced,
+    # see DashboardBlob.store
+    locked = DashboardBlob.objects.select_for_update().filter(
+        hash__in=[file["values"]["hash"] for file in changed]
+    )
+    list(locked.values_list("hash", flat=True))
+    model.objects.bulk_create(
+        [
+            model(
+                uid=file["uid"],
+                blob_id=file["values"]["hash"],
+                size=len(file["values"]["serialized"]),
+            )
+            for file in changed
+        ],
+        update_conflicts=True,
+        unique_fields=["uid"],
+        update_fields=["blob", "size"],
+    )
+
+    # bulk writes don't record the versions
+    contents = {file["uid"]: file["values"]["dashboard"] for file in changed}
+    dashboards = list(model.objects.filter(uid__in=contents))
+    for dashboard in dashboards:
+        dashboard.dashboard = contents[dashboard.uid]
+    model.record_versions(
+        dashboards, [previous.get(dashboard.uid) for dashboard in dashboards]
+    )
+    for blob_hash in set(previous.values()) - {
+        file["values"]["hash"] for file in files
+    }:
+        DashboardBlob.delete_if_unused(blob_hash)
+
+
+def _upsert_rule_files(model: Type[Any], files: List[Dict[str, Any]]) -> None:
+    uids = [file["uid"] for file in files]
+    previous = {
+        uid: {"rules": rules, "template": template}
+        for uid, rules, template in model.objects.filter(
+            uid__in=uids
+        ).values_list("uid", "rules", "template")
+    }
+    changed = []
+    for file in files:
+        if file["uid"] not in previous:
+            file["status"] = CREATED
+        elif previous[file["uid"]] != file["values"]:
+            file["status"] = UPDATED
+        else:
+            file["status"] = UNCHANGED
+            continue
+        changed.append(file)
+    if not changed:
+        return
+
+    model.objects.bulk_create(
+        [model(uid=file["uid"], **file["values"]) for file in changed],
+        update_conflicts=True,
+        unique_fields=["uid"],
+        update_fields=["rules", "template"],
+    )
+
+
+def import_archive(stream: IO[bytes]) -> Tuple[bool, List[Dict[str, Any]]]:
+    """Import the dashboards and alert rule files of an archive.
+
+    stream: the tar or zip archive.
+    return: whether the archive was imported, and the report of each file
+        with its path, kind, uid, status and error if invalid.
+    raise: ArchiveError if the archive cannot be read.
+    """
+    files: List[Dict[str, Any]] = []
+    futures: List[Optional["Future[Dict[str, Any]]"]] = []
+    with ThreadPoolExecutor(
+        max_workers=settings.ARCHIVE_IMPORT_WORKERS
+    ) as executor:
+        for path, content in archive_files(stream):
+            kind_uid = _archive_kind(path)
+            if kind_uid is None:
+                files.append({"path": path, "status": SKIPPED})
+                futures.append(None)
+                continue
+            kind, uid = kind_uid
+            files.append({"path": path, "kind": kind, "uid": uid})
+            futures.append(executor.submit(_validate_file, kind, uid, content))
+
+        seen = set()
+        for file, future in zip(files, futures):
+            if future is None:
+                continue
+            try:
+                file["values"] = future.result()
+            except serializers.ValidationError as e:
+                file.update(status=INVALID, error=_error_message(e))
+                continue
+            if (file["kind"], file["uid"]) in seen:
+                file.update(status=INVALID, error="Duplicated uid.")
+            seen.add((file["kind"], file["uid"]))
+
+    valid = not any(file.get("status") == INVALID for file in files)
+    if valid:
+        # bulk writes don't send signals,
+        # invalidate the cached responses once per model
+        with deferred_version_bumps(), transaction.atomic():
+            for kind, (model, _, _) in ARCHIVE_KINDS.items():
+                kind_files = [
+                    file
+                    for file in files
+                    if file.get("kind") == kind and "values" in file
+                ]
+                if not kind_files:
+                    continue
+                if kind in ("grafana", "foxglove"):
+                    _upsert_dashboards(model, kind_files)
+                else:
+                    _upsert_rule_files(model, kind_files)
+                bump_model_version(model)
+
+    report = [
+        {key: value for key, value in file.items() if key != "values"}
+        for file in files
+    ]
+    for file in report:
+        file.setdefault("status", NOT_IMPORTED)
+    return valid, report
@@ -0,0 +1,260 @@
+"""Application bundles.
+
+Bundles are tar.gz archives gathering many application files, for
+instance every Grafana dashboard laid out for file provisioning.
+They are streamed while being built so that memory stays bounded
+whatever the number of files.
+
+Archives are built reproducibly (no timestamps in the gzip and tar
+headers) so that a bundle is fully determined by the path and content
+hash of its files, and so is its ETag: dashboards bundles hash the
+uid and content hash of the dashboards, without building the archive,
+alert rule files bundles hash their manifest.
+
+Archive member names are made of uids. Rows whose uid is not a valid
+file name, written before the uids were validated, are left out so that
+no member can be extracted outside of the extraction directory.
+
+Device bundles are JSON documents gathering the configuration of one
+device, so that a booting device makes a single request.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import tarfile
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import yaml
+from api.serializer import DeviceCertificateSerializer
+from applications.models import DashboardBlob
+from applications.utils import render_alert_rule_template_for_device
+from applications.validators import is_valid_uid
+from devices.models import Device, DeviceCertificate
+from django.core.serializers.pyyaml import DjangoSafeDumper
+from django.db.models import Prefetch, QuerySet
+
+BUNDLE_CHUNK_SIZE = 100
+BUNDLE_FILE_MODE = 0o644
+MANIFEST_PATH = "manifest.json"
+RULE_FILE_EXTENSION = ".rules"
+
+
+class _ChunkSink:
+    """Writable file collecting the bytes written until drained."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def is_safe_member_path(path: str) -> bool:
+    """Return whether an archive member path stays within the archive.
+
+    path: relative path of the member, "/" separated.
+    """
+    parts = path.split("/")
+    return all(part not in ("", ".", "..") for part in parts)
+
+
+def stream_tar_gz(files: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """Stream a reproducible tar.gz archive.
+
+    files: the (path, content) of the archived files.
+    return: iterator of the archive chunks, one per file.
+    raise: ValueError if a path isn't safe, see is_safe_member_path.
+    """
+    sink = _ChunkSink()
+    with gzip.GzipFile(fileobj=sink, mode="wb", mtime=0) as compressed:
+        with tarfile.open(fileobj=compressed, mode="w|") as tar:
+            for path, content in files:
+                if not is_safe_member_path(path):
+                    raise ValueError(f"Unsafe archive member name: {path}")
+                info = tarfile.TarInfo(path)
+                info.size = len(content)
+                info.mode = BUNDLE_FILE_MODE
+                tar.addfile(info, io.BytesIO(content))
+                if data := sink.drain():
+                    yield data
+    yield sink.drain()
+
+
+def bundle_etag(snapshot: Iterable[Tuple[str, str]]) -> str:
+    """Return the ETag of a bundle.
+
+    snapshot: the (uid, content hash) of the bundled files, in order.
+    """
+    digest = hashlib.sha256()
+    for uid, content_hash in snapshot:
+        digest.update(f"{uid}\0{content_hash}\n".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def dashboard_files(
+    snapshot: Sequence[Tuple[str, str]],
+    chunk_size: int = BUNDLE_CHUNK_SIZE,
+) -> Iterator[Tuple[str, bytes]]:
+    """Return the files of a dashboards bundle.
+
+    Dashboards are read by content hash, so that the bundle matches the
+    snapshot even if a dashboard is changed meanwhile. Dashboards whose
+    content was deleted meanwhile, or whose uid isn't a valid file name,
+    are left out.
+
+    snapshot: the (uid, content hash) of the dashboards, in order.
+    chunk_size: number of dashboards read at once.
+    return: iterator of (<uid>.json, serialized dashboard).
+    """
+    for start in range(0, len(snapshot), chunk_size):
+        chunk = snapshot[start : start + chunk_size]  # noqa: E203
+        # identical dashboards share their content, read it once
+        blobs = DashboardBlob.objects.in_bulk(
+            {content_hash for _, content_hash in chunk}
+        )
+        for uid, content_hash in chunk:
+            if content_hash in blobs and is_valid_uid(uid):
+                yield f"{uid}.json", bytes(blobs[content_hash].data)
+
+
+def rule_file_content(
+    rule_file: Any, device: Optional[Device] = None
+) -> Tuple[str, str]:
+    """Return the uid and rules YAML of an alert rule file.
+
+    Like in the alert rule files list, templated rule files are rendered
+    for a device and identified by <uid>/<device uid>.
+
+    rule_file: a Prometheus or Loki alert rule file.
+    device: the device to render a templated rule file for.
+    """
+    if rule_file.template and device is not None:
+        return (
+            f"{rule_file.uid}/{device.uid}",
+            render_alert_rule_template_for_device(rule_file, device),
+        )
+    rules = yaml.dump(
+        rule_file.rules, Dumper=DjangoSafeDumper, default_flow_style=False
+    )
+    return rule_file.uid, rules
+
+
+def rendered_rule_files(
+    queryset: "QuerySet[Any]", devices: "QuerySet[Device]"
+) -> List[Tuple[str, bytes]]:
+    """Render the files of an alert rule files bundle.
+
+    Like the alert rule files list, non-templated rule files are provided
+    as is and templated ones are rendered for each of their devices.
+    Rule files or devices whose uid isn't a valid file name are left out.
+
+    queryset: the Prometheus or Loki alert rule files to bundle.
+    devices: the devices to render the templated rule files for.
+    return: the (<uid>.rules or <uid>/<device uid>.rules, rules YAML)
+        of the files, sorted by path.
+    """
+    files = []
+    for rule_file in queryset.filter(template=False):
+        if not is_valid_uid(rule_file.uid):
+            continue
+        uid, rules = rule_file_content(rule_file)
+        files.append((f"{uid}{RULE_FILE_EXTENSION}", rules.encode()))
+
+    templates = queryset.filter(template=True).prefetch_related(
+        Prefetch("devices", devices.only("uid"), to_attr="bundle_devices")
+    )
+    for rule_file in templates:
+        for device in rule_file.bundle_devices:
+            if not (is_valid_uid(rule_file.uid) and is_valid_uid(device.uid)):
+                continue
+            uid, rules = rule_file_content(rule_file, device)
+            files.append((f"{uid}{RULE_FILE_EXTENSION}", rules.encode()))
+    return sorted(files)
+
+
+def bundle_manifest(files: Iterable[Tuple[str, bytes]]) -> Dict[str, str]:
+    """Return the SHA-256 of each file of a bundle, by path."""
+    return {
+        path: hashlib.sha256(content).hexdigest() for path, content in files
+    }
+
+
+def with_manifest(
+    files: Sequence[Tuple[str, bytes]],
+) -> Tuple[str, List[Tuple[str, bytes]]]:
+    """Prepend the manifest to the files of a bundle.
+
+    files: the (path, content) of the bundled files.
+    return: the ETag of the bundle, and its files starting with
+        manifest.json.
+    """
+    manifest = json.dumps(bundle_manifest(files), sort_keys=True).encode()
+    etag = f'"{hashlib.sha256(manifest).hexdigest()}"'
+    return etag, [(MANIFEST_PATH, manifest), *files]
+
+
+def device_bundle(device: Device) -> Dict[str, Any]:
+    """Gather everything a device and its sidecars need.
+
+    The last seen timestamp is left out so that the bundle only changes
+    with the device configuration.
+
+    device: the device, its certificate selected and its dashboards and
+        alert rule files prefetched.
+    return: the device record, its certificate, the uid, content hash
+        and size of its dashboards and its rendered alert rule files.
+    """
+    try:
+        certificate = DeviceCertificateSerializer(device.certificate).data
+    except DeviceCertificate.DoesNotExist:
+        certificate = None
+    return {
+        "device": {
+            "uid": device.uid,
+            "creation_date": device.creation_date,
+            "address": device.address,
+            "public_ssh_key": device.public_ssh_key,
+        },
+        "certificate": certificate,
+        **{
+            relation: [
+                {
+                    "uid": dashboard.uid,
+                    "content_hash": dashboard.content_hash,
+                    "size": dashboard.size,
+                }
+                for dashboard in getattr(device, relation).all()
+            ]
+            for relation in ("grafana_dashboards", "foxglove_dashboards")
+        },
+        **{
+            relation: [
+                dict(zip(("uid", "rules"), rule_file_content(rule, device)))
+                for rule in getattr(device, relation).all()
+            ]
+            for relation in (
+                "prometheus_alert_rule_files",
+                "loki_alert_rule_files",
+            )
+        },
+    }
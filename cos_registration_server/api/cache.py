@@ -0,0 +1,282 @@
+"""API response cache.
+
+List responses are cached under a key made of the endpoint,
+the query parameters and a version stamp per model the response
+depends on. Model versions are bumped by signals (see api/signals.py)
+so that a write invalidates every response depending on that model
+without having to enumerate the cached keys.
+
+Concurrent identical requests for the same revision are coalesced:
+only one of them computes the response while the others wait for it,
+within a process with a lock and across workers with a cache lock.
+"""
+
+import functools
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Type,
+)
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+VERSION_KEY_PREFIX = "api:version:"
+RESPONSE_KEY_PREFIX = "api:response:"
+LOCK_KEY_SUFFIX = ":lock"
+LOCK_POLL_INTERVAL = 0.05
+
+_deferred = threading.local()
+
+
+class _Flight:
+    """A computation shared by concurrent callers."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _version_key(model: Type[models.Model]) -> str:
+    return f"{VERSION_KEY_PREFIX}{model._meta.label_lower}"
+
+
+def get_model_versions(model_list: Iterable[Type[models.Model]]) -> List[int]:
+    """Return the current version stamp of each model.
+
+    Missing versions are initialised with the current time
+    so that an evicted version never matches an older stamp.
+    """
+    keys = [_version_key(model) for model in model_list]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = cache.get_or_set(key, time.time_ns(), None)
+    return [versions[key] for key in keys]
+
+
+def _bump_model_versions(labels: Iterable[str]) -> None:
+    for label in labels:
+        key = f"{VERSION_KEY_PREFIX}{label}"
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def bump_model_version(model: Type[models.Model]) -> None:
+    """Invalidate the cached responses depending on a model.
+
+    The version is bumped once the current transaction is committed,
+    so that a response cannot be cached under the new version while
+    the write is not visible yet.
+    Within deferred_version_bumps() the bump is postponed to the exit
+    of the context, so that bulk operations bump each model only once.
+    """
+    label = model._meta.label_lower
+    pending: Optional[Set[str]] = getattr(_deferred, "labels", None)
+    if pending is not None:
+        pending.add(label)
+        return
+    transaction.on_commit(functools.partial(_bump_model_versions, [label]))
+
+
+@contextmanager
+def deferred_version_bumps() -> Iterator[None]:
+    """Collect model version bumps and apply them once on exit."""
+    if getattr(_deferred, "labels", None) is not None:
+        # nested context, the outermost one applies the bumps
+        yield
+        return
+    _deferred.labels = set()
+    try:
+        yield
+    finally:
+        labels = _deferred.labels
+        _deferred.labels = None
+        transaction.on_commit(
+            functools.partial(_bump_model_versions, sorted(labels))
+        )
+
+
+def response_cache_key(
+    request: Request, model_list: Iterable[Type[models.Model]]
+) -> str:
+    """Build the cache key of a response.
+
+    request: the request the response is cached for.
+    model_list: the models the response depends on.
+    """
+    query = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    digest = hashlib.sha256(
+        repr((request.path, query, get_model_versions(model_list))).encode()
+    ).hexdigest()
+    return f"{RESPONSE_KEY_PREFIX}{digest}"
+
+
+def json_etag(data: Any) -> str:
+    """Return the ETag of the data of a response.
+
+    data: the response data, serializable to JSON.
+    """
+    serialized = json.dumps(data, sort_keys=True, cls=JSONEncoder)
+    return f'"{hashlib.sha256(serialized.encode()).hexdigest()}"'
+
+
+def single_flight(key: str, compute: Callable[[], Any]) -> Any:
+    """Share one computation between concurrent callers of a process.
+
+    The first caller for a key computes the result, the callers arriving
+    while it is running wait for it and get the same result or error.
+    A caller waiting for longer than settings.API_COALESCE_TIMEOUT
+    computes the result itself, so that a hung computation doesn't block
+    every identical request.
+
+    key: identifies the computation.
+    compute: function computing the result.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        is_leader = flight is None
+        if flight is None:
+            flight = _flights[key] = _Flight()
+        else:
+            flight.waiters += 1
+
+    if not is_leader:
+        if not flight.done.wait(settings.API_COALESCE_TIMEOUT):
+            return compute()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = compute()
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+    return flight.result
+
+
+def coalesce_across_workers(
+    key: str, compute: Callable[[], Any], timeout: int
+) -> Any:
+    """Share one computation between the workers through the cache.
+
+    The worker acquiring the cache lock computes the result and stores it
+    under the key, the others poll the cache until the result is available.
+    If the lock is released without result, or is held for longer than
+    settings.API_COALESCE_TIMEOUT, waiting workers compute it themselves.
+
+    key: cache key of the result.
+    compute: function computing and returning the result, None if the
+        result must not be stored.
+    timeout: cache timeout of the result in seconds.
+    """
+    lock_key = f"{key}{LOCK_KEY_SUFFIX}"
+    lock_timeout = settings.API_COALESCE_TIMEOUT
+    if cache.add(lock_key, True, lock_timeout):
+        try:
+            result = compute()
+            if result is not None:
+                cache.set(key, result, timeout)
+            return result
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        result = cache.get(key)
+        if result is not None:
+            return result
+        if cache.get(lock_key) is None:
+            break
+    return compute()
+
+
+def cache_response(
+    *model_list: Type[models.Model], timeout_setting: str = "API_CACHE_TIMEOUT"
+) -> Callable[..., Any]:
+    """Cache the data of a successful GET view response.
+
+    Concurrent identical requests are coalesced, see single_flight() and
+    coalesce_across_workers(). Without cache, requests are only
+    coalesced within a process.
+
+    model_list: the models the response depends on.
+    timeout_setting: name of the setting holding the cache timeout
+        in seconds. A timeout of 0 disables the cache.
+    """
+
+    def decorator(view_method: Callable[..., Response]) -> Any:
+        @functools.wraps(view_method)
+        def wrapper(
+            self: Any, request: Request, *args: Any, **kwargs: Any
+        ) -> Response:
+            cache_timeout = getattr(settings, timeout_setting)
+            key = response_cache_key(request, model_list)
+            if cache_timeout:
+                data = cache.get(key)
+                if data is not None:
+                    return Response(data)
+
+            response: Optional[Response] = None
+
+            def compute() -> Any:
+                nonlocal response
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return None
+                return response.data
+
+            if cache_timeout:
+                data = single_flight(
+                    key,
+                    lambda: coalesce_across_workers(
+                        key, compute, cache_timeout
+                    ),
+                )
+            else:
+                data = single_flight(key, compute)
+
+            if response is not None:
+                # this request computed the response
+                return response
+            if data is None:
+                # the shared computation failed, let's try on our own
+                return view_method(self, request, *args, **kwargs)
+            return Response(data)
+
+        return wrapper
+
+    return decorator
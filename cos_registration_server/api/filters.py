@@ -0,0 +1,185 @@
+"""API filters."""
+
+import ipaddress
+import re
+from datetime import datetime
+from typing import Any, Mapping, Optional
+
+from devices.models import Device, DeviceCertificate
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+NO_CERTIFICATE = "none"
+
+# a "+" left unencoded in a query string is decoded to a space,
+# "2024-01-01T00:00:00+00:00" is received as "2024-01-01T00:00:00 00:00"
+_UNENCODED_OFFSET_REGEX = re.compile(r" (\d{2}(?::?\d{2})?)\Z")
+
+DEVICE_FILTERS = (
+    "address",
+    "created_after",
+    "created_before",
+    "certificate_status",
+    "has_rule",
+    "has_dashboard",
+)
+
+
+def _parse_datetime(name: str, value: str) -> datetime:
+    parsed = None
+    for candidate in (value, _UNENCODED_OFFSET_REGEX.sub(r"+\1", value)):
+        try:
+            parsed = parse_datetime(candidate)
+        except ValueError:
+            continue
+        if parsed is not None:
+            break
+    if parsed is None:
+        raise ValidationError({name: f"Invalid ISO 8601 datetime: {value}"})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _is_ip_address(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _filter_address_prefix(
+    queryset: "QuerySet[Device]", prefix: str
+) -> "QuerySet[Device]":
+    queryset = queryset.filter(address__startswith=prefix)
+    if connections[queryset.db].vendor == "postgresql":
+        # addresses are inet, HOST(address) LIKE uses
+        # the device_address_host_idx index
+        return queryset
+    # LIKE can't use the index of a text column,
+    # the equivalent range can
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return queryset.filter(address__gte=prefix, address__lt=upper_bound)
+
+
+def filter_devices(
+    queryset: "QuerySet[Device]", params: Mapping[str, Any]
+) -> "QuerySet[Device]":
+    """Filter devices with the provided parameters.
+
+    Every filter is backed by an index:
+    address: exact IP address or address prefix.
+    created_after: ISO 8601 datetime, devices created after it.
+    created_before: ISO 8601 datetime, devices created before it.
+    certificate_status: pending, signed, denied or none.
+    has_rule: uid of an attached Prometheus or Loki alert rule file.
+    has_dashboard: uid of an attached Grafana or Foxglove dashboard.
+
+    queryset: the devices queryset to filter.
+    params: the filters, typically the request query parameters.
+    return: the filtered queryset.
+    raise: ValidationError if a filter value is invalid.
+    """
+    address: Optional[str] = params.get("address")
+    if address:
+        if _is_ip_address(address):
+            queryset = queryset.filter(address=address)
+        else:
+            queryset = _filter_address_prefix(queryset, address)
+
+    if created_after := params.get("created_after"):
+        queryset = queryset.filter(
+            creation_date__gt=_parse_datetime("created_after", created_after)
+        )
+
+    if created_before := params.get("created_before"):
+        queryset = queryset.filter(
+            creation_date__lt=_parse_datetime("created_before", created_before)
+        )
+
+    if certificate_status := params.get("certificate_status"):
+        if certificate_status == NO_CERTIFICATE:
+            queryset = queryset.filter(certificate__isnull=True)
+        elif certificate_status in DeviceCertificate.CertificateStatus.values:
+            queryset = queryset.filter(certificate__status=certificate_status)
+        else:
+            choices = [
+                *DeviceCertificate.CertificateStatus.values,
+                NO_CERTIFICATE,
+            ]
+            raise ValidationError(
+                {"certificate_status": f"Must be one of {', '.join(choices)}"}
+            )
+
+    # relations are filtered with subqueries on the relation tables
+    # to avoid duplicated devices when joining both relations
+    if rule_uid := params.get("has_rule"):
+        prometheus_rules = Device.prometheus_alert_rule_files.through
+        loki_rules = Device.loki_alert_rule_files.through
+        queryset = queryset.filter(
+            Q(
+                pk__in=prometheus_rules.objects.filter(
+                    prometheusalertrulefile__uid=rule_uid
+                ).values("device_id")
+            )
+            | Q(
+                pk__in=loki_rules.objects.filter(
+                    lokialertrulefile__uid=rule_uid
+                ).values("device_id")
+            )
+        )
+
+    if dashboard_uid := params.get("has_dashboard"):
+        grafana_dashboards = Device.grafana_dashboards.through
+        foxglove_dashboards = Device.foxglove_dashboards.through
+        queryset = queryset.filter(
+            Q(
+                pk__in=grafana_dashboards.objects.filter(
+                    grafanadashboard__uid=dashboard_uid
+                ).values("device_id")
+            )
+            | Q(
+                pk__in=foxglove_dashboards.objects.filter(
+                    foxglovedashboard__uid=dashboard_uid
+                ).values("device_id")
+            )
+        )
+
+    return queryset
+
+
+def select_devices(selector: Mapping[str, Any]) -> "QuerySet[Device]":
+    """Return the devices chosen by a validated device selector.
+
+    selector: either uids, a list of device uids,
+        or filter, a mapping of filters, see filter_devices.
+    return: the selected devices.
+    """
+    if "uids" in selector:
+        return Device.objects.filter(uid__in=selector["uids"])
+    return filter_devices(Device.objects.all(), selector["filter"])
+
+
+def filter_applications(
+    queryset: "QuerySet[Any]", params: Mapping[str, Any]
+) -> "QuerySet[Any]":
+    """Filter dashboards or alert rule files with the provided parameters.
+
+    uid: comma-separated list of uids.
+    device: uid of a device, only the files attached to it are kept.
+
+    queryset: the dashboards or alert rule files queryset to filter.
+    params: the filters, typically the request query parameters.
+    return: the filtered queryset.
+    """
+    if uids := params.get("uid"):
+        queryset = queryset.filter(uid__in=uids.split(","))
+
+    if device_uid := params.get("device"):
+        queryset = queryset.filter(devices__uid=device_uid)
+
+    return queryset
@@ -0,0 +1,58 @@
+"""Export the rendered alert rule files to a directory."""
+
+import time
+from pathlib import Path
+from typing import Any
+
+from api.rule_directory import export_rule_directory
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    """Write the rendered Prometheus and Loki rule sets to a directory.
+
+    See api.rule_directory for the directory layout.
+    """
+
+    help = (
+        "Write the rendered Prometheus and Loki alert rule files to "
+        "<directory>/current, swapped atomically when they change. "
+        "With --interval, keep exporting them periodically."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the directory and interval arguments."""
+        parser.add_argument("directory", help="Path of the rule directory.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Export the rules every interval seconds instead of once.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Export the rules once or periodically."""
+        directory = Path(options["directory"])
+        interval = options["interval"]
+        if interval < 0:
+            raise CommandError("The interval must be non-negative.")
+
+        while True:
+            # drop the connection if it expired or broke while sleeping
+            close_old_connections()
+            try:
+                release = export_rule_directory(directory)
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+            if release is not None:
+                self.stdout.write(f"Exported release {release}")
+            elif not interval:
+                self.stdout.write("Rules unchanged")
+            if not interval:
+                return
+            time.sleep(interval)
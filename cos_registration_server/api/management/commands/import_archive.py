@@ -0,0 +1,42 @@
+"""Import dashboards and alert rule files from an archive."""
+
+from typing import Any
+
+from api.archive import ArchiveError, import_archive
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+
+class Command(BaseCommand):
+    """Import the dashboards and alert rule files of an archive.
+
+    See api.archive for the archive layout.
+    """
+
+    help = (
+        "Create or update the dashboards and alert rule files of a tar, "
+        "tar.gz or zip archive. Nothing is imported if a file is invalid."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the archive path argument."""
+        parser.add_argument("archive", help="Path of the archive.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Import the archive and print the report of each file."""
+        try:
+            with open(options["archive"], "rb") as archive:
+                imported, report = import_archive(archive)
+        except (OSError, ArchiveError) as e:
+            raise CommandError(str(e))
+
+        for file in report:
+            line = f"{file['path']}: {file['status']}"
+            if "error" in file:
+                line = f"{line} ({file['error']})"
+            self.stdout.write(line)
+        if not imported:
+            raise CommandError("The archive has invalid files.")
@@ -0,0 +1,157 @@
+"""API middlewares."""
+
+import gzip
+import io
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, JsonResponse
+
+try:
+    from compression import zstd  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on the Python version
+    zstd = None
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+DECOMPRESSION_CHUNK_SIZE = 64 * 1024
+
+
+class DecompressionError(Exception):
+    """Raised when a compressed request body cannot be decoded."""
+
+
+class DecompressedBodyTooLarge(DecompressionError):
+    """Raised when a decompressed request body exceeds the size cap."""
+
+
+class UnsupportedContentEncoding(DecompressionError):
+    """Raised when a request body coding is not supported."""
+
+
+def _open_gzip(stream: Any) -> Any:
+    return gzip.GzipFile(fileobj=stream, mode="rb")
+
+
+def _open_zstd(stream: Any) -> Any:
+    if zstd is not None:
+        return zstd.ZstdFile(stream, mode="rb")
+    return zstandard.ZstdDecompressor().stream_reader(
+        stream, read_across_frames=True
+    )
+
+
+def supported_content_encodings() -> Dict[str, Callable[[Any], Any]]:
+    """Return the request content encodings the server can decode.
+
+    zstd is only available with Python 3.14 or the zstandard package.
+    """
+    encodings: Dict[str, Callable[[Any], Any]] = {"gzip": _open_gzip}
+    if zstd is not None or zstandard is not None:
+        encodings["zstd"] = _open_zstd
+    return encodings
+
+
+def decompress_stream(
+    stream: Any, content_encoding: str, max_size: int
+) -> bytes:
+    """Decompress a request body stream chunk by chunk.
+
+    stream: the compressed request body.
+    content_encoding: the Content-Encoding header value.
+        Multiple codings are decoded in the reverse order they were applied.
+    max_size: maximum size of the decompressed body in bytes.
+    return: the decompressed body.
+    raise:
+      DecompressionError if the body is invalid.
+      DecompressedBodyTooLarge if the body exceeds max_size.
+      UnsupportedContentEncoding if a coding is not supported.
+    """
+    encodings = supported_content_encodings()
+    codings = [
+        coding.strip().lower()
+        for coding in content_encoding.split(",")
+        if coding.strip().lower() not in ("", "identity")
+    ]
+    decoded = stream
+    for coding in reversed(codings):
+        if coding not in encodings:
+            raise UnsupportedContentEncoding(
+                f"Unsupported Content-Encoding {coding}. "
+                f"Supported encodings: {', '.join(encodings)}"
+            )
+        decoded = encodings[coding](decoded)
+
+    body = io.BytesIO()
+    try:
+        while chunk := decoded.read(DECOMPRESSION_CHUNK_SIZE):
+            body.write(chunk)
+            if body.tell() > max_size:
+                raise DecompressedBodyTooLarge(
+                    f"Decompressed request body exceeds {max_size} bytes."
+                )
+    except DecompressionError:
+        raise
+    except Exception as e:
+        # gzip, zlib and the zstd backends all raise their own error types
+        raise DecompressionError(
+            f"Invalid compressed request body: {e}"
+        ) from e
+    return body.getvalue()
+
+
+class DecompressRequestMiddleware:
+    """Decompress request bodies sent with a Content-Encoding header.
+
+    Large dashboards and rule files can be uploaded compressed.
+    The body is decompressed in chunks and rejected as soon as it grows
+    beyond settings.DECOMPRESSED_REQUEST_MAX_SIZE, so that a
+    decompression bomb cannot exhaust the worker memory.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        """Init the middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> Any:
+        """Decompress the request body before handing it to the view."""
+        error = self.decompress_request(request)
+        if error is not None:
+            return error
+        return self.get_response(request)
+
+    def decompress_request(
+        self, request: HttpRequest
+    ) -> Optional[HttpResponse]:
+        """Replace a compressed request body by its decompressed content.
+
+        request: the incoming request.
+        return: an error response if the body could not be decompressed.
+        """
+        content_encoding = request.META.get("HTTP_CONTENT_ENCODING", "")
+        if content_encoding.strip().lower() in ("", "identity"):
+            return None
+
+        try:
+            body = decompress_stream(
+                request,
+                content_encoding,
+                settings.DECOMPRESSED_REQUEST_MAX_SIZE,
+            )
+        except UnsupportedContentEncoding as e:
+            return JsonResponse({"detail": str(e)}, status=415)
+        except DecompressedBodyTooLarge as e:
+            return JsonResponse({"detail": str(e)}, status=413)
+        except DecompressionError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+
+        request._stream = io.BytesIO(body)
+        request._read_started = False  # type: ignore[attr-defined]
+        if hasattr(request, "_body"):
+            del request._body
+        request.META["CONTENT_LENGTH"] = str(len(body))
+        del request.META["HTTP_CONTENT_ENCODING"]
+        return None
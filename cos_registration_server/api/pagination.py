@@ -0,0 +1,17 @@
+"""API pagination."""
+
+from devices.queue import PENDING_ORDERING
+from rest_framework.pagination import CursorPagination
+
+
+class PendingCertificatesPagination(CursorPagination):
+    """Cursor pagination of the pending certificate signing requests.
+
+    Pages are delimited by position in the queue rather than by offset,
+    so that requests signed meanwhile don't shift the following pages.
+    """
+
+    ordering = PENDING_ORDERING
+    page_size = 100
+    page_size_query_param = "limit"
+    max_page_size = 1000
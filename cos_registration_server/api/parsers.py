@@ -0,0 +1,50 @@
+"""API parsers."""
+
+from typing import IO, Any, Mapping, Optional
+
+import cbor2
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+class MessagePackParser(BaseParser):
+    """Parse MessagePack request bodies."""
+
+    media_type = "application/msgpack"
+
+    def parse(
+        self,
+        stream: IO[Any],
+        media_type: Optional[str] = None,
+        parser_context: Optional[Mapping[str, Any]] = None,
+    ) -> Any:
+        """Parse the incoming bytestream as MessagePack."""
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise ParseError(f"MessagePack parse error - {e}")
+
+
+class CBORParser(BaseParser):
+    """Parse CBOR request bodies."""
+
+    media_type = "application/cbor"
+
+    def parse(
+        self,
+        stream: IO[Any],
+        media_type: Optional[str] = None,
+        parser_context: Optional[Mapping[str, Any]] = None,
+    ) -> Any:
+        """Parse the incoming bytestream as CBOR."""
+        try:
+            return cbor2.loads(stream.read())
+        except (ValueError, cbor2.CBORDecodeError) as e:
+            raise ParseError(f"CBOR parse error - {e}")
+
+
+class JSONPatchParser(JSONParser):
+    """Parse RFC 6902 JSON Patch request bodies."""
+
+    media_type = "application/json-patch+json"
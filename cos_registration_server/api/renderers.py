@@ -0,0 +1,64 @@
+"""API renderers."""
+
+from typing import Any, Mapping, Optional
+
+import cbor2
+import msgpack
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_json_encoder = JSONEncoder()
+
+
+def encode_default(value: Any) -> Any:
+    """Convert a value unknown to the binary encoders.
+
+    Dates, decimals, UUIDs etc. are converted the same way
+    the JSON renderer does so that every format carries the same data.
+    """
+    return _json_encoder.default(value)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render the response data as MessagePack."""
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        """Render data into MessagePack bytes."""
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class CBORRenderer(BaseRenderer):
+    """Render the response data as CBOR."""
+
+    media_type = "application/cbor"
+    format = "cbor"
+    charset = None
+    render_style = "binary"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        """Render data into CBOR bytes."""
+        if data is None:
+            return b""
+        return cbor2.dumps(
+            data,
+            default=lambda encoder, value: encoder.encode(
+                encode_default(value)
+            ),
+        )
@@ -0,0 +1,134 @@
+"""Rendered alert rule files directory.
+
+Co-located rulers can read the rendered rule sets from a local directory
+instead of polling the API. The directory is laid out as:
+
+    <directory>/current -> releases/<release>
+    <directory>/releases/<release>/manifest.json
+    <directory>/releases/<release>/prometheus/<uid>.rules
+    <directory>/releases/<release>/prometheus/<uid>/<device_uid>.rules
+    <directory>/releases/<release>/loki/...
+
+A release is named after the hash of its manifest. A new release is
+staged next to the current one, the files whose content hash didn't
+change being hard linked from it, then the current symlink is swapped
+with a rename, so that rulers never see a partially written rule set.
+Nothing is written when the rule sets didn't change.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from api.bundle import MANIFEST_PATH, bundle_manifest, rendered_rule_files
+from applications.models import LokiAlertRuleFile, PrometheusAlertRuleFile
+from devices.models import Device
+
+CURRENT_LINK = "current"
+RELEASES_DIR = "releases"
+
+RULE_DIRECTORY_KINDS: Dict[str, Type[Any]] = {
+    "prometheus": PrometheusAlertRuleFile,
+    "loki": LokiAlertRuleFile,
+}
+
+
+def rendered_rule_sets() -> List[Tuple[str, bytes]]:
+    """Render the Prometheus and Loki rule sets.
+
+    return: the (<kind>/<path>, rules YAML) of the files,
+        see rendered_rule_files for the paths.
+    """
+    devices = Device.objects.all()
+    return [
+        (f"{kind}/{path}", content)
+        for kind, model in RULE_DIRECTORY_KINDS.items()
+        for path, content in rendered_rule_files(model.objects.all(), devices)
+    ]
+
+
+def _read_manifest(release: Path) -> Dict[str, str]:
+    try:
+        manifest: Dict[str, str] = json.loads(
+            (release / MANIFEST_PATH).read_bytes()
+        )
+    except (OSError, ValueError):
+        return {}
+    return manifest
+
+
+def _stage_file(
+    target: Path, content: bytes, previous: Optional[Path]
+) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if previous is not None:
+        try:
+            os.link(previous, target)
+            return
+        except OSError:
+            # hard links unsupported, write the file instead
+            pass
+    target.write_bytes(content)
+
+
+def _swap_symlink(link: Path, target: str) -> None:
+    staged_link = link.with_name(f".{link.name}.tmp")
+    staged_link.unlink(missing_ok=True)
+    os.symlink(target, staged_link)
+    os.replace(staged_link, link)
+
+
+def export_rule_directory(directory: Path) -> Optional[str]:
+    """Write the rendered rule sets as a new release of a directory.
+
+    The previous release is kept for the rulers still reading it,
+    the older ones are deleted.
+
+    directory: the rule directory, created if missing.
+    return: the name of the new release, None if the rule sets
+        didn't change.
+    raise: ValueError if a rule file path leads outside of the release.
+    """
+    files = rendered_rule_sets()
+    manifest = bundle_manifest(files)
+    manifest_data = json.dumps(manifest, sort_keys=True).encode()
+    release = hashlib.sha256(manifest_data).hexdigest()
+
+    current_link = directory / CURRENT_LINK
+    current = current_link.resolve() if current_link.is_symlink() else None
+    if current is not None and current.name == release:
+        return None
+    current_manifest = _read_manifest(current) if current else {}
+
+    releases = directory / RELEASES_DIR
+    releases.mkdir(parents=True, exist_ok=True)
+    staging = releases / f".{release}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir()
+    staging_root = staging.resolve()
+    for path, content in files:
+        target = (staging / path).resolve()
+        if not target.is_relative_to(staging_root):
+            shutil.rmtree(staging, ignore_errors=True)
+            raise ValueError(f"Rule file path outside of the release: {path}")
+        previous = None
+        if (
+            current is not None
+            and current_manifest.get(path) == manifest[path]
+        ):
+            previous = current / path
+        _stage_file(target, content, previous)
+    (staging / MANIFEST_PATH).write_bytes(manifest_data)
+
+    shutil.rmtree(releases / release, ignore_errors=True)
+    os.rename(staging, releases / release)
+    _swap_symlink(current_link, os.path.join(RELEASES_DIR, release))
+
+    kept = {release, current.name if current else None}
+    for entry in releases.iterdir():
+        if entry.name not in kept:
+            shutil.rmtree(entry, ignore_errors=True)
+    return release
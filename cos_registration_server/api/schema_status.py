@@ -1,12 +1,21 @@
 """API schema status."""
 
 from api.serializer import (
+    ArchiveImportSerializer,
+    ClaimedCertificateSerializer,
+    DashboardVersionContentSerializer,
+    DashboardVersionSerializer,
+    DeviceBundleSerializer,
     DeviceCertificateSerializer,
+    DevicesBulkDeleteSerializer,
+    DevicesBulkUpdateResultSerializer,
     DeviceSerializer,
+    FleetSummarySerializer,
     FoxgloveDashboardSerializer,
     GrafanaDashboardSerializer,
     LokiAlertRuleFileSerializer,
     PrometheusAlertRuleFileSerializer,
+    PrometheusTargetGroupSerializer,
 )
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiExample, OpenApiResponse
@@ -15,6 +24,37 @@ code_200_device = {200: DeviceSerializer}
 code_201_device = {201: DeviceSerializer}
 code_404_uid_not_found = {404: OpenApiResponse(description="UID not found")}
 
+code_200_pending_certificates_claim = {
+    200: ClaimedCertificateSerializer(many=True)
+}
+
+code_200_device_bundle = {
+    200: DeviceBundleSerializer,
+    304: OpenApiResponse(
+        description="Device bundle unchanged since the If-None-Match ETag"
+    ),
+}
+
+code_200_fleet_summary = {200: FleetSummarySerializer}
+
+code_200_devices_export = {
+    200: OpenApiResponse(
+        response=OpenApiTypes.STR,
+        description="Newline delimited JSON stream, "
+        "one serialized device per line.",
+    )
+}
+
+code_200_prometheus_sd = {
+    200: PrometheusTargetGroupSerializer(many=True),
+    304: OpenApiResponse(
+        description="Targets unchanged since the If-None-Match ETag"
+    ),
+}
+
+code_200_devices_bulk_delete = {200: DevicesBulkDeleteSerializer}
+code_200_devices_bulk_update = {200: DevicesBulkUpdateResultSerializer}
+
 code_200_device_certificate = {200: DeviceCertificateSerializer}
 code_202_csr_accepted = {
     202: OpenApiResponse(description="CSR accepted for processing")
@@ -33,19 +73,77 @@ code_200_dashboard = {
         description="Dashboard JSON returned as an attachment with "
         "content-disposition header like: "
         "'attachment; filename=dashboard_uid.json'",
-    )
+    ),
+    304: OpenApiResponse(
+        description="Dashboard unchanged since the If-None-Match ETag"
+    ),
+}
+
+code_200_dashboards_bundle = {
+    200: OpenApiResponse(
+        response=OpenApiTypes.BINARY,
+        description="tar.gz archive of the dashboards, one <uid>.json "
+        "file per dashboard, returned as an attachment named bundle.tar.gz",
+    ),
+    304: OpenApiResponse(
+        description="Dashboards unchanged since the If-None-Match ETag"
+    ),
 }
 
 code_404_dashboard_not_found = {
     404: OpenApiResponse(description="Dashboard not found")
 }
 
+code_409_json_patch_test_failed = {
+    409: OpenApiResponse(description="A JSON Patch test operation failed")
+}
+
+code_409_certificate_lease_lost = {
+    409: OpenApiResponse(
+        description="The lease_id doesn't match the request claim anymore"
+    )
+}
+
+code_200_dashboard_versions = {200: DashboardVersionSerializer(many=True)}
+code_200_dashboard_version = {200: DashboardVersionContentSerializer}
+code_404_dashboard_version_not_found = {
+    404: OpenApiResponse(description="Dashboard or version not found")
+}
+
+code_200_archive_import = {200: ArchiveImportSerializer}
+code_400_archive_import = {
+    400: OpenApiResponse(
+        response=ArchiveImportSerializer,
+        description="Invalid archive, or archive with invalid files",
+    )
+}
+
 code_200_prometheus_alert_rule_file = {200: PrometheusAlertRuleFileSerializer}
 code_201_prometheus_alert_rule_file = {201: PrometheusAlertRuleFileSerializer}
 
 code_200_loki_alert_rule_file = {200: LokiAlertRuleFileSerializer}
 code_201_loki_alert_rule_file = {201: LokiAlertRuleFileSerializer}
 
+code_200_alert_rules_bundle = {
+    200: OpenApiResponse(
+        response=OpenApiTypes.BINARY,
+        description="tar.gz archive of the alert rule files starting with "
+        "manifest.json, the SHA-256 of each file by path, followed by "
+        "<uid>.rules files and <uid>/<device_uid>.rules files for the "
+        "rendered templates. Returned as an attachment named bundle.tar.gz",
+    ),
+    304: OpenApiResponse(
+        description="Alert rule files unchanged since the If-None-Match ETag"
+    ),
+}
+code_200_alert_rules_manifest = {
+    200: OpenApiResponse(
+        response=OpenApiTypes.OBJECT,
+        description="SHA-256 of each file of the alert rule files bundle, "
+        "by path",
+    )
+}
+
 code_404_alert_rule_file_not_found = {
     404: OpenApiResponse(description="Alert rule file not found")
 }
@@ -1,9 +1,10 @@
 """API app serializer."""
 
 import json
-from typing import Any, Dict, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 import yaml
+from api.filters import DEVICE_FILTERS
 from applications.models import (
     AlertRuleFile,
     Dashboard,
@@ -11,13 +12,48 @@ from applications.models import (
     GrafanaDashboard,
     LokiAlertRuleFile,
     PrometheusAlertRuleFile,
+    hash_dashboard,
+    serialize_dashboard,
 )
 from applications.utils import is_alert_rule_a_jinja_template
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
-from devices.models import Device, DeviceCertificate
+from devices.models import DEVICE_RELATIONS, Device, DeviceCertificate
+from django.conf import settings
 from django.core.serializers.pyyaml import DjangoSafeDumper
+from django.db.models import QuerySet
 from rest_framework import serializers
+from rest_framework.request import Request
+
+DASHBOARD_DEFAULT_FIELDS = ("uid", "dashboard")
+DASHBOARD_SUMMARY_FIELDS = ("uid", "content_hash", "size")
+CERTIFICATE_CLAIM_MAX = 100
+
+
+def requested_dashboard_fields(request: Optional[Request]) -> Tuple[str, ...]:
+    """Return the dashboard fields requested by a GET request.
+
+    ?fields= selects the listed fields (comma-separated list),
+    ?summary=true selects the fields describing a dashboard without
+    its body. Otherwise, the uid and the dashboard are provided.
+
+    request: the request, if any.
+    return: the names of the requested fields.
+    raise: serializers.ValidationError if a field is unknown.
+    """
+    if request is None or request.method != "GET":
+        return DASHBOARD_DEFAULT_FIELDS
+    if requested_fields := request.query_params.get("fields"):
+        fields = tuple(requested_fields.split(","))
+        known_fields = (*DASHBOARD_DEFAULT_FIELDS, *DASHBOARD_SUMMARY_FIELDS)
+        if unknown := sorted(set(fields) - set(known_fields)):
+            raise serializers.ValidationError(
+                {"fields": f"Unknown fields: {', '.join(unknown)}"}
+            )
+        return fields
+    if request.query_params.get("summary", "").lower() in ("true", "1"):
+        return DASHBOARD_SUMMARY_FIELDS
+    return DASHBOARD_DEFAULT_FIELDS
 
 
 class DashboardSerializer:
@@ -27,7 +63,24 @@ class DashboardSerializer:
         """DashboardSerializer Meta class."""
 
         model = Dashboard
-        fields = ["uid", "dashboard"]
+        fields = ["uid", "dashboard", "content_hash", "size"]
+
+    def get_fields(self) -> Dict[str, Any]:
+        """Return the requested fields only.
+
+        The fields can be forced with the "fields" context,
+        otherwise see requested_dashboard_fields.
+        """
+        fields = super().get_fields()  # type: ignore[misc]
+        context = self.context  # type: ignore[attr-defined]
+        requested_fields = context.get("fields") or requested_dashboard_fields(
+            context.get("request")
+        )
+        return {
+            name: field
+            for name, field in fields.items()
+            if name in requested_fields
+        }
 
     def update(
         self, instance: Dashboard, validated_data: Dict[str, Any]
@@ -37,7 +90,13 @@ class DashboardSerializer:
         instance: Device instance.
         validated_data: Dict of partial and validated data.
         """
-        dashboard = validated_data.get("dashboard", instance.dashboard)
+        dashboard = validated_data.get("dashboard")
+        if dashboard is None or (
+            hash_dashboard(serialize_dashboard(dashboard))
+            == instance.content_hash
+        ):
+            # unchanged upload, skip the writes
+            return instance
         instance.dashboard = dashboard
         instance.save()
         return instance
@@ -74,6 +133,9 @@ class GrafanaDashboardSerializer(
 ):
     """Grafana Dashboard Serializer class."""
 
+    dashboard = serializers.JSONField()
+    content_hash = serializers.CharField(read_only=True)
+
     class Meta(DashboardSerializer.Meta):
         """DashboardSerializer Meta class."""
 
@@ -92,6 +154,9 @@ class FoxgloveDashboardSerializer(
 ):
     """Foxglove Dashboard Serializer class."""
 
+    dashboard = serializers.JSONField()
+    content_hash = serializers.CharField(read_only=True)
+
     class Meta(DashboardSerializer.Meta):
         """DashboardSerializer Meta class."""
 
@@ -105,6 +170,57 @@ class FoxgloveDashboardSerializer(
         return FoxgloveDashboard.objects.create(**validated_data)
 
 
+class JSONPatchOperationSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """JSON Patch operation serializer class.
+
+    Only used to document the RFC 6902 JSON Patch requests.
+    """
+
+    op = serializers.ChoiceField(
+        choices=["add", "remove", "replace", "move", "copy", "test"]
+    )
+    path = serializers.CharField(help_text="JSON pointer of the target.")
+    value = serializers.JSONField(
+        required=False,
+        help_text="Value of the add, replace and test operations.",
+    )
+
+    def get_fields(self) -> Dict[str, Any]:
+        """Add the from field, a Python keyword."""
+        fields = super().get_fields()
+        fields["from"] = serializers.CharField(
+            required=False,
+            help_text="JSON pointer of the source "
+            "of the move and copy operations.",
+        )
+        return fields
+
+
+class DashboardVersionSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Dashboard version serializer class."""
+
+    version = serializers.IntegerField(read_only=True)
+    created = serializers.DateTimeField(read_only=True)
+    content_hash = serializers.CharField(read_only=True)
+    size = serializers.IntegerField(read_only=True)
+    checkpoint = serializers.BooleanField(
+        source="is_checkpoint",
+        read_only=True,
+        help_text="Whether the version stores the whole dashboard "
+        "rather than the changes from the previous version.",
+    )
+
+
+class DashboardVersionContentSerializer(DashboardVersionSerializer):
+    """Dashboard version serializer class, with the dashboard JSON."""
+
+    dashboard = serializers.JSONField(source="content", read_only=True)
+
+
 class DeviceCertificateSerializer(
     serializers.ModelSerializer  # type: ignore[type-arg]
 ):
@@ -144,6 +260,70 @@ class DeviceCertificateSerializer(
         return value
 
 
+class PendingCertificateSerializer(
+    serializers.ModelSerializer  # type: ignore[type-arg]
+):
+    """Pending certificate signing request serializer class."""
+
+    uid = serializers.CharField(source="device.uid", read_only=True)
+
+    class Meta:
+        """PendingCertificateSerializer Meta class."""
+
+        model = DeviceCertificate
+        fields = ("uid", "csr", "created_at", "lease_expires_at")
+        read_only_fields = fields
+
+
+class ClaimedCertificateSerializer(PendingCertificateSerializer):
+    """Claimed certificate signing request serializer class.
+
+    Only the claiming signer gets the lease_id,
+    to send along with the signed certificate.
+    """
+
+    class Meta:
+        """ClaimedCertificateSerializer Meta class."""
+
+        model = DeviceCertificate
+        fields = ("uid", "csr", "created_at", "lease_expires_at", "lease_id")
+        read_only_fields = fields
+
+
+class CertificateClaimSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Pending certificate signing requests claim serializer class."""
+
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=CERTIFICATE_CLAIM_MAX,
+        default=10,
+        help_text="Maximum number of requests to claim.",
+    )
+    lease = serializers.IntegerField(
+        min_value=1,
+        required=False,
+        help_text="Time in seconds the requests are claimed for, "
+        "CERTIFICATE_LEASE_DURATION by default, "
+        "at most CERTIFICATE_LEASE_MAX_DURATION.",
+    )
+
+    def validate_lease(self, value: int) -> int:
+        """Validate the lease duration against the settings.
+
+        value: the lease duration in seconds.
+        return: the lease duration.
+        raise: serializers.ValidationError if the lease is too long.
+        """
+        if value > settings.CERTIFICATE_LEASE_MAX_DURATION:
+            raise serializers.ValidationError(
+                "Ensure this value is less than or equal to "
+                f"{settings.CERTIFICATE_LEASE_MAX_DURATION}."
+            )
+        return value
+
+
 class DeviceSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
     """Device Serializer class."""
 
@@ -186,12 +366,14 @@ class DeviceSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
             "creation_date",
             "address",
             "public_ssh_key",
+            "last_seen",
             "grafana_dashboards",
             "foxglove_dashboards",
             "prometheus_alert_rule_files",
             "loki_alert_rule_files",
             "certificate",
         )
+        read_only_fields = ("last_seen",)
 
     def to_representation(self, instance: Device) -> Dict[str, Any]:
         """Repesent filter by fields serialized data.
@@ -393,6 +575,240 @@ class DeviceSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
         return instance
 
 
+class FleetSummarySerializer(serializers.Serializer):  # type: ignore[type-arg]
+    """Fleet summary serializer class.
+
+    Only used to document the fleet summary response.
+    """
+
+    devices = serializers.IntegerField(help_text="Number of devices.")
+    certificates = serializers.DictField(
+        child=serializers.IntegerField(),
+        help_text="Number of devices per certificate status, "
+        "'none' counting the devices without certificate.",
+    )
+    grafana_dashboards = serializers.DictField(
+        child=serializers.IntegerField(),
+        help_text="Number of devices per Grafana dashboard uid.",
+    )
+    foxglove_dashboards = serializers.DictField(
+        child=serializers.IntegerField(),
+        help_text="Number of devices per Foxglove dashboard uid.",
+    )
+    prometheus_alert_rule_files = serializers.DictField(
+        child=serializers.IntegerField(),
+        help_text="Number of devices per Prometheus alert rule file uid.",
+    )
+    loki_alert_rule_files = serializers.DictField(
+        child=serializers.IntegerField(),
+        help_text="Number of devices per Loki alert rule file uid.",
+    )
+
+
+class PrometheusTargetGroupSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Prometheus HTTP service discovery target group serializer class.
+
+    Only used to document the service discovery response.
+    """
+
+    targets = serializers.ListField(
+        child=serializers.CharField(),
+        help_text="The device address and port to scrape.",
+    )
+    labels = serializers.DictField(
+        child=serializers.CharField(),
+        help_text="Labels of the target: device_instance, the device uid.",
+    )
+
+
+class DeviceBundleDeviceSerializer(
+    serializers.ModelSerializer  # type: ignore[type-arg]
+):
+    """Device record of a device bundle serializer class.
+
+    Only used to document the device bundle response.
+    """
+
+    class Meta:
+        """DeviceBundleDeviceSerializer Meta class."""
+
+        model = Device
+        fields = ("uid", "creation_date", "address", "public_ssh_key")
+
+
+class DashboardSummarySerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Dashboard summary serializer class.
+
+    Only used to document the device bundle response.
+    """
+
+    uid = serializers.CharField()
+    content_hash = serializers.CharField(
+        help_text="SHA-256 of the dashboard JSON."
+    )
+    size = serializers.IntegerField(
+        help_text="Size in bytes of the dashboard JSON."
+    )
+
+
+class RenderedAlertRuleFileSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Rendered alert rule file serializer class.
+
+    Only used to document the device bundle response.
+    """
+
+    uid = serializers.CharField(
+        help_text="Uid of the rule file, <uid>/<device uid> if rendered."
+    )
+    rules = serializers.CharField(help_text="The rules YAML.")
+
+
+class DeviceBundleSerializer(serializers.Serializer):  # type: ignore[type-arg]
+    """Device bundle serializer class.
+
+    Only used to document the device bundle response.
+    """
+
+    device = DeviceBundleDeviceSerializer()
+    certificate = DeviceCertificateSerializer(
+        allow_null=True, help_text="Null if the device didn't send a CSR."
+    )
+    grafana_dashboards = DashboardSummarySerializer(many=True)
+    foxglove_dashboards = DashboardSummarySerializer(many=True)
+    prometheus_alert_rule_files = RenderedAlertRuleFileSerializer(many=True)
+    loki_alert_rule_files = RenderedAlertRuleFileSerializer(many=True)
+
+
+class DeviceSelectorSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Device selector serializer class.
+
+    Selects devices either by uid or with the devices list filters.
+    """
+
+    uids = serializers.ListField(
+        child=serializers.CharField(),
+        required=False,
+        allow_empty=False,
+        help_text="Uids of the selected devices.",
+    )
+    filter = serializers.DictField(
+        child=serializers.CharField(),
+        required=False,
+        allow_empty=False,
+        help_text="Devices list filters selecting the devices. "
+        f"Supported filters: {', '.join(DEVICE_FILTERS)}.",
+    )
+
+    def validate_filter(self, value: Dict[str, str]) -> Dict[str, str]:
+        """Validate that only supported filters are used.
+
+        An unknown filter would otherwise select every device.
+        """
+        if unknown := sorted(set(value) - set(DEVICE_FILTERS)):
+            raise serializers.ValidationError(
+                f"Unknown filters: {', '.join(unknown)}"
+            )
+        return value
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate that exactly one selector is provided."""
+        if ("uids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Provide either uids or filter.")
+        return attrs
+
+
+class DevicesBulkDeleteSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Devices bulk deletion serializer class.
+
+    Only used to document the bulk deletion response.
+    """
+
+    deleted = serializers.IntegerField(help_text="Number of deleted devices.")
+
+
+class DeviceRelationChangesSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Device relation changes serializer class.
+
+    Lists the uids to add to and remove from a device relation.
+    """
+
+    def __init__(
+        self, *args: Any, queryset: "QuerySet[Any]", **kwargs: Any
+    ) -> None:
+        """Init the serializer with the related model queryset."""
+        super().__init__(*args, **kwargs)
+        for operation in ("add", "remove"):
+            self.fields[operation] = serializers.SlugRelatedField(
+                many=True,
+                queryset=queryset,
+                slug_field="uid",
+                required=False,
+                help_text=f"Uids to {operation}.",
+            )
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate that no uid is both added and removed."""
+        added = {related.uid for related in attrs.get("add", [])}
+        removed = {related.uid for related in attrs.get("remove", [])}
+        if both := sorted(added & removed):
+            raise serializers.ValidationError(
+                f"Uids both added and removed: {', '.join(both)}"
+            )
+        return attrs
+
+
+class DevicesBulkUpdateSerializer(DeviceSelectorSerializer):
+    """Devices bulk update serializer class."""
+
+    grafana_dashboards = DeviceRelationChangesSerializer(
+        queryset=GrafanaDashboard.objects.all(), required=False
+    )
+
+    foxglove_dashboards = DeviceRelationChangesSerializer(
+        queryset=FoxgloveDashboard.objects.all(), required=False
+    )
+
+    prometheus_alert_rule_files = DeviceRelationChangesSerializer(
+        queryset=PrometheusAlertRuleFile.objects.all(), required=False
+    )
+
+    loki_alert_rule_files = DeviceRelationChangesSerializer(
+        queryset=LokiAlertRuleFile.objects.all(), required=False
+    )
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate that at least one relation is changed."""
+        attrs = super().validate(attrs)
+        if not any(
+            attrs.get(relation.field.name) for relation in DEVICE_RELATIONS
+        ):
+            raise serializers.ValidationError("No relation changes provided.")
+        return attrs
+
+
+class DevicesBulkUpdateResultSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Devices bulk update serializer class.
+
+    Only used to document the bulk update response.
+    """
+
+    updated = serializers.IntegerField(help_text="Number of updated devices.")
+
+
 class AlertRuleFileSerializer(
     serializers.ModelSerializer  # type: ignore[type-arg]
 ):
@@ -521,3 +937,52 @@ class LokiAlertRuleFileSerializer(
         # in the model but not exposed in the API
         validated_data["template"] = is_template
         return LokiAlertRuleFile.objects.create(**validated_data)
+
+
+class ArchiveImportFileSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Archive import file serializer class.
+
+    Only used to document the archive import report.
+    """
+
+    path = serializers.CharField(help_text="Path of the file in the archive.")
+    kind = serializers.ChoiceField(
+        choices=["grafana", "foxglove", "prometheus", "loki"],
+        required=False,
+        help_text="Kind of the file, from its directory.",
+    )
+    uid = serializers.CharField(
+        required=False, help_text="Uid of the file, from its name."
+    )
+    status = serializers.ChoiceField(
+        choices=[
+            "created",
+            "updated",
+            "unchanged",
+            "skipped",
+            "invalid",
+            "not_imported",
+        ],
+        help_text="skipped files are not recognised, not_imported files "
+        "are valid but the archive has invalid files.",
+    )
+    error = serializers.CharField(
+        required=False, help_text="Why the file is invalid."
+    )
+
+
+class ArchiveImportSerializer(
+    serializers.Serializer  # type: ignore[type-arg]
+):
+    """Archive import serializer class.
+
+    Only used to document the archive import response.
+    """
+
+    imported = serializers.BooleanField(
+        help_text="Whether the archive was imported, "
+        "nothing is imported if a file is invalid."
+    )
+    files = ArchiveImportFileSerializer(many=True)
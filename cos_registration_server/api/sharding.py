@@ -0,0 +1,72 @@
+"""Consistent sharding.
+
+Responses can be split between several consumers, for instance
+Prometheus replicas, with the ?shard=i&of=n query parameters.
+Items are assigned to shards with jump consistent hashing, so that
+changing the number of shards only moves the items of the shards
+added or removed.
+"""
+
+import hashlib
+from typing import Mapping, Optional, Tuple
+
+from rest_framework.exceptions import ValidationError
+
+_JUMP_MULTIPLIER = 2862933555777941757
+_UINT64_MASK = (1 << 64) - 1
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Assign a key to a bucket with jump consistent hashing.
+
+    See "A Fast, Minimal Memory, Consistent Hash Algorithm"
+    by Lamping and Veach.
+
+    key: a 64 bits unsigned integer.
+    buckets: the number of buckets.
+    return: the bucket of the key, between 0 and buckets - 1.
+    """
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * _JUMP_MULTIPLIER + 1) & _UINT64_MASK
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_of(uid: str, shards: int) -> int:
+    """Return the shard of an item identified by its uid."""
+    key = int.from_bytes(hashlib.sha256(uid.encode()).digest()[:8], "big")
+    return jump_hash(key, shards)
+
+
+def requested_shard(params: Mapping[str, str]) -> Optional[Tuple[int, int]]:
+    """Return the shard requested with ?shard=i&of=n.
+
+    params: typically the request query parameters.
+    return: the shard index and the number of shards, None if not sharded.
+    raise: ValidationError if the parameters are invalid.
+    """
+    shard, shards = params.get("shard"), params.get("of")
+    if shard is None and shards is None:
+        return None
+    if shard is None or shards is None:
+        raise ValidationError(
+            {"shard": "shard and of must be provided together."}
+        )
+    try:
+        index, count = int(shard), int(shards)
+    except ValueError:
+        raise ValidationError({"shard": "shard and of must be integers."})
+    if count < 1 or not 0 <= index < count:
+        raise ValidationError({"shard": "shard must be between 0 and of - 1."})
+    return index, count
+
+
+def in_shard(uid: str, shard: Optional[Tuple[int, int]]) -> bool:
+    """Return whether an item belongs to a shard.
+
+    uid: the item uid.
+    shard: the shard index and the number of shards, None if not sharded.
+    """
+    return shard is None or shard_of(uid, shard[1]) == shard[0]
@@ -0,0 +1,67 @@
+"""API signals.
+
+Bump the cache version of a model whenever one of its rows changes,
+see api/cache.py.
+"""
+
+from typing import Any, Type
+
+from api.cache import bump_model_version
+from applications.models import (
+    FoxgloveDashboard,
+    GrafanaDashboard,
+    LokiAlertRuleFile,
+    PrometheusAlertRuleFile,
+)
+from devices.models import DEVICE_RELATIONS, Device, DeviceCertificate
+from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+CACHED_MODELS = (
+    Device,
+    DeviceCertificate,
+    GrafanaDashboard,
+    FoxgloveDashboard,
+    PrometheusAlertRuleFile,
+    LokiAlertRuleFile,
+)
+
+
+def model_changed(sender: Type[models.Model], **kwargs: Any) -> None:
+    """Bump the version of a saved or deleted model."""
+    bump_model_version(sender)
+
+
+def relation_changed(
+    sender: Type[models.Model],
+    instance: models.Model,
+    action: str,
+    model: Type[models.Model],
+    **kwargs: Any,
+) -> None:
+    """Bump the versions of both sides of a changed device relation."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    bump_model_version(type(instance))
+    bump_model_version(model)
+
+
+def connect_signals() -> None:
+    """Connect the cache invalidation signals."""
+    for cached_model in CACHED_MODELS:
+        post_save.connect(
+            model_changed,
+            sender=cached_model,
+            dispatch_uid=f"api_cache_save_{cached_model._meta.label_lower}",
+        )
+        post_delete.connect(
+            model_changed,
+            sender=cached_model,
+            dispatch_uid=f"api_cache_delete_{cached_model._meta.label_lower}",
+        )
+    for relation in DEVICE_RELATIONS:
+        m2m_changed.connect(
+            relation_changed,
+            sender=relation.through,
+            dispatch_uid=f"api_cache_m2m_{relation.through._meta.label_lower}",
+        )
@@ -1,20 +1,52 @@
+import gzip
+import hashlib
+import io
 import json
+import os
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
 from datetime import datetime, timedelta
-from typing import Any, Dict, Set, Union
-from unittest.mock import Mock, patch
-
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple, Union
+from unittest.mock import ANY, Mock, patch
+
+import api.cache as cache_module
+import api.middleware as middleware
+import cbor2
+import msgpack
 import yaml
+from api.bundle import is_safe_member_path, stream_tar_gz
+from api.cache import (
+    coalesce_across_workers,
+    deferred_version_bumps,
+    get_model_versions,
+    single_flight,
+)
+from api.filters import filter_devices
+from api.rule_directory import export_rule_directory
+from api.sharding import jump_hash, requested_shard, shard_of
+from api.signals import CACHED_MODELS
 from applications.models import (
+    DashboardBlob,
     FoxgloveDashboard,
     GrafanaDashboard,
     LokiAlertRuleFile,
     PrometheusAlertRuleFile,
 )
 from devices.models import Device, DeviceCertificate
-from django.db import models
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, models
 from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APITestCase
 
 
@@ -524,6 +556,7 @@ class DeviceViewTests(APITestCase):
         self.assertEqual(response.status_code, 404)
 
 
+@override_settings(DEVICE_LAST_SEEN_FLUSH_INTERVAL=0)
 class DeviceCertificateViewTests(APITestCase):
     def setUp(self) -> None:
         self.device_uid = "robot-123"
@@ -578,6 +611,96 @@ uv/5wRkaVmEeKdM+i2l2/Hro9IMuKiLh+cOX1m/f
         self.assertIsNotNone(certificate.updated_at)
         self.assertEqual(certificate.certificate, "")
 
+    def test_resubmitted_csr_can_be_claimed(self) -> None:
+        self.create_device(uid=self.device_uid, address=self.device_address)
+        claim_url = reverse("api:pending_certificates_claim")
+        self.client.post(
+            self.device_certificate_url, {"csr": self.valid_csr}, format="json"
+        )
+        response = self.client.post(claim_url, {}, format="json")
+        self.assertEqual(len(response.json()), 1)
+
+        # the device submits a new request while the old one is claimed
+        self.client.post(
+            self.device_certificate_url, {"csr": self.valid_csr}, format="json"
+        )
+        certificate = DeviceCertificate.objects.get()
+        self.assertIsNone(certificate.lease_id)
+        self.assertIsNone(certificate.lease_expires_at)
+        response = self.client.post(claim_url, {}, format="json")
+        self.assertEqual(
+            [claimed["uid"] for claimed in response.json()], [self.device_uid]
+        )
+
+    def test_sign_with_lease(self) -> None:
+        self.create_device(uid=self.device_uid, address=self.device_address)
+        self.client.post(
+            self.device_certificate_url, {"csr": self.valid_csr}, format="json"
+        )
+        response = self.client.post(
+            reverse("api:pending_certificates_claim"), {}, format="json"
+        )
+        (claimed,) = response.json()
+        response = self.client.patch(
+            self.device_certificate_url,
+            {
+                "status": "signed",
+                "certificate": "cert",
+                "lease_id": claimed["lease_id"],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "signed")
+        certificate = DeviceCertificate.objects.get()
+        self.assertEqual(certificate.certificate, "cert")
+        self.assertEqual(
+            certificate.status, DeviceCertificate.CertificateStatus.SIGNED
+        )
+
+    def test_sign_after_resubmission(self) -> None:
+        self.create_device(uid=self.device_uid, address=self.device_address)
+        self.client.post(
+            self.device_certificate_url, {"csr": self.valid_csr}, format="json"
+        )
+        response = self.client.post(
+            reverse("api:pending_certificates_claim"), {}, format="json"
+        )
+        (claimed,) = response.json()
+
+        # the device submits a new request while the old one is signed
+        self.client.post(
+            self.device_certificate_url, {"csr": self.valid_csr}, format="json"
+        )
+        response = self.client.patch(
+            self.device_certificate_url,
+            {
+                "status": "signed",
+                "certificate": "stale",
+                "lease_id": claimed["lease_id"],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 409)
+        certificate = DeviceCertificate.objects.get()
+        self.assertEqual(certificate.certificate, "")
+        self.assertEqual(
+            certificate.status, DeviceCertificate.CertificateStatus.PENDING
+        )
+
+    def test_sign_with_invalid_lease(self) -> None:
+        self.create_device(uid=self.device_uid, address=self.device_address)
+        self.client.post(
+            self.device_certificate_url, {"csr": self.valid_csr}, format="json"
+        )
+        response = self.client.patch(
+            self.device_certificate_url,
+            {"status": "signed", "certificate": "cert", "lease_id": "lease"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("lease_id", response.json())
+
     def test_post_csr_device_not_found(self) -> None:
         """Test CSR submission for non-existent device."""
         response = self.client.post(
@@ -626,6 +749,33 @@ uv/5wRkaVmEeKdM+i2l2/Hro9IMuKiLh+cOX1m/f
         self.assertEqual(data["csr"], self.valid_csr)
         self.assertEqual(data["certificate"], "")
 
+    def test_get_certificate_updates_last_seen(self) -> None:
+        self.create_device(uid=self.device_uid, address=self.device_address)
+        self.assertIsNone(Device.objects.get().last_seen)
+        self.client.post(
+            self.device_certificate_url, {"csr": self.valid_csr}, format="json"
+        )
+        first_seen = Device.objects.get().last_seen
+        assert first_seen is not None
+
+        response = self.client.get(self.device_certificate_url)
+        self.assertEqual(response.status_code, 200)
+        last_seen = Device.objects.get().last_seen
+        assert last_seen is not None
+        self.assertGreater(last_seen, first_seen)
+
+        response = self.client.get(
+            reverse("api:device", args=[self.device_uid])
+        )
+        self.assertEqual(
+            datetime.fromisoformat(
+                json.loads(response.content)["last_seen"].replace(
+                    "Z", "+00:00"
+                )
+            ),
+            last_seen,
+        )
+
     def test_get_certificate_status_signed(self) -> None:
         """Test GET when certificate is signed."""
         self.create_device(uid=self.device_uid, address=self.device_address)
@@ -1624,3 +1774,2114 @@ class LokiAlertRuleFileViewTests(APITestCase):
         self.assertEqual(response.status_code, 204)
         response = self.client.get(self.url(alert_rule_uid))
         self.assertEqual(response.status_code, 404)
+
+
+class DecompressRequestMiddlewareTests(APITestCase):
+    def setUp(self) -> None:
+        self.url = reverse("api:grafana_dashboards")
+        self.dashboard = {"uid": "dashboard-1", "dashboard": {"panels": []}}
+
+    def post_compressed(
+        self, body: bytes, content_encoding: str
+    ) -> HttpResponse:
+        return self.client.post(
+            self.url,
+            body,
+            content_type="application/json",
+            HTTP_CONTENT_ENCODING=content_encoding,
+        )
+
+    def test_post_gzip_body(self) -> None:
+        body = gzip.compress(json.dumps(self.dashboard).encode())
+        response = self.post_compressed(body, "gzip")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            GrafanaDashboard.objects.get().dashboard,
+            self.dashboard["dashboard"],
+        )
+
+    def test_post_identity_body(self) -> None:
+        body = json.dumps(self.dashboard).encode()
+        response = self.post_compressed(body, "identity")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(GrafanaDashboard.objects.count(), 1)
+
+    @override_settings(DECOMPRESSED_REQUEST_MAX_SIZE=1024)
+    def test_post_gzip_bomb(self) -> None:
+        self.dashboard["dashboard"] = {"padding": "0" * 1024 * 1024}
+        body = gzip.compress(json.dumps(self.dashboard).encode())
+        self.assertLess(len(body), 1024 * 1024)
+        response = self.post_compressed(body, "gzip")
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(GrafanaDashboard.objects.count(), 0)
+
+    def test_post_invalid_gzip_body(self) -> None:
+        response = self.post_compressed(b"not gzip at all", "gzip")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(GrafanaDashboard.objects.count(), 0)
+
+    def test_post_unsupported_encoding(self) -> None:
+        response = self.post_compressed(b"payload", "br")
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(GrafanaDashboard.objects.count(), 0)
+
+    def test_post_zstd_body(self) -> None:
+        if "zstd" not in middleware.supported_content_encodings():
+            self.skipTest("zstd is not available")
+        raw = json.dumps(self.dashboard).encode()
+        try:
+            from compression import zstd  # type: ignore[import-not-found]
+
+            body = zstd.compress(raw)
+        except ImportError:
+            import zstandard  # type: ignore[import-not-found]
+
+            body = zstandard.ZstdCompressor().compress(raw)
+        response = self.post_compressed(body, "zstd")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(GrafanaDashboard.objects.count(), 1)
+
+
+class BinaryContentNegotiationTests(APITestCase):
+    def setUp(self) -> None:
+        self.url = reverse("api:devices")
+        self.device = {"uid": "robot-1", "address": "192.168.0.1"}
+
+    def test_default_is_json(self) -> None:
+        self.client.post(self.url, self.device, format="json")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(response.content)[0]["uid"], "robot-1")
+
+    def test_msgpack_round_trip(self) -> None:
+        response = self.client.post(
+            self.url,
+            msgpack.packb(self.device),
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content)["uid"], "robot-1")
+
+        response = self.client.get(self.url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, 200)
+        json_response = self.client.get(self.url)
+        self.assertEqual(
+            msgpack.unpackb(response.content),
+            json.loads(json_response.content),
+        )
+
+    def test_cbor_round_trip(self) -> None:
+        response = self.client.post(
+            self.url,
+            cbor2.dumps(self.device),
+            content_type="application/cbor",
+            HTTP_ACCEPT="application/cbor",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Content-Type"], "application/cbor")
+        self.assertEqual(cbor2.loads(response.content)["uid"], "robot-1")
+
+        response = self.client.get(self.url, HTTP_ACCEPT="application/cbor")
+        self.assertEqual(response.status_code, 200)
+        json_response = self.client.get(self.url)
+        self.assertEqual(
+            cbor2.loads(response.content), json.loads(json_response.content)
+        )
+
+    def test_certificate_status_as_msgpack(self) -> None:
+        device = Device.objects.create(**self.device)
+        DeviceCertificate.objects.create(
+            device=device,
+            csr="csr",
+            status=DeviceCertificate.CertificateStatus.PENDING,
+        )
+        response = self.client.get(
+            reverse("api:device_certificate", kwargs={"uid": "robot-1"}),
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            msgpack.unpackb(response.content)["status"], "pending"
+        )
+
+    def test_invalid_msgpack_body(self) -> None:
+        response = self.client.post(
+            self.url, b"\xc1", content_type="application/msgpack"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Device.objects.count(), 0)
+
+
+@override_settings(API_CACHE_TIMEOUT=60)
+class ResponseCacheTests(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.devices_url = reverse("api:devices")
+        self.rules_url = reverse("api:prometheus_alert_rule_files")
+
+    def test_cache_disabled_by_default(self) -> None:
+        with override_settings(API_CACHE_TIMEOUT=0):
+            self.client.get(self.devices_url)
+            Device.objects.bulk_create(
+                [Device(uid="robot-1", address="127.0.0.1")]
+            )
+            response = self.client.get(self.devices_url)
+        self.assertEqual(len(json.loads(response.content)), 1)
+
+    def test_cached_response_is_served(self) -> None:
+        self.client.get(self.devices_url)
+        # bulk_create doesn't send signals, the cache isn't invalidated
+        Device.objects.bulk_create(
+            [Device(uid="robot-1", address="127.0.0.1")]
+        )
+        response = self.client.get(self.devices_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)), 0)
+        # other query parameters are cached separately
+        response = self.client.get(self.devices_url, {"fields": "uid"})
+        self.assertEqual(json.loads(response.content), [{"uid": "robot-1"}])
+
+    def test_save_invalidates_cache(self) -> None:
+        self.client.get(self.devices_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                self.devices_url,
+                {"uid": "robot-1", "address": "127.0.0.1"},
+                format="json",
+            )
+        response = self.client.get(self.devices_url)
+        self.assertEqual(len(json.loads(response.content)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Device.objects.get().delete()
+        response = self.client.get(self.devices_url)
+        self.assertEqual(len(json.loads(response.content)), 0)
+
+    def test_relation_change_invalidates_cache(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            device = Device.objects.create(uid="robot-1", address="127.0.0.1")
+            rule = PrometheusAlertRuleFile.objects.create(
+                uid="rule-1",
+                rules="groups:\n- name: rule_%%juju_device_uuid%%",
+                template=True,
+            )
+        response = self.client.get(self.rules_url)
+        self.assertEqual(json.loads(response.content), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            device.prometheus_alert_rule_files.add(rule)
+        response = self.client.get(self.rules_url)
+        self.assertEqual(
+            [rule["uid"] for rule in json.loads(response.content)],
+            ["rule-1/robot-1"],
+        )
+
+    def test_deferred_version_bumps(self) -> None:
+        versions = get_model_versions([Device])
+        with self.captureOnCommitCallbacks(execute=True):
+            with deferred_version_bumps():
+                for i in range(3):
+                    Device.objects.create(uid=f"robot-{i}", address="::1")
+                self.assertEqual(get_model_versions([Device]), versions)
+        self.assertEqual(get_model_versions([Device]), [versions[0] + 1])
+
+
+class RequestCoalescingTests(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_single_flight_shares_computation(self) -> None:
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute() -> str:
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "rendered"
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(single_flight("key", compute))
+        )
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(
+                target=lambda: results.append(single_flight("key", compute))
+            )
+            for _ in range(4)
+        ]
+        for follower in followers:
+            follower.start()
+        # release the leader once every follower joined its flight
+        flight = cache_module._flights["key"]
+        deadline = time.monotonic() + 5
+        while flight.waiters < len(followers):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["rendered"] * 5)
+
+    @override_settings(API_COALESCE_TIMEOUT=0)
+    def test_single_flight_wait_timeout(self) -> None:
+        started = threading.Event()
+        release = threading.Event()
+
+        def hang() -> str:
+            started.set()
+            release.wait(5)
+            return "hung"
+
+        leader = threading.Thread(target=single_flight, args=("key", hang))
+        leader.start()
+        started.wait(5)
+        try:
+            # the follower gives up waiting and computes the result itself
+            self.assertEqual(single_flight("key", lambda: "own"), "own")
+        finally:
+            release.set()
+            leader.join(5)
+
+    def test_single_flight_shares_error(self) -> None:
+        def compute() -> str:
+            raise RuntimeError("failure")
+
+        with self.assertRaises(RuntimeError):
+            single_flight("key", compute)
+        # the failed flight is not kept around
+        self.assertEqual(single_flight("key", lambda: "ok"), "ok")
+
+    @override_settings(API_COALESCE_TIMEOUT=5)
+    def test_wait_for_other_worker(self) -> None:
+        # another worker holds the lock and computes the response
+        cache.add("key:lock", True)
+        timer = threading.Timer(0.1, lambda: cache.set("key", ["shared"]))
+        timer.start()
+        compute = Mock(return_value=["own"])
+        self.assertEqual(
+            coalesce_across_workers("key", compute, 60), ["shared"]
+        )
+        compute.assert_not_called()
+        timer.join()
+
+    @override_settings(API_COALESCE_TIMEOUT=5)
+    def test_compute_when_other_worker_fails(self) -> None:
+        cache.add("key:lock", True)
+        timer = threading.Timer(0.1, lambda: cache.delete("key:lock"))
+        timer.start()
+        compute = Mock(return_value=["own"])
+        self.assertEqual(coalesce_across_workers("key", compute, 60), ["own"])
+        compute.assert_called_once()
+        timer.join()
+
+    def test_leader_stores_result_and_releases_lock(self) -> None:
+        compute = Mock(return_value=["own"])
+        self.assertEqual(coalesce_across_workers("key", compute, 60), ["own"])
+        self.assertEqual(cache.get("key"), ["own"])
+        self.assertIsNone(cache.get("key:lock"))
+
+
+class FleetSummaryViewTests(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.url = reverse("api:fleet_summary")
+
+    def test_get_empty_fleet(self) -> None:
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            {
+                "devices": 0,
+                "certificates": {
+                    "pending": 0,
+                    "signed": 0,
+                    "denied": 0,
+                    "none": 0,
+                },
+                "grafana_dashboards": {},
+                "foxglove_dashboards": {},
+                "prometheus_alert_rule_files": {},
+                "loki_alert_rule_files": {},
+            },
+        )
+
+    def test_get_summary(self) -> None:
+        devices = [
+            Device.objects.create(uid=f"robot-{i}", address="127.0.0.1")
+            for i in range(4)
+        ]
+        for device, certificate_status in zip(
+            devices, ["pending", "pending", "signed"]
+        ):
+            DeviceCertificate.objects.create(
+                device=device, csr="csr", status=certificate_status
+            )
+        dashboard = GrafanaDashboard.objects.create(uid="d-1", dashboard={})
+        GrafanaDashboard.objects.create(uid="d-2", dashboard={})
+        rule = LokiAlertRuleFile.objects.create(uid="r-1", rules="a: b")
+        for device in devices[:3]:
+            device.grafana_dashboards.add(dashboard)
+        devices[0].loki_alert_rule_files.add(rule)
+
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            {
+                "devices": 4,
+                "certificates": {
+                    "pending": 2,
+                    "signed": 1,
+                    "denied": 0,
+                    "none": 1,
+                },
+                "grafana_dashboards": {"d-1": 3, "d-2": 0},
+                "foxglove_dashboards": {},
+                "prometheus_alert_rule_files": {},
+                "loki_alert_rule_files": {"r-1": 1},
+            },
+        )
+
+        # served from the cache
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    @override_settings(FLEET_SUMMARY_CACHE_TIMEOUT=0)
+    def test_get_summary_without_cache(self) -> None:
+        self.client.get(self.url)
+        Device.objects.create(uid="robot-1", address="127.0.0.1")
+        response = self.client.get(self.url)
+        self.assertEqual(json.loads(response.content)["devices"], 1)
+
+
+class DevicesExportViewTests(APITestCase):
+    def setUp(self) -> None:
+        self.url = reverse("api:devices_export")
+
+    def export(self) -> list[Dict[str, Any]]:
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        content = b"".join(response.streaming_content)  # type: ignore[attr-defined] # noqa: E501
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_export_nothing(self) -> None:
+        self.assertEqual(self.export(), [])
+
+    def test_export_devices(self) -> None:
+        dashboard = GrafanaDashboard.objects.create(uid="d-1", dashboard={})
+        rule = PrometheusAlertRuleFile.objects.create(uid="r-1", rules="a: b")
+        for i in range(5):
+            device = Device.objects.create(
+                uid=f"robot-{i}", address=f"192.168.0.{i}"
+            )
+            device.grafana_dashboards.add(dashboard)
+            device.prometheus_alert_rule_files.add(rule)
+        DeviceCertificate.objects.create(
+            device=Device.objects.get(uid="robot-0"),
+            csr="csr",
+            status=DeviceCertificate.CertificateStatus.PENDING,
+        )
+
+        lines = self.export()
+        self.assertEqual(
+            [line["uid"] for line in lines], [f"robot-{i}" for i in range(5)]
+        )
+        self.assertEqual(lines[0]["certificate"]["status"], "pending")
+        self.assertIsNone(lines[1]["certificate"])
+        self.assertEqual(
+            lines, json.loads(self.client.get(reverse("api:devices")).content)
+        )
+
+    def test_export_prefetches_per_chunk(self) -> None:
+        for i in range(5):
+            Device.objects.create(uid=f"robot-{i}", address="127.0.0.1")
+        with patch("api.views.DevicesExportView.chunk_size", 2):
+            response = self.client.get(self.url)
+            # one cursor query plus one query per relation per chunk
+            with self.assertNumQueries(1 + 3 * 4):
+                content = b"".join(response.streaming_content)  # type: ignore[attr-defined] # noqa: E501
+        self.assertEqual(len(content.splitlines()), 5)
+
+
+class DeviceFiltersTests(APITestCase):
+    def setUp(self) -> None:
+        self.url = reverse("api:devices")
+        self.rule = PrometheusAlertRuleFile.objects.create(
+            uid="r-1", rules="a: b"
+        )
+        self.loki_rule = LokiAlertRuleFile.objects.create(
+            uid="r-2", rules="a: b"
+        )
+        self.dashboard = GrafanaDashboard.objects.create(
+            uid="d-1", dashboard={}
+        )
+        addresses = ["192.168.1.2", "192.168.10.3", "10.0.0.1", "::1"]
+        for i, address in enumerate(addresses):
+            Device.objects.create(uid=f"robot-{i}", address=address)
+        Device.objects.filter(uid="robot-0").update(
+            creation_date=timezone.now() - timedelta(days=10)
+        )
+        Device.objects.get(uid="robot-1").prometheus_alert_rule_files.add(
+            self.rule
+        )
+        Device.objects.get(uid="robot-2").loki_alert_rule_files.add(
+            self.loki_rule
+        )
+        Device.objects.get(uid="robot-3").grafana_dashboards.add(
+            self.dashboard
+        )
+        DeviceCertificate.objects.create(
+            device=Device.objects.get(uid="robot-0"),
+            csr="csr",
+            status=DeviceCertificate.CertificateStatus.SIGNED,
+        )
+        DeviceCertificate.objects.create(
+            device=Device.objects.get(uid="robot-1"),
+            csr="csr",
+            status=DeviceCertificate.CertificateStatus.PENDING,
+        )
+
+    def list_uids(self, **params: str) -> list[str]:
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(device["uid"] for device in response.json())
+
+    def explain(self, **params: str) -> str:
+        if connection.vendor == "postgresql":
+            # the tables are too small for the planner to pick an index
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return filter_devices(Device.objects.all(), params).explain()
+
+    def assertNoFullScan(self, plan: str) -> None:
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan", plan)
+        else:
+            self.assertNotRegex(plan, r"\bSCAN\b")
+
+    def test_filter_exact_address(self) -> None:
+        self.assertEqual(self.list_uids(address="192.168.1.2"), ["robot-0"])
+        self.assertEqual(self.list_uids(address="::1"), ["robot-3"])
+        plan = self.explain(address="192.168.1.2")
+        self.assertIn("device_address_idx", plan)
+        self.assertNoFullScan(plan)
+
+    def test_filter_address_prefix(self) -> None:
+        self.assertEqual(
+            self.list_uids(address="192.168."), ["robot-0", "robot-1"]
+        )
+        self.assertEqual(self.list_uids(address="192.168.1."), ["robot-0"])
+        self.assertEqual(self.list_uids(address="172."), [])
+        plan = self.explain(address="192.168.")
+        if connection.vendor == "postgresql":
+            self.assertIn("device_address_host_idx", plan)
+        else:
+            self.assertIn("device_address_idx", plan)
+        self.assertNoFullScan(plan)
+
+    def test_filter_creation_date(self) -> None:
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        self.assertEqual(
+            self.list_uids(created_after=since),
+            ["robot-1", "robot-2", "robot-3"],
+        )
+        self.assertEqual(self.list_uids(created_before=since), ["robot-0"])
+        self.assertEqual(
+            self.list_uids(
+                created_after="2000-01-01T00:00:00", created_before=since
+            ),
+            ["robot-0"],
+        )
+        for param in ("created_after", "created_before"):
+            plan = self.explain(**{param: since})
+            self.assertIn("device_creation_date_idx", plan)
+            self.assertNoFullScan(plan)
+
+    def test_filter_creation_date_offset(self) -> None:
+        since = (timezone.now() - timedelta(days=1)).replace(microsecond=0)
+        for offset in ("+00:00", "%2B00:00", "+0000", "+00"):
+            query = since.strftime("%Y-%m-%dT%H:%M:%S") + offset
+            response = self.client.get(f"{self.url}?created_before={query}")
+            self.assertEqual(response.status_code, 200, offset)
+            self.assertEqual(
+                [device["uid"] for device in response.json()], ["robot-0"]
+            )
+
+    def test_filter_invalid_creation_date(self) -> None:
+        response = self.client.get(self.url, {"created_after": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("created_after", response.json())
+
+    def test_filter_certificate_status(self) -> None:
+        self.assertEqual(
+            self.list_uids(certificate_status="signed"), ["robot-0"]
+        )
+        self.assertEqual(
+            self.list_uids(certificate_status="pending"), ["robot-1"]
+        )
+        self.assertEqual(self.list_uids(certificate_status="denied"), [])
+        self.assertEqual(
+            self.list_uids(certificate_status="none"), ["robot-2", "robot-3"]
+        )
+        plan = self.explain(certificate_status="signed")
+        self.assertIn("device_certificate_status_idx", plan)
+        self.assertNoFullScan(plan)
+
+    def test_filter_invalid_certificate_status(self) -> None:
+        response = self.client.get(self.url, {"certificate_status": "lost"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("certificate_status", response.json())
+
+    def test_filter_has_rule(self) -> None:
+        self.assertEqual(self.list_uids(has_rule="r-1"), ["robot-1"])
+        self.assertEqual(self.list_uids(has_rule="r-2"), ["robot-2"])
+        self.assertEqual(self.list_uids(has_rule="unknown"), [])
+        self.assertNoFullScan(self.explain(has_rule="r-1"))
+
+    def test_filter_has_dashboard(self) -> None:
+        self.assertEqual(self.list_uids(has_dashboard="d-1"), ["robot-3"])
+        self.assertEqual(self.list_uids(has_dashboard="unknown"), [])
+        self.assertNoFullScan(self.explain(has_dashboard="d-1"))
+
+    def test_combine_filters(self) -> None:
+        self.assertEqual(
+            self.list_uids(address="192.168.", certificate_status="pending"),
+            ["robot-1"],
+        )
+        self.assertEqual(
+            self.list_uids(address="10.", has_rule="r-1"),
+            [],
+        )
+
+    def test_search(self) -> None:
+        self.assertEqual(
+            self.list_uids(search="robot"),
+            ["robot-0", "robot-1", "robot-2", "robot-3"],
+        )
+        self.assertEqual(self.list_uids(search="bot-2"), ["robot-2"])
+        self.assertEqual(
+            self.list_uids(search="robot", certificate_status="none"),
+            ["robot-2", "robot-3"],
+        )
+
+    def test_filters_ignored_on_post(self) -> None:
+        response = self.client.post(
+            self.url + "?address=10.",
+            {"uid": "robot-4", "address": "172.16.0.1"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+class DevicesBulkDeleteViewTests(APITestCase):
+    def setUp(self) -> None:
+        self.url = reverse("api:devices_bulk_delete")
+        self.dashboard = GrafanaDashboard.objects.create(
+            uid="d-1", dashboard={}
+        )
+        self.rule = PrometheusAlertRuleFile.objects.create(
+            uid="r-1", rules="a: b"
+        )
+        for i in range(4):
+            device = Device.objects.create(
+                uid=f"robot-{i}", address=f"192.168.{i % 2}.1"
+            )
+            device.grafana_dashboards.add(self.dashboard)
+            device.prometheus_alert_rule_files.add(self.rule)
+            DeviceCertificate.objects.create(device=device, csr="csr")
+
+    def remaining_uids(self) -> list[str]:
+        return sorted(Device.objects.values_list("uid", flat=True))
+
+    def test_delete_by_uids(self) -> None:
+        response = self.client.post(
+            self.url,
+            {"uids": ["robot-0", "robot-2", "unknown"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"deleted": 2})
+        self.assertEqual(self.remaining_uids(), ["robot-1", "robot-3"])
+        self.assertEqual(DeviceCertificate.objects.count(), 2)
+        self.assertEqual(self.dashboard.devices.count(), 2)
+        self.assertEqual(self.rule.devices.count(), 2)
+        self.assertTrue(GrafanaDashboard.objects.filter(uid="d-1").exists())
+
+    def test_delete_by_filter(self) -> None:
+        response = self.client.post(
+            self.url, {"filter": {"address": "192.168.1."}}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"deleted": 2})
+        self.assertEqual(self.remaining_uids(), ["robot-0", "robot-2"])
+
+    def test_delete_nothing(self) -> None:
+        response = self.client.post(
+            self.url, {"filter": {"has_rule": "unknown"}}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"deleted": 0})
+        self.assertEqual(Device.objects.count(), 4)
+
+    def test_invalid_selectors(self) -> None:
+        data: Dict[str, Any]
+        for data in (
+            {},
+            {"uids": []},
+            {"filter": {}},
+            {"uids": ["robot-0"], "filter": {"address": "192.168."}},
+            {"filter": {"adress": "192.168."}},
+            {"filter": {"certificate_status": "lost"}},
+        ):
+            response = self.client.post(self.url, data, format="json")
+            self.assertEqual(response.status_code, 400, data)
+        self.assertEqual(Device.objects.count(), 4)
+
+    def test_delete_is_set_based(self) -> None:
+        uids = [f"robot-{i}" for i in range(4)]
+        search_index = 1 if connection.vendor == "sqlite" else 0
+        with patch("api.views.DevicesBulkDeleteView.batch_size", 2):
+            # the device ids, then per batch one DELETE per table
+            # whatever the number of devices
+            with self.assertNumQueries(1 + 2 * (6 + search_index) + 2):
+                self.client.post(self.url, {"uids": uids}, format="json")
+        self.assertEqual(Device.objects.count(), 0)
+        self.assertEqual(DeviceCertificate.objects.count(), 0)
+
+    def test_delete_unindexes_search(self) -> None:
+        self.client.post(self.url, {"uids": ["robot-0"]}, format="json")
+        response = self.client.get(reverse("api:devices"), {"search": "robot"})
+        self.assertEqual(len(response.json()), 3)
+
+    @override_settings(API_CACHE_TIMEOUT=60)
+    def test_delete_invalidates_cache_once(self) -> None:
+        cache.clear()
+        self.client.get(reverse("api:devices"))
+        with patch("api.cache._bump_model_versions") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    self.url, {"uids": ["robot-0"]}, format="json"
+                )
+        bump.assert_called_once()
+        self.assertEqual(
+            bump.call_args.args[0],
+            sorted(model._meta.label_lower for model in CACHED_MODELS),
+        )
+        cache.clear()
+        response = self.client.get(reverse("api:devices"))
+        self.assertEqual(len(response.json()), 3)
+
+
+class DevicesBulkUpdateViewTests(APITestCase):
+    def setUp(self) -> None:
+        self.url = reverse("api:devices_bulk_update")
+        self.dashboards = [
+            GrafanaDashboard.objects.create(uid=f"d-{i}", dashboard={})
+            for i in range(2)
+        ]
+        self.rule = PrometheusAlertRuleFile.objects.create(
+            uid="r-1", rules="a: b"
+        )
+        for i in range(4):
+            device = Device.objects.create(
+                uid=f"robot-{i}", address=f"192.168.{i % 2}.1"
+            )
+            device.grafana_dashboards.add(self.dashboards[0])
+
+    def related_uids(self, uid: str, relation: str) -> list[str]:
+        device = Device.objects.get(uid=uid)
+        return sorted(getattr(device, relation).values_list("uid", flat=True))
+
+    def test_add_and_remove_by_uids(self) -> None:
+        response = self.client.patch(
+            self.url,
+            {
+                "uids": ["robot-0", "robot-1"],
+                "grafana_dashboards": {"add": ["d-1"], "remove": ["d-0"]},
+                "prometheus_alert_rule_files": {"add": ["r-1"]},
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"updated": 2})
+        for uid in ("robot-0", "robot-1"):
+            self.assertEqual(
+                self.related_uids(uid, "grafana_dashboards"), ["d-1"]
+            )
+            self.assertEqual(
+                self.related_uids(uid, "prometheus_alert_rule_files"), ["r-1"]
+            )
+        self.assertEqual(
+            self.related_uids("robot-2", "grafana_dashboards"), ["d-0"]
+        )
+        self.assertEqual(
+            self.related_uids("robot-2", "prometheus_alert_rule_files"), []
+        )
+
+    def test_add_by_filter_is_idempotent(self) -> None:
+        data = {
+            "filter": {"address": "192.168.1."},
+            "grafana_dashboards": {"add": ["d-0", "d-1"]},
+        }
+        for _ in range(2):
+            response = self.client.patch(self.url, data, format="json")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {"updated": 2})
+        for uid in ("robot-1", "robot-3"):
+            self.assertEqual(
+                self.related_uids(uid, "grafana_dashboards"), ["d-0", "d-1"]
+            )
+        self.assertEqual(
+            self.related_uids("robot-0", "grafana_dashboards"), ["d-0"]
+        )
+
+    def test_invalid_updates(self) -> None:
+        data: Dict[str, Any]
+        for data in (
+            {"uids": ["robot-0"]},
+            {"grafana_dashboards": {"add": ["d-1"]}},
+            {"uids": ["robot-0"], "grafana_dashboards": {"add": ["unknown"]}},
+            {
+                "uids": ["robot-0"],
+                "grafana_dashboards": {"add": ["d-1"], "remove": ["d-1"]},
+            },
+        ):
+            response = self.client.patch(self.url, data, format="json")
+            self.assertEqual(response.status_code, 400, data)
+        self.assertEqual(
+            self.related_uids("robot-0", "grafana_dashboards"), ["d-0"]
+        )
+
+    def test_update_is_set_based(self) -> None:
+        uids = [f"robot-{i}" for i in range(4)]
+        data = {
+            "uids": uids,
+            "grafana_dashboards": {"add": ["d-1"], "remove": ["d-0"]},
+        }
+        with patch("api.views.DevicesBulkUpdateView.batch_size", 2):
+            response = self.client.patch(self.url, data, format="json")
+            self.assertEqual(response.status_code, 200)
+            # the device ids, then one DELETE and one INSERT per batch
+            with CaptureQueriesContext(connection) as queries:
+                self.client.patch(self.url, data, format="json")
+        statements = [
+            query["sql"].split()[0]
+            for query in queries.captured_queries
+            if "devices_device_grafana_dashboards" in query["sql"]
+        ]
+        self.assertEqual(statements, ["DELETE", "INSERT"] * 2)
+
+    @override_settings(API_CACHE_TIMEOUT=60)
+    def test_update_invalidates_cache_once(self) -> None:
+        cache.clear()
+        with patch("api.cache._bump_model_versions") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(
+                    self.url,
+                    {
+                        "uids": ["robot-0"],
+                        "grafana_dashboards": {"add": ["d-1"]},
+                    },
+                    format="json",
+                )
+        bump.assert_called_once_with(
+            ["applications.grafanadashboard", "devices.device"]
+        )
+
+
+class DashboardListFieldsTests(APITestCase):
+    def setUp(self) -> None:
+        self.dashboard = {"title": "Production Overview", "panels": [1, 2]}
+        GrafanaDashboard.objects.create(uid="d-1", dashboard=self.dashboard)
+        FoxgloveDashboard.objects.create(uid="f-1", dashboard=self.dashboard)
+
+    def test_content_metadata(self) -> None:
+        serialized = json.dumps(
+            self.dashboard, sort_keys=True, separators=(",", ":")
+        ).encode()
+        for model in (GrafanaDashboard, FoxgloveDashboard):
+            dashboard = model.objects.get()
+            self.assertEqual(
+                dashboard.content_hash, hashlib.sha256(serialized).hexdigest()
+            )
+            self.assertEqual(dashboard.size, len(serialized))
+
+        dashboard = GrafanaDashboard.objects.get()
+        dashboard.dashboard = {"title": "Other"}
+        dashboard.save()
+        self.assertNotEqual(
+            dashboard.content_hash,
+            FoxgloveDashboard.objects.get().content_hash,
+        )
+
+    def test_default_fields(self) -> None:
+        for url in ("api:grafana_dashboards", "api:foxglove_dashboards"):
+            response = self.client.get(reverse(url))
+            self.assertEqual(
+                list(response.json()[0]), ["uid", "dashboard"], url
+            )
+
+    def test_summary(self) -> None:
+        dashboard = GrafanaDashboard.objects.get()
+        for url, uid in (
+            ("api:grafana_dashboards", "d-1"),
+            ("api:foxglove_dashboards", "f-1"),
+        ):
+            response = self.client.get(reverse(url), {"summary": "true"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.json()[0],
+                {
+                    "uid": uid,
+                    "content_hash": dashboard.content_hash,
+                    "size": dashboard.size,
+                },
+            )
+
+    def test_fields(self) -> None:
+        response = self.client.get(
+            reverse("api:grafana_dashboards"), {"fields": "uid"}
+        )
+        self.assertEqual(response.json(), [{"uid": "d-1"}])
+        response = self.client.get(
+            reverse("api:grafana_dashboards"), {"fields": "uid,dashboard"}
+        )
+        self.assertEqual(
+            response.json(), [{"uid": "d-1", "dashboard": self.dashboard}]
+        )
+
+    def test_unknown_fields(self) -> None:
+        response = self.client.get(
+            reverse("api:grafana_dashboards"), {"fields": "uid,title"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("fields", response.json())
+
+    def test_summary_does_not_load_bodies(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                reverse("api:grafana_dashboards"), {"summary": "true"}
+            )
+        (query,) = queries.captured_queries
+        self.assertNotIn('."dashboard"', query["sql"])
+
+
+class DashboardDownloadTests(APITestCase):
+    def setUp(self) -> None:
+        self.dashboard = {"title": "Production Overview", "panels": [1, 2]}
+        GrafanaDashboard.objects.create(uid="d-1", dashboard=self.dashboard)
+        FoxgloveDashboard.objects.create(uid="f-1", dashboard=self.dashboard)
+        self.urls = [
+            reverse("api:grafana_dashboard", args=("d-1",)),
+            reverse("api:foxglove_dashboard", args=("f-1",)),
+        ]
+
+    def test_download_serialized_bytes(self) -> None:
+        serialized = json.dumps(
+            self.dashboard, sort_keys=True, separators=(",", ":")
+        ).encode()
+        for url in self.urls:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, serialized)
+            self.assertEqual(
+                response["ETag"],
+                f'"{hashlib.sha256(serialized).hexdigest()}"',
+            )
+            (query,) = queries.captured_queries
+            self.assertNotIn('."dashboard"', query["sql"])
+
+    def test_if_none_match(self) -> None:
+        for url in self.urls:
+            etag = self.client.get(url)["ETag"]
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b"")
+            self.assertEqual(response["ETag"], etag)
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH='"other"')
+            self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_on_update(self) -> None:
+        url = self.urls[0]
+        etag = self.client.get(url)["ETag"]
+        self.client.patch(
+            url, {"dashboard": {"title": "Other"}}, format="json"
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"title": "Other"})
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_unchanged_upload_writes_nothing(self) -> None:
+        for url in self.urls:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(
+                    url, {"dashboard": self.dashboard}, format="json"
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(
+                [
+                    query
+                    for query in queries.captured_queries
+                    if query["sql"].startswith(("UPDATE", "INSERT"))
+                ]
+            )
+
+
+class DashboardVersionsViewTests(APITestCase):
+    def setUp(self) -> None:
+        self.dashboards = [
+            (
+                GrafanaDashboard.objects.create(uid="d-1", dashboard={"v": 1}),
+                "grafana",
+            ),
+            (
+                FoxgloveDashboard.objects.create(
+                    uid="f-1", dashboard={"v": 1}
+                ),
+                "foxglove",
+            ),
+        ]
+        for dashboard, _ in self.dashboards:
+            dashboard.dashboard = {"v": 2}
+            dashboard.save()
+
+    def test_list_versions(self) -> None:
+        for dashboard, app in self.dashboards:
+            url = reverse(
+                f"api:{app}_dashboard_versions", args=(dashboard.uid,)
+            )
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            versions = response.json()
+            self.assertEqual([v["version"] for v in versions], [1, 2])
+            self.assertEqual(
+                [v["checkpoint"] for v in versions], [True, False]
+            )
+            self.assertEqual(
+                versions[1]["content_hash"], dashboard.content_hash
+            )
+            self.assertNotIn("dashboard", versions[0])
+
+            url = reverse(f"api:{app}_dashboard_versions", args=("unknown",))
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_get_version(self) -> None:
+        for dashboard, app in self.dashboards:
+            url = reverse(
+                f"api:{app}_dashboard_version", args=(dashboard.uid, 1)
+            )
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["version"], 1)
+            self.assertEqual(response.json()["dashboard"], {"v": 1})
+
+            url = reverse(
+                f"api:{app}_dashboard_version", args=(dashboard.uid, 3)
+            )
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_rollback(self) -> None:
+        for dashboard, app in self.dashboards:
+            url = reverse(
+                f"api:{app}_dashboard_rollback", args=(dashboard.uid, 1)
+            )
+            response = self.client.post(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.json(), {"uid": dashboard.uid, "dashboard": {"v": 1}}
+            )
+            dashboard.refresh_from_db()
+            self.assertEqual(dashboard.dashboard, {"v": 1})
+            self.assertEqual(
+                list(
+                    dashboard.versions.values_list("version", "content_hash")
+                ),
+                [
+                    (1, dashboard.content_hash),
+                    (2, ANY),
+                    (3, dashboard.content_hash),
+                ],
+            )
+
+            url = reverse(
+                f"api:{app}_dashboard_rollback", args=(dashboard.uid, 4)
+            )
+            self.assertEqual(self.client.post(url).status_code, 404)
+
+
+class DashboardJSONPatchTests(APITestCase):
+    def setUp(self) -> None:
+        self.dashboard = {"title": "Overview", "panels": [{"id": 1}]}
+        GrafanaDashboard.objects.create(uid="d-1", dashboard=self.dashboard)
+        FoxgloveDashboard.objects.create(uid="f-1", dashboard=self.dashboard)
+        self.models: List[Tuple[Any, str]] = [
+            (
+                GrafanaDashboard,
+                reverse("api:grafana_dashboard", args=("d-1",)),
+            ),
+            (
+                FoxgloveDashboard,
+                reverse("api:foxglove_dashboard", args=("f-1",)),
+            ),
+        ]
+
+    def json_patch(self, url: str, patch: Any) -> Any:
+        return self.client.patch(
+            url,
+            json.dumps(patch),
+            content_type="application/json-patch+json",
+        )
+
+    def test_json_patch(self) -> None:
+        patch = [
+            {"op": "test", "path": "/title", "value": "Overview"},
+            {"op": "add", "path": "/panels/-", "value": {"id": 2}},
+        ]
+        for model, url in self.models:
+            response = self.json_patch(url, patch)
+            self.assertEqual(response.status_code, 200)
+            dashboard = model.objects.get()
+            self.assertEqual(
+                dashboard.dashboard,
+                {"title": "Overview", "panels": [{"id": 1}, {"id": 2}]},
+            )
+            self.assertEqual(
+                response.json(),
+                {
+                    "uid": dashboard.uid,
+                    "content_hash": dashboard.content_hash,
+                    "size": dashboard.size,
+                },
+            )
+            self.assertEqual(
+                dashboard.versions.get(version=2).delta,
+                [{"op": "add", "path": "/panels/1", "value": {"id": 2}}],
+            )
+
+    def test_json_patch_failed_test(self) -> None:
+        patch = [
+            {"op": "replace", "path": "/title", "value": "Other"},
+            {"op": "test", "path": "/title", "value": "Overview"},
+        ]
+        for model, url in self.models:
+            response = self.json_patch(url, patch)
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(model.objects.get().dashboard, self.dashboard)
+
+    def test_invalid_json_patch(self) -> None:
+        for model, url in self.models:
+            for patch in (
+                {"op": "add"},
+                [{"op": "remove", "path": "/unknown"}],
+                [{"op": "replace", "path": "", "value": ["not", "a", "dict"]}],
+            ):
+                response = self.json_patch(url, patch)
+                self.assertEqual(response.status_code, 400)
+            self.assertEqual(model.objects.get().dashboard, self.dashboard)
+
+    def test_json_patch_not_found(self) -> None:
+        url = reverse("api:grafana_dashboard", args=("unknown",))
+        response = self.json_patch(url, [])
+        self.assertEqual(response.status_code, 404)
+
+    def test_json_patch_only_on_patch(self) -> None:
+        _, url = self.models[0]
+        response = self.client.put(
+            url, json.dumps([]), content_type="application/json-patch+json"
+        )
+        self.assertEqual(response.status_code, 415)
+
+
+class ArchiveImportTests(APITestCase):
+    def setUp(self) -> None:
+        self.url = reverse("api:applications_import")
+        self.dashboard = {"title": "Overview", "panels": [{"id": 1}]}
+        self.rules = """groups:
+  name: cos-robotics-model_robot_NO_TEMPLATE
+  rules:
+  - alert: HighLogRatePerInstance"""
+        self.files = {
+            "grafana/overview.json": json.dumps(self.dashboard).encode(),
+            "foxglove/layout.json": json.dumps(self.dashboard).encode(),
+            "prometheus/robot.yaml": self.rules.encode(),
+            "loki/robot.rules": self.rules.encode(),
+            "README.md": b"Not imported.",
+        }
+
+    def tar_archive(self, files: Dict[str, bytes]) -> bytes:
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+            for path, content in files.items():
+                info = tarfile.TarInfo(path)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+        return buffer.getvalue()
+
+    def zip_archive(self, files: Dict[str, bytes]) -> bytes:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for path, content in files.items():
+                archive.writestr(path, content)
+        return buffer.getvalue()
+
+    def post_archive(self, archive: bytes) -> Any:
+        return self.client.post(
+            self.url, archive, content_type="application/octet-stream"
+        )
+
+    def statuses(self, response: Any) -> Dict[str, str]:
+        return {
+            file["path"]: file["status"] for file in response.json()["files"]
+        }
+
+    def test_import_tar_archive(self) -> None:
+        response = self.post_archive(self.tar_archive(self.files))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["imported"])
+        self.assertEqual(
+            self.statuses(response),
+            {
+                "grafana/overview.json": "created",
+                "foxglove/layout.json": "created",
+                "prometheus/robot.yaml": "created",
+                "loki/robot.rules": "created",
+                "README.md": "skipped",
+            },
+        )
+        grafana_dashboard = GrafanaDashboard.objects.get(uid="overview")
+        self.assertEqual(grafana_dashboard.dashboard, self.dashboard)
+        self.assertEqual(grafana_dashboard.versions.get().version, 1)
+        self.assertEqual(
+            FoxgloveDashboard.objects.get(uid="layout").dashboard,
+            self.dashboard,
+        )
+        self.assertEqual(
+            PrometheusAlertRuleFile.objects.get(uid="robot").rules,
+            yaml.safe_load(self.rules),
+        )
+        self.assertFalse(LokiAlertRuleFile.objects.get(uid="robot").template)
+        # both dashboards share the same content
+        self.assertEqual(DashboardBlob.objects.count(), 1)
+
+    def test_import_zip_archive_updates(self) -> None:
+        GrafanaDashboard.objects.create(uid="overview", dashboard={"old": 1})
+        FoxgloveDashboard.objects.create(
+            uid="layout", dashboard=self.dashboard
+        )
+        PrometheusAlertRuleFile.objects.create(uid="robot", rules="{}")
+
+        response = self.post_archive(self.zip_archive(self.files))
+        self.assertEqual(response.status_code, 200)
+        statuses = self.statuses(response)
+        self.assertEqual(statuses["grafana/overview.json"], "updated")
+        self.assertEqual(statuses["foxglove/layout.json"], "unchanged")
+        self.assertEqual(statuses["prometheus/robot.yaml"], "updated")
+        self.assertEqual(statuses["loki/robot.rules"], "created")
+
+        grafana_dashboard = GrafanaDashboard.objects.get(uid="overview")
+        self.assertEqual(grafana_dashboard.dashboard, self.dashboard)
+        self.assertEqual(grafana_dashboard.versions.count(), 2)
+        self.assertEqual(grafana_dashboard.get_version_content(1), {"old": 1})
+        self.assertEqual(
+            PrometheusAlertRuleFile.objects.get(uid="robot").rules,
+            yaml.safe_load(self.rules),
+        )
+
+    def test_import_unchanged_archive(self) -> None:
+        self.post_archive(self.tar_archive(self.files))
+        response = self.post_archive(self.tar_archive(self.files))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.statuses(response),
+            {
+                "grafana/overview.json": "unchanged",
+                "foxglove/layout.json": "unchanged",
+                "prometheus/robot.yaml": "unchanged",
+                "loki/robot.rules": "unchanged",
+                "README.md": "skipped",
+            },
+        )
+
+    def test_import_records_versions_in_bulk(self) -> None:
+        def import_dashboards(prefix: str, count: int, title: str) -> int:
+            files = {
+                f"grafana/{prefix}-{i}.json": json.dumps(
+                    {**self.dashboard, "title": title}
+                ).encode()
+                for i in range(count)
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post_archive(self.zip_archive(files))
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        # keep the first content in use so that no blob is deleted
+        import_dashboards("kept", 1, "First")
+        import_dashboards("small", 2, "First")
+        import_dashboards("large", 6, "First")
+        # updating 2 or 6 dashboards takes as many statements
+        self.assertEqual(
+            import_dashboards("small", 2, "Second"),
+            import_dashboards("large", 6, "Second"),
+        )
+        import_dashboards("large", 6, "Third")
+        dashboard = GrafanaDashboard.objects.get(uid="large-5")
+        self.assertEqual(
+            [version.is_checkpoint for version in dashboard.versions.all()],
+            [True, False, False],
+        )
+        self.assertEqual(dashboard.get_version_content(1)["title"], "First")
+        self.assertEqual(dashboard.get_version_content(2)["title"], "Second")
+        self.assertEqual(dashboard.dashboard["title"], "Third")
+
+    def test_invalid_file_imports_nothing(self) -> None:
+        files = {**self.files, "foxglove/broken.json": b"{not json"}
+        response = self.post_archive(self.tar_archive(files))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["imported"])
+        statuses = self.statuses(response)
+        self.assertEqual(statuses["foxglove/broken.json"], "invalid")
+        self.assertEqual(statuses["grafana/overview.json"], "not_imported")
+        self.assertEqual(statuses["README.md"], "skipped")
+        self.assertFalse(GrafanaDashboard.objects.exists())
+        self.assertFalse(PrometheusAlertRuleFile.objects.exists())
+
+    def test_duplicated_uid(self) -> None:
+        files = {
+            "grafana/overview.json": json.dumps(self.dashboard).encode(),
+            "other/grafana/overview.json": b"{}",
+        }
+        response = self.post_archive(self.zip_archive(files))
+        self.assertEqual(response.status_code, 400)
+        (duplicated,) = [
+            file
+            for file in response.json()["files"]
+            if file["status"] == "invalid"
+        ]
+        self.assertEqual(duplicated["path"], "other/grafana/overview.json")
+        self.assertEqual(duplicated["error"], "Duplicated uid.")
+        self.assertFalse(GrafanaDashboard.objects.exists())
+
+    def test_invalid_archive(self) -> None:
+        response = self.post_archive(b"not an archive")
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(DECOMPRESSED_REQUEST_MAX_SIZE=16)
+    def test_archive_too_large(self) -> None:
+        response = self.post_archive(self.zip_archive(self.files))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GrafanaDashboard.objects.exists())
+
+    def test_import_archive_command(self) -> None:
+        with tempfile.NamedTemporaryFile(suffix=".tar.gz") as archive:
+            archive.write(self.tar_archive(self.files))
+            archive.flush()
+            stdout = io.StringIO()
+            call_command("import_archive", archive.name, stdout=stdout)
+        self.assertIn("grafana/overview.json: created", stdout.getvalue())
+        self.assertTrue(GrafanaDashboard.objects.filter(uid="overview"))
+
+        with tempfile.NamedTemporaryFile(suffix=".zip") as archive:
+            archive.write(
+                self.zip_archive({"grafana/broken.json": b"{not json"})
+            )
+            archive.flush()
+            with self.assertRaises(CommandError):
+                call_command("import_archive", archive.name, stdout=stdout)
+
+
+class GrafanaDashboardsBundleTests(APITestCase):
+    def setUp(self) -> None:
+        self.url = reverse("api:grafana_dashboards_bundle")
+        self.dashboards = {
+            "overview": {"title": "Overview"},
+            "robot": {"title": "Robot", "panels": [{"id": 1}]},
+            "copy": {"title": "Overview"},
+        }
+        for uid, dashboard in self.dashboards.items():
+            GrafanaDashboard.objects.create(uid=uid, dashboard=dashboard)
+        self.device = Device.objects.create(
+            uid="robot-1", address="192.168.1.1"
+        )
+        self.device.grafana_dashboards.add(
+            GrafanaDashboard.objects.get(uid="robot")
+        )
+
+    def content(self, response: Any) -> bytes:
+        return b"".join(response.streaming_content)
+
+    def bundle_files(self, response: Any) -> Dict[str, Any]:
+        archive = io.BytesIO(self.content(response))
+        with tarfile.open(fileobj=archive, mode="r:gz") as tar:
+            return {
+                member.name: json.load(tar.extractfile(member))  # type: ignore
+                for member in tar.getmembers()
+            }
+
+    def test_bundle(self) -> None:
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="bundle.tar.gz"',
+        )
+        self.assertEqual(
+            self.bundle_files(response),
+            {
+                f"{uid}.json": dashboard
+                for uid, dashboard in self.dashboards.items()
+            },
+        )
+
+    def test_bundle_is_reproducible(self) -> None:
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertEqual(self.content(first), self.content(second))
+
+    def test_bundle_not_modified(self) -> None:
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        dashboard = GrafanaDashboard.objects.get(uid="robot")
+        dashboard.dashboard = {"title": "Robot v2"}
+        dashboard.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            self.bundle_files(response)["robot.json"], {"title": "Robot v2"}
+        )
+
+    def test_bundle_filters(self) -> None:
+        response = self.client.get(self.url, {"uid": "overview,copy"})
+        self.assertEqual(
+            set(self.bundle_files(response)), {"overview.json", "copy.json"}
+        )
+        response = self.client.get(self.url, {"device": "robot-1"})
+        self.assertEqual(set(self.bundle_files(response)), {"robot.json"})
+        response = self.client.get(self.url, {"device": "unknown"})
+        self.assertEqual(self.bundle_files(response), {})
+
+    def test_bundle_leaves_out_unsafe_uids(self) -> None:
+        # written before the uids were validated
+        GrafanaDashboard.objects.create(uid="../escaped", dashboard={})
+        self.assertEqual(
+            set(self.bundle_files(self.client.get(self.url))),
+            {f"{uid}.json" for uid in self.dashboards},
+        )
+
+    def test_unsafe_member_path(self) -> None:
+        for path in ("../escaped.json", "a/../../b", "/etc/passwd", "a//b"):
+            self.assertFalse(is_safe_member_path(path), path)
+            with self.assertRaises(ValueError):
+                list(stream_tar_gz([(path, b"")]))
+        self.assertTrue(is_safe_member_path("robot/robot-1.rules"))
+
+
+class AlertRuleFilesBundleTests(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.rules = """groups:
+  name: cos-robotics-model_robot_NO_TEMPLATE
+  rules:
+  - alert: HighLogRatePerInstance"""
+        self.template = """groups:
+  name: cos-robotics-model_robot_%%juju_device_uuid%%
+  rules:
+  - alert: HighLogRatePerInstance"""
+        self.devices = [
+            Device.objects.create(uid=uid, address="127.0.0.1")
+            for uid in ("robot-1", "robot-2")
+        ]
+        self.kinds: List[Tuple[Any, str, str]] = []
+        for model, kind in (
+            (PrometheusAlertRuleFile, "prometheus"),
+            (LokiAlertRuleFile, "loki"),
+        ):
+            model.objects.create(uid="static", rules=self.rules)
+            template = model.objects.create(
+                uid="robot", rules=self.template, template=True
+            )
+            template.devices.add(*self.devices)
+            self.kinds.append(
+                (
+                    model,
+                    reverse(f"api:{kind}_alert_rule_files_bundle"),
+                    reverse(f"api:{kind}_alert_rule_files_manifest"),
+                )
+            )
+
+    def bundle_files(self, response: Any) -> Dict[str, bytes]:
+        archive = io.BytesIO(b"".join(response.streaming_content))
+        with tarfile.open(fileobj=archive, mode="r:gz") as tar:
+            return {
+                member.name: tar.extractfile(member).read()  # type: ignore
+                for member in tar.getmembers()
+            }
+
+    def test_bundle_leaves_out_unsafe_uids(self) -> None:
+        # written before the uids were validated
+        device = Device.objects.create(uid="..", address="127.0.0.1")
+        for model, bundle_url, _ in self.kinds:
+            model.objects.create(uid="../../escaped", rules=self.rules)
+            model.objects.get(uid="robot").devices.add(device)
+            response = self.client.get(bundle_url)
+            self.assertEqual(
+                list(self.bundle_files(response)),
+                [
+                    "manifest.json",
+                    "robot/robot-1.rules",
+                    "robot/robot-2.rules",
+                    "static.rules",
+                ],
+            )
+
+    def test_bundle(self) -> None:
+        for _, bundle_url, manifest_url in self.kinds:
+            response = self.client.get(bundle_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "application/gzip")
+            files = self.bundle_files(response)
+            self.assertEqual(
+                list(files),
+                [
+                    "manifest.json",
+                    "robot/robot-1.rules",
+                    "robot/robot-2.rules",
+                    "static.rules",
+                ],
+            )
+            self.assertEqual(
+                yaml.safe_load(files["static.rules"]),
+                yaml.safe_load(self.rules),
+            )
+            self.assertEqual(
+                yaml.safe_load(files["robot/robot-2.rules"])["groups"]["name"],
+                "cos-robotics-model_robot_robot-2",
+            )
+
+            manifest = json.loads(files.pop("manifest.json"))
+            self.assertEqual(
+                manifest,
+                {
+                    path: hashlib.sha256(content).hexdigest()
+                    for path, content in files.items()
+                },
+            )
+            self.assertEqual(self.client.get(manifest_url).json(), manifest)
+
+    def test_bundle_filters(self) -> None:
+        for _, bundle_url, manifest_url in self.kinds:
+            response = self.client.get(bundle_url, {"device": "robot-1"})
+            self.assertEqual(
+                list(self.bundle_files(response)),
+                ["manifest.json", "robot/robot-1.rules"],
+            )
+            response = self.client.get(manifest_url, {"uid": "static"})
+            self.assertEqual(list(response.json()), ["static.rules"])
+
+    def test_bundle_not_modified(self) -> None:
+        for model, bundle_url, _ in self.kinds:
+            etag = self.client.get(bundle_url)["ETag"]
+            response = self.client.get(bundle_url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+            model.objects.filter(uid="static").delete()
+            response = self.client.get(bundle_url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("static.rules", self.bundle_files(response))
+
+    @override_settings(API_CACHE_TIMEOUT=60)
+    def test_cached_etag(self) -> None:
+        _, bundle_url, _ = self.kinds[0]
+        etag = self.client.get(bundle_url)["ETag"]
+        with patch("api.views.rendered_rule_files") as rendered_rule_files:
+            response = self.client.get(bundle_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        rendered_rule_files.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.devices[0].delete()
+        response = self.client.get(bundle_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("robot/robot-1.rules", self.bundle_files(response))
+
+
+class RuleDirectoryExportTests(APITestCase):
+    def setUp(self) -> None:
+        self.rules = """groups:
+  name: cos-robotics-model_robot_NO_TEMPLATE
+  rules:
+  - alert: HighLogRatePerInstance"""
+        self.template = """groups:
+  name: cos-robotics-model_robot_%%juju_device_uuid%%
+  rules:
+  - alert: HighLogRatePerInstance"""
+        device = Device.objects.create(uid="robot-1", address="127.0.0.1")
+        PrometheusAlertRuleFile.objects.create(uid="static", rules=self.rules)
+        template = LokiAlertRuleFile.objects.create(
+            uid="robot", rules=self.template, template=True
+        )
+        template.devices.add(device)
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = Path(temporary_directory.name)
+        self.current = self.directory / "current"
+
+    def test_export(self) -> None:
+        release = export_rule_directory(self.directory)
+        self.assertIsNotNone(release)
+        self.assertTrue(self.current.is_symlink())
+        self.assertEqual(
+            os.readlink(self.current), os.path.join("releases", str(release))
+        )
+        self.assertEqual(
+            yaml.safe_load(
+                (self.current / "prometheus/static.rules").read_text()
+            ),
+            yaml.safe_load(self.rules),
+        )
+        rendered = yaml.safe_load(
+            (self.current / "loki/robot/robot-1.rules").read_text()
+        )
+        self.assertEqual(
+            rendered["groups"]["name"], "cos-robotics-model_robot_robot-1"
+        )
+        manifest = json.loads((self.current / "manifest.json").read_text())
+        self.assertEqual(
+            set(manifest),
+            {"prometheus/static.rules", "loki/robot/robot-1.rules"},
+        )
+
+    def test_unchanged_rules_are_not_written(self) -> None:
+        release = export_rule_directory(self.directory)
+        self.assertIsNone(export_rule_directory(self.directory))
+        self.assertEqual(self.current.resolve().name, release)
+
+    def test_only_changed_files_are_written(self) -> None:
+        first_release = export_rule_directory(self.directory)
+        static = self.current / "prometheus/static.rules"
+        rendered = self.current / "loki/robot/robot-1.rules"
+        static_inode = static.stat().st_ino
+        rendered_inode = rendered.stat().st_ino
+
+        Device.objects.create(uid="robot-2", address="127.0.0.1")
+        LokiAlertRuleFile.objects.get().devices.add(
+            Device.objects.get(uid="robot-2")
+        )
+        second_release = export_rule_directory(self.directory)
+        self.assertNotEqual(second_release, first_release)
+        self.assertEqual(self.current.resolve().name, second_release)
+        self.assertTrue((self.current / "loki/robot/robot-2.rules").exists())
+        # unchanged files are hard links to the previous release
+        self.assertEqual(static.stat().st_ino, static_inode)
+        self.assertEqual(rendered.stat().st_ino, rendered_inode)
+
+        PrometheusAlertRuleFile.objects.all().delete()
+        third_release = export_rule_directory(self.directory)
+        self.assertFalse(static.exists())
+        # only the current and previous releases are kept
+        self.assertEqual(
+            {entry.name for entry in (self.directory / "releases").iterdir()},
+            {second_release, third_release},
+        )
+
+    def test_export_rules_command(self) -> None:
+        stdout = io.StringIO()
+        call_command("export_rules", str(self.directory), stdout=stdout)
+        self.assertIn("Exported release", stdout.getvalue())
+        call_command("export_rules", str(self.directory), stdout=stdout)
+        self.assertIn("Rules unchanged", stdout.getvalue())
+        with self.assertRaises(CommandError):
+            call_command(
+                "export_rules", str(self.directory), "--interval", "-1"
+            )
+
+    def test_export_leaves_out_unsafe_uids(self) -> None:
+        # written before the uids were validated
+        PrometheusAlertRuleFile.objects.create(
+            uid="../../escaped", rules=self.rules
+        )
+        export_rule_directory(self.directory)
+        self.assertEqual(
+            [path.name for path in self.directory.rglob("*escaped*")], []
+        )
+
+    def test_export_refuses_paths_outside_release(self) -> None:
+        files = [("prometheus/../../escaped.rules", b"groups: []")]
+        with patch(
+            "api.rule_directory.rendered_rule_sets", return_value=files
+        ):
+            with self.assertRaises(ValueError):
+                export_rule_directory(self.directory)
+        self.assertEqual(list(self.directory.rglob("*escaped*")), [])
+        self.assertEqual(list((self.directory / "releases").iterdir()), [])
+
+
+class ShardingTests(SimpleTestCase):
+    def test_jump_hash_range(self) -> None:
+        for key in range(1000):
+            self.assertIn(jump_hash(key, 7), range(7))
+        self.assertEqual(jump_hash(12345, 1), 0)
+
+    def test_jump_hash_is_consistent(self) -> None:
+        uids = [f"robot-{i}" for i in range(1000)]
+        for shards in range(1, 10):
+            for uid in uids:
+                before = shard_of(uid, shards)
+                after = shard_of(uid, shards + 1)
+                # items either stay or move to the added shard
+                self.assertIn(after, (before, shards))
+
+    def test_shards_are_balanced(self) -> None:
+        counts = [0] * 4
+        for i in range(4000):
+            counts[shard_of(f"robot-{i}", 4)] += 1
+        for count in counts:
+            self.assertGreater(count, 800)
+
+    def test_requested_shard(self) -> None:
+        self.assertIsNone(requested_shard({}))
+        self.assertEqual(requested_shard({"shard": "1", "of": "3"}), (1, 3))
+        for params in (
+            {"shard": "1"},
+            {"of": "3"},
+            {"shard": "a", "of": "3"},
+            {"shard": "3", "of": "3"},
+            {"shard": "-1", "of": "3"},
+            {"shard": "0", "of": "0"},
+        ):
+            with self.assertRaises(ValidationError):
+                requested_shard(params)
+
+
+class PrometheusServiceDiscoveryTests(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.url = reverse("api:prometheus_sd")
+        Device.objects.bulk_create(
+            [
+                Device(uid=f"robot-{i}", address=f"192.168.1.{i}")
+                for i in range(20)
+            ]
+            + [Device(uid="robot-ipv6", address="2001:db8::1")]
+        )
+
+    def test_target_groups(self) -> None:
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        target_groups = response.json()
+        self.assertEqual(len(target_groups), 21)
+        self.assertIn(
+            {
+                "targets": ["192.168.1.3:9100"],
+                "labels": {"device_instance": "robot-3"},
+            },
+            target_groups,
+        )
+        self.assertIn(
+            {
+                "targets": ["[2001:db8::1]:9100"],
+                "labels": {"device_instance": "robot-ipv6"},
+            },
+            target_groups,
+        )
+
+    @override_settings(PROMETHEUS_SD_TARGET_PORT=9200)
+    def test_target_port(self) -> None:
+        response = self.client.get(self.url, {"address": "192.168.1.3"})
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "targets": ["192.168.1.3:9200"],
+                    "labels": {"device_instance": "robot-3"},
+                }
+            ],
+        )
+
+    def test_shards_split_the_fleet(self) -> None:
+        instances: List[str] = []
+        for shard in range(3):
+            response = self.client.get(self.url, {"shard": shard, "of": 3})
+            self.assertEqual(response.status_code, 200)
+            shard_instances = [
+                group["labels"]["device_instance"] for group in response.json()
+            ]
+            for uid in shard_instances:
+                self.assertEqual(shard_of(uid, 3), shard)
+            instances.extend(shard_instances)
+        self.assertEqual(
+            sorted(instances),
+            sorted(Device.objects.values_list("uid", flat=True)),
+        )
+
+    def test_invalid_shard(self) -> None:
+        response = self.client.get(self.url, {"shard": 3, "of": 3})
+        self.assertEqual(response.status_code, 400)
+
+    def test_not_modified(self) -> None:
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Device.objects.create(uid="robot-new", address="192.168.2.1")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class AlertRuleFilesShardTests(APITestCase):
+    def setUp(self) -> None:
+        template = """groups:
+  name: cos-robotics-model_robot_%%juju_device_uuid%%
+  rules:
+  - alert: HighLogRatePerInstance"""
+        rules = """groups:
+  name: cos-robotics-model_robot_NO_TEMPLATE
+  rules:
+  - alert: HighLogRatePerInstance"""
+        devices = Device.objects.bulk_create(
+            [Device(uid=f"robot-{i}", address="127.0.0.1") for i in range(30)]
+        )
+        self.kinds: List[Tuple[Any, str]] = []
+        for model, kind in (
+            (PrometheusAlertRuleFile, "prometheus"),
+            (LokiAlertRuleFile, "loki"),
+        ):
+            for i in range(5):
+                model.objects.create(uid=f"static-{i}", rules=rules)
+            model.objects.create(
+                uid="robot", rules=template, template=True
+            ).devices.add(*devices)
+            self.kinds.append((model, reverse(f"api:{kind}_alert_rule_files")))
+
+    def test_shards_split_the_rules(self) -> None:
+        for _, url in self.kinds:
+            uids = [rule["uid"] for rule in self.client.get(url).json()]
+            self.assertEqual(len(uids), 35)
+
+            static_uids = [f"static-{i}" for i in range(5)]
+            rendered_uids: List[str] = []
+            for shard in range(3):
+                response = self.client.get(url, {"shard": shard, "of": 3})
+                self.assertEqual(response.status_code, 200)
+                shard_uids = [rule["uid"] for rule in response.json()]
+                # every shard has the non-templated rules
+                self.assertEqual(sorted(shard_uids[:5]), static_uids)
+                for uid in shard_uids[5:]:
+                    # rendered rules are sharded by device uid
+                    self.assertEqual(shard_of(uid.split("/")[-1], 3), shard)
+                rendered_uids.extend(shard_uids[5:])
+            self.assertEqual(sorted(static_uids + rendered_uids), sorted(uids))
+
+    def test_only_the_shard_devices_are_rendered(self) -> None:
+        shard_devices = [
+            uid
+            for uid in Device.objects.values_list("uid", flat=True)
+            if shard_of(uid, 4) == 1
+        ]
+        for _, url in self.kinds:
+            with patch(
+                "api.views.render_alert_rule_template_for_device",
+                return_value="groups: []",
+            ) as render:
+                self.client.get(url, {"shard": 1, "of": 4})
+            self.assertEqual(
+                sorted(call.args[1].uid for call in render.call_args_list),
+                sorted(shard_devices),
+            )
+
+    def test_invalid_shard(self) -> None:
+        for _, url in self.kinds:
+            response = self.client.get(url, {"shard": 1})
+            self.assertEqual(response.status_code, 400)
+
+
+class DeviceBundleTests(APITestCase):
+    def setUp(self) -> None:
+        self.device = Device.objects.create(
+            uid="robot-1", address="192.168.1.1", public_ssh_key="ssh-rsa"
+        )
+        self.url = reverse("api:device_bundle", args=("robot-1",))
+        self.dashboard = GrafanaDashboard.objects.create(
+            uid="overview", dashboard={"title": "Overview"}
+        )
+        self.device.grafana_dashboards.add(self.dashboard)
+        template = PrometheusAlertRuleFile.objects.create(
+            uid="robot",
+            rules="""groups:
+  name: cos-robotics-model_robot_%%juju_device_uuid%%""",
+            template=True,
+        )
+        static = LokiAlertRuleFile.objects.create(
+            uid="static", rules="groups: []"
+        )
+        self.device.prometheus_alert_rule_files.add(template)
+        self.device.loki_alert_rule_files.add(static)
+
+    def test_bundle(self) -> None:
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        bundle = response.json()
+        self.assertEqual(
+            bundle["device"],
+            {
+                "uid": "robot-1",
+                "creation_date": ANY,
+                "address": "192.168.1.1",
+                "public_ssh_key": "ssh-rsa",
+            },
+        )
+        self.assertIsNone(bundle["certificate"])
+        self.assertEqual(
+            bundle["grafana_dashboards"],
+            [
+                {
+                    "uid": "overview",
+                    "content_hash": self.dashboard.content_hash,
+                    "size": self.dashboard.size,
+                }
+            ],
+        )
+        self.assertEqual(bundle["foxglove_dashboards"], [])
+        (rendered,) = bundle["prometheus_alert_rule_files"]
+        self.assertEqual(rendered["uid"], "robot/robot-1")
+        self.assertEqual(
+            yaml.safe_load(rendered["rules"]),
+            {"groups": {"name": "cos-robotics-model_robot_robot-1"}},
+        )
+        self.assertEqual(
+            bundle["loki_alert_rule_files"],
+            [{"uid": "static", "rules": "groups: []\n"}],
+        )
+
+    def test_bundle_certificate(self) -> None:
+        DeviceCertificate.objects.create(
+            device=self.device,
+            csr="csr",
+            certificate="certificate",
+            ca="ca",
+            chain="chain",
+            status=DeviceCertificate.CertificateStatus.SIGNED,
+        )
+        certificate = self.client.get(self.url).json()["certificate"]
+        self.assertEqual(certificate["status"], "signed")
+        self.assertEqual(certificate["certificate"], "certificate")
+        self.assertEqual(certificate["ca"], "ca")
+        self.assertEqual(certificate["chain"], "chain")
+
+    def test_bundle_not_modified(self) -> None:
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        self.device.grafana_dashboards.clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["grafana_dashboards"], [])
+
+    def test_bundle_records_device_seen(self) -> None:
+        with patch("api.views.record_device_seen") as record_device_seen:
+            self.client.get(self.url)
+        record_device_seen.assert_called_once_with(self.device)
+
+    def test_bundle_not_found(self) -> None:
+        url = reverse("api:device_bundle", args=("unknown",))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class PendingCertificatesViewTests(APITestCase):
+    def setUp(self) -> None:
+        self.url = reverse("api:pending_certificates")
+        self.claim_url = reverse("api:pending_certificates_claim")
+        now = timezone.now()
+        for i in range(5):
+            device = Device.objects.create(
+                uid=f"robot-{i}", address="127.0.0.1"
+            )
+            DeviceCertificate.objects.create(
+                device=device,
+                csr=f"csr-{i}",
+                status=DeviceCertificate.CertificateStatus.PENDING,
+            )
+            DeviceCertificate.objects.filter(device=device).update(
+                created_at=now + timedelta(minutes=i)
+            )
+
+    def test_cursor_pagination(self) -> None:
+        response = self.client.get(self.url, {"limit": 2})
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual(
+            [certificate["uid"] for certificate in page["results"]],
+            ["robot-0", "robot-1"],
+        )
+        self.assertEqual(page["results"][0]["csr"], "csr-0")
+        self.assertIsNone(page["results"][0]["lease_expires_at"])
+
+        # requests signed meanwhile don't shift the next page
+        DeviceCertificate.objects.filter(device__uid="robot-0").update(
+            status=DeviceCertificate.CertificateStatus.SIGNED
+        )
+        uids: List[str] = []
+        next_url = page["next"]
+        while next_url:
+            page = self.client.get(next_url).json()
+            uids.extend(certificate["uid"] for certificate in page["results"])
+            next_url = page["next"]
+        self.assertEqual(uids, ["robot-2", "robot-3", "robot-4"])
+
+    def test_claim(self) -> None:
+        response = self.client.post(
+            self.claim_url, {"limit": 3}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        claimed = response.json()
+        self.assertEqual(
+            [certificate["uid"] for certificate in claimed],
+            ["robot-0", "robot-1", "robot-2"],
+        )
+        self.assertIsNotNone(claimed[0]["lease_expires_at"])
+
+        response = self.client.post(self.claim_url, {}, format="json")
+        self.assertEqual(
+            [certificate["uid"] for certificate in response.json()],
+            ["robot-3", "robot-4"],
+        )
+
+    def test_claim_lease(self) -> None:
+        before = timezone.now()
+        response = self.client.post(
+            self.claim_url, {"limit": 1, "lease": 60}, format="json"
+        )
+        (claimed,) = response.json()
+        lease_expires_at = DeviceCertificate.objects.get(
+            device__uid=claimed["uid"]
+        ).lease_expires_at
+        assert lease_expires_at is not None
+        self.assertGreaterEqual(
+            lease_expires_at, before + timedelta(seconds=60)
+        )
+        self.assertLess(lease_expires_at, before + timedelta(seconds=120))
+
+    @override_settings(CERTIFICATE_LEASE_MAX_DURATION=60)
+    def test_claim_lease_max_duration(self) -> None:
+        response = self.client.post(
+            self.claim_url, {"lease": 61}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("lease", response.json())
+        response = self.client.post(
+            self.claim_url, {"lease": 60}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_pending_again_can_be_claimed(self) -> None:
+        self.client.post(self.claim_url, {"limit": 1}, format="json")
+        response = self.client.patch(
+            reverse("api:device_certificate", kwargs={"uid": "robot-0"}),
+            {"status": "pending"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(
+            self.claim_url, {"limit": 1}, format="json"
+        )
+        self.assertEqual(
+            [claimed["uid"] for claimed in response.json()], ["robot-0"]
+        )
+
+    def test_invalid_claim(self) -> None:
+        for data in (
+            {"limit": 0},
+            {"limit": 1000},
+            {"lease": 0},
+            {"limit": 1, "lease": 1000000000000},
+        ):
+            response = self.client.post(self.claim_url, data, format="json")
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(
+            DeviceCertificate.objects.filter(lease_id__isnull=False).exists()
+        )
+
+
+class UidValidationTests(APITestCase):
+    def test_invalid_uids_are_rejected(self) -> None:
+        for uid in ("../../escaped", "robot/1", "..", ".hidden", ""):
+            for url, data in (
+                (
+                    reverse("api:grafana_dashboards"),
+                    {"uid": uid, "dashboard": "{}"},
+                ),
+                (
+                    reverse("api:prometheus_alert_rule_files"),
+                    {"uid": uid, "rules": "groups: []"},
+                ),
+            ):
+                response = self.client.post(url, data, format="json")
+                self.assertEqual(response.status_code, 400, (url, uid))
+                self.assertIn("uid", response.json())
+        self.assertFalse(GrafanaDashboard.objects.exists())
+        self.assertFalse(PrometheusAlertRuleFile.objects.exists())
+
+    def test_device_uids_are_unrestricted(self) -> None:
+        uids = ("robot-1", "robot/1", "robot:1", "robot@site", "robot 1")
+        for uid in uids:
+            response = self.client.post(
+                reverse("api:devices"),
+                {"uid": uid, "address": "127.0.0.1"},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201, uid)
+            Device.objects.get(uid=uid).clean_fields(
+                exclude=["public_ssh_key"]
+            )
+
+        rule_file = PrometheusAlertRuleFile.objects.create(
+            uid="robot", rules="groups: []", template=True
+        )
+        rule_file.devices.set(Device.objects.all())
+        response = self.client.get(
+            reverse("api:prometheus_alert_rule_files_manifest")
+        )
+        # the devices which uids can't name a file are left out
+        self.assertEqual(list(response.json()), ["robot/robot-1.rules"])
+
+    def test_archive_with_invalid_uid(self) -> None:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("grafana/.hidden.json", b"{}")
+        response = self.client.post(
+            reverse("api:applications_import"),
+            buffer.getvalue(),
+            content_type="application/octet-stream",
+        )
+        self.assertEqual(response.status_code, 400)
+        (file,) = response.json()["files"]
+        self.assertEqual(file["status"], "invalid")
+        self.assertFalse(GrafanaDashboard.objects.exists())
@@ -17,22 +17,89 @@ urlpatterns = [
     ),
     path("v1/health/", views.HealthView.as_view(), name="health"),
     path("v1/devices/", views.DevicesView.as_view(), name="devices"),
+    path(
+        "v1/devices/summary/",
+        views.FleetSummaryView.as_view(),
+        name="fleet_summary",
+    ),
+    path(
+        "v1/devices/bulk/",
+        views.DevicesBulkUpdateView.as_view(),
+        name="devices_bulk_update",
+    ),
+    path(
+        "v1/devices/bulk_delete/",
+        views.DevicesBulkDeleteView.as_view(),
+        name="devices_bulk_delete",
+    ),
+    path(
+        "v1/devices/export.ndjson",
+        views.DevicesExportView.as_view(),
+        name="devices_export",
+    ),
+    path(
+        "v1/sd/prometheus/",
+        views.PrometheusServiceDiscoveryView.as_view(),
+        name="prometheus_sd",
+    ),
     path("v1/devices/<str:uid>/", views.DeviceView.as_view(), name="device"),
+    path(
+        "v1/devices/<str:uid>/bundle/",
+        views.DeviceBundleView.as_view(),
+        name="device_bundle",
+    ),
     path(
         "v1/devices/<str:uid>/certificate/",
         views.DeviceCertificateView.as_view(),
         name="device_certificate",
     ),
+    path(
+        "v1/certificates/pending/",
+        views.PendingCertificatesView.as_view(),
+        name="pending_certificates",
+    ),
+    path(
+        "v1/certificates/pending/claim/",
+        views.PendingCertificatesClaimView.as_view(),
+        name="pending_certificates_claim",
+    ),
+    path(
+        "v1/applications/import/",
+        views.ApplicationsImportView.as_view(),
+        name="applications_import",
+    ),
     path(
         "v1/applications/grafana/dashboards/",
         views.GrafanaDashboardsView.as_view(),
         name="grafana_dashboards",
     ),
+    path(
+        "v1/applications/grafana/dashboards/bundle.tar.gz",
+        views.GrafanaDashboardsBundleView.as_view(),
+        name="grafana_dashboards_bundle",
+    ),
     path(
         "v1/applications/grafana/dashboards/<str:uid>/",
         views.GrafanaDashboardView.as_view(),
         name="grafana_dashboard",
     ),
+    path(
+        "v1/applications/grafana/dashboards/<str:uid>/versions/",
+        views.GrafanaDashboardVersionsView.as_view(),
+        name="grafana_dashboard_versions",
+    ),
+    path(
+        "v1/applications/grafana/dashboards/<str:uid>/versions/"
+        "<int:version>/",
+        views.GrafanaDashboardVersionView.as_view(),
+        name="grafana_dashboard_version",
+    ),
+    path(
+        "v1/applications/grafana/dashboards/<str:uid>/versions/"
+        "<int:version>/rollback/",
+        views.GrafanaDashboardRollbackView.as_view(),
+        name="grafana_dashboard_rollback",
+    ),
     path(
         "v1/applications/foxglove/dashboards/",
         views.FoxgloveDashboardsView.as_view(),
@@ -43,11 +110,38 @@ urlpatterns = [
         views.FoxgloveDashboardView.as_view(),
         name="foxglove_dashboard",
     ),
+    path(
+        "v1/applications/foxglove/dashboards/<str:uid>/versions/",
+        views.FoxgloveDashboardVersionsView.as_view(),
+        name="foxglove_dashboard_versions",
+    ),
+    path(
+        "v1/applications/foxglove/dashboards/<str:uid>/versions/"
+        "<int:version>/",
+        views.FoxgloveDashboardVersionView.as_view(),
+        name="foxglove_dashboard_version",
+    ),
+    path(
+        "v1/applications/foxglove/dashboards/<str:uid>/versions/"
+        "<int:version>/rollback/",
+        views.FoxgloveDashboardRollbackView.as_view(),
+        name="foxglove_dashboard_rollback",
+    ),
     path(
         "v1/applications/prometheus/alert_rules/",
         views.PrometheusAlertRuleFilesView.as_view(),
         name="prometheus_alert_rule_files",
     ),
+    path(
+        "v1/applications/prometheus/alert_rules/bundle.tar.gz",
+        views.PrometheusAlertRuleFilesBundleView.as_view(),
+        name="prometheus_alert_rule_files_bundle",
+    ),
+    path(
+        "v1/applications/prometheus/alert_rules/manifest.json",
+        views.PrometheusAlertRuleFilesManifestView.as_view(),
+        name="prometheus_alert_rule_files_manifest",
+    ),
     path(
         "v1/applications/prometheus/alert_rules/<str:uid>/",
         views.PrometheusAlertRuleFileView.as_view(),
@@ -58,6 +152,16 @@ urlpatterns = [
         views.LokiAlertRuleFilesView.as_view(),
         name="loki_alert_rule_files",
     ),
+    path(
+        "v1/applications/loki/alert_rules/bundle.tar.gz",
+        views.LokiAlertRuleFilesBundleView.as_view(),
+        name="loki_alert_rule_files_bundle",
+    ),
+    path(
+        "v1/applications/loki/alert_rules/manifest.json",
+        views.LokiAlertRuleFilesManifestView.as_view(),
+        name="loki_alert_rule_files_manifest",
+    ),
     path(
         "v1/applications/loki/alert_rules/<str:uid>/",
         views.LokiAlertRuleFileView.as_view(),
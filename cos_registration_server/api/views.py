@@ -1,16 +1,60 @@
 """API views."""
 
 import json
-from typing import Any, Dict, Tuple
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
 
 import api.schema_status as status
+from api.archive import ArchiveError, import_archive
+from api.bundle import (
+    bundle_etag,
+    bundle_manifest,
+    dashboard_files,
+    device_bundle,
+    rendered_rule_files,
+    stream_tar_gz,
+    with_manifest,
+)
+from api.cache import (
+    bump_model_version,
+    cache_response,
+    deferred_version_bumps,
+    json_etag,
+    response_cache_key,
+)
+from api.filters import (
+    NO_CERTIFICATE,
+    filter_applications,
+    filter_devices,
+    select_devices,
+)
+from api.pagination import PendingCertificatesPagination
+from api.parsers import JSONPatchParser
 from api.serializer import (
+    DASHBOARD_SUMMARY_FIELDS,
+    CertificateClaimSerializer,
+    ClaimedCertificateSerializer,
+    DashboardVersionContentSerializer,
+    DashboardVersionSerializer,
     DeviceCertificateSerializer,
+    DevicesBulkUpdateSerializer,
+    DeviceSelectorSerializer,
     DeviceSerializer,
     FoxgloveDashboardSerializer,
     GrafanaDashboardSerializer,
+    JSONPatchOperationSerializer,
     LokiAlertRuleFileSerializer,
+    PendingCertificateSerializer,
     PrometheusAlertRuleFileSerializer,
+    requested_dashboard_fields,
+)
+from api.sharding import in_shard, requested_shard
+from api.signals import CACHED_MODELS
+from applications.jsonpatch import (
+    JSONPatchError,
+    JSONPatchTestFailed,
+    apply_patch,
 )
 from applications.models import (
     FoxgloveDashboard,
@@ -19,25 +63,39 @@ from applications.models import (
     PrometheusAlertRuleFile,
 )
 from applications.utils import render_alert_rule_template_for_device
-from devices.models import Device, DeviceCertificate
-from django.http import HttpResponse
+from devices.bulk import delete_devices, update_device_relations
+from devices.heartbeat import record_device_seen
+from devices.models import DEVICE_RELATIONS, Device, DeviceCertificate
+from devices.queue import claim_pending_certificates, pending_certificates
+from devices.search import search_devices
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Prefetch, QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     OpenApiParameter,
     OpenApiResponse,
     extend_schema,
+    extend_schema_view,
 )
 from rest_framework import status as http_status
 from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import (
     CreateAPIView,
     DestroyAPIView,
+    ListAPIView,
     ListCreateAPIView,
     RetrieveUpdateDestroyAPIView,
     UpdateAPIView,
 )
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.views import APIView
 
 
@@ -55,6 +113,63 @@ class HealthView(APIView):
         return Response()
 
 
+DEVICE_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        name="address",
+        description="Filter the devices by IP address. "
+        "Devices whose address starts with the value "
+        "are listed if the value isn't a complete IP address. "
+        "Example: ?address=192.168.1.",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="created_after",
+        description="List the devices created after an ISO 8601 datetime. "
+        "A UTC offset whose + isn't URL-encoded is accepted.",
+        required=False,
+        type=OpenApiTypes.DATETIME,
+    ),
+    OpenApiParameter(
+        name="created_before",
+        description="List the devices created before an ISO 8601 datetime. "
+        "A UTC offset whose + isn't URL-encoded is accepted.",
+        required=False,
+        type=OpenApiTypes.DATETIME,
+    ),
+    OpenApiParameter(
+        name="certificate_status",
+        description="Filter the devices by certificate status. "
+        "none lists the devices without certificate.",
+        required=False,
+        type=OpenApiTypes.STR,
+        enum=[*DeviceCertificate.CertificateStatus.values, NO_CERTIFICATE],
+    ),
+    OpenApiParameter(
+        name="has_rule",
+        description="List the devices using a Prometheus "
+        "or Loki alert rule file uid.",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="has_dashboard",
+        description="List the devices using a Grafana "
+        "or Foxglove dashboard uid.",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="search",
+        description="Search the devices by partial uid. "
+        "The best matches are listed first, "
+        "up to the server search limit.",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+]
+
+
 class DevicesView(ListCreateAPIView):  # type: ignore[type-arg]
     """Devices API view."""
 
@@ -78,7 +193,10 @@ class DevicesView(ListCreateAPIView):  # type: ignore[type-arg]
     @extend_schema(
         summary="List devices",
         description="List all registered devices and their attribute",
-        responses={**status.code_200_device},
+        responses={
+            **status.code_200_device,
+            **status.code_400_field_parsing,
+        },
         parameters=[
             OpenApiParameter(
                 name="fields",
@@ -88,14 +206,377 @@ class DevicesView(ListCreateAPIView):  # type: ignore[type-arg]
                 required=False,
                 type=OpenApiTypes.STR,
             ),
+            *DEVICE_FILTER_PARAMETERS,
         ],
     )
+    @cache_response(
+        Device,
+        DeviceCertificate,
+        GrafanaDashboard,
+        FoxgloveDashboard,
+        PrometheusAlertRuleFile,
+        LokiAlertRuleFile,
+    )
     def get(
         self, request: Request, *args: Tuple[Any], **kwargs: Dict[str, Any]
     ) -> Response:
         """GET devices."""
         return super().get(request, *args, **kwargs)
 
+    def get_queryset(self) -> "QuerySet[Device]":
+        """Filter the devices with the query parameters."""
+        queryset = super().get_queryset()
+        if self.request.method != "GET":
+            return queryset
+        queryset = filter_devices(queryset, self.request.query_params)
+        if search := self.request.query_params.get("search"):
+            queryset = search_devices(queryset, search)
+        return queryset
+
+
+class FleetSummaryView(APIView):
+    """Fleet summary API view."""
+
+    @extend_schema(
+        summary="Summarize the fleet",
+        description="Count the devices, the devices per certificate status "
+        "and the devices attached to each dashboard and alert rule file.",
+        responses={**status.code_200_fleet_summary},
+    )
+    @cache_response(
+        Device,
+        DeviceCertificate,
+        GrafanaDashboard,
+        FoxgloveDashboard,
+        PrometheusAlertRuleFile,
+        LokiAlertRuleFile,
+        timeout_setting="FLEET_SUMMARY_CACHE_TIMEOUT",
+    )
+    def get(self, request: Request) -> Response:
+        """Fleet summary get view.
+
+        Counts are computed by the database with grouped queries,
+        device rows are never loaded.
+        """
+        devices_count = Device.objects.count()
+
+        certificates: Dict[str, int] = dict.fromkeys(
+            DeviceCertificate.CertificateStatus.values, 0
+        )
+        for certificate_status, count in (
+            DeviceCertificate.objects.values_list("status")
+            .annotate(count=Count("pk"))
+            .order_by()
+        ):
+            certificates[certificate_status] = count
+        certificates["none"] = devices_count - sum(certificates.values())
+
+        summary: Dict[str, Any] = {
+            "devices": devices_count,
+            "certificates": certificates,
+        }
+        for field, model in (
+            ("grafana_dashboards", GrafanaDashboard),
+            ("foxglove_dashboards", FoxgloveDashboard),
+            ("prometheus_alert_rule_files", PrometheusAlertRuleFile),
+            ("loki_alert_rule_files", LokiAlertRuleFile),
+        ):
+            summary[field] = dict(
+                model.objects.annotate(count=Count("devices"))
+                .values_list("uid", "count")
+                .order_by("uid")
+            )
+        return Response(summary)
+
+
+class DevicesBulkDeleteView(APIView):
+    """Devices bulk deletion API view."""
+
+    batch_size = 500
+
+    @extend_schema(
+        summary="Delete devices in bulk",
+        description="Delete the devices selected by uid or by filters, "
+        "along with their certificate and relations, in one transaction.",
+        request=DeviceSelectorSerializer,
+        responses={
+            **status.code_200_devices_bulk_delete,
+            **status.code_400_field_parsing,
+        },
+    )
+    def post(
+        self, request: Request, *args: Tuple[Any], **kwargs: Dict[str, Any]
+    ) -> Response:
+        """POST a bulk deletion of devices."""
+        serializer = DeviceSelectorSerializer(data=request.data)
+        if not serializer.is_valid():
+            raise ValidationError(serializer.errors)
+        devices = select_devices(serializer.validated_data)
+
+        # the bulk deletion doesn't send signals,
+        # invalidate the cached responses once for all devices
+        with deferred_version_bumps():
+            deleted = delete_devices(devices, self.batch_size)
+            if deleted:
+                for model in CACHED_MODELS:
+                    bump_model_version(model)
+        return Response({"deleted": deleted})
+
+
+class DevicesBulkUpdateView(APIView):
+    """Devices bulk update API view."""
+
+    batch_size = 500
+
+    @extend_schema(
+        summary="Update devices in bulk",
+        description="Add and remove dashboards and alert rule files "
+        "to the devices selected by uid or by filters, "
+        "in one transaction.",
+        request=DevicesBulkUpdateSerializer,
+        responses={
+            **status.code_200_devices_bulk_update,
+            **status.code_400_field_parsing,
+        },
+    )
+    def patch(
+        self, request: Request, *args: Tuple[Any], **kwargs: Dict[str, Any]
+    ) -> Response:
+        """PATCH the relations of devices in bulk."""
+        serializer = DevicesBulkUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            raise ValidationError(serializer.errors)
+        devices = select_devices(serializer.validated_data)
+        changes = {
+            relation.field.name: serializer.validated_data[relation.field.name]
+            for relation in DEVICE_RELATIONS
+            if relation.field.name in serializer.validated_data
+        }
+
+        # the bulk update doesn't send signals,
+        # invalidate the cached responses once for all devices
+        with deferred_version_bumps():
+            updated = update_device_relations(
+                devices, changes, self.batch_size
+            )
+            if updated:
+                bump_model_version(Device)
+                for relation in DEVICE_RELATIONS:
+                    if relation.field.name in changes:
+                        bump_model_version(relation.field.related_model)
+        return Response({"updated": updated})
+
+
+class DevicesExportView(APIView):
+    """Devices NDJSON export API view."""
+
+    chunk_size = 1000
+
+    @extend_schema(
+        summary="Export devices",
+        description="Stream all the registered devices, their relations "
+        "and certificate as newline delimited JSON, one device per line.",
+        responses={**status.code_200_devices_export},
+    )
+    def get(self, request: Request) -> StreamingHttpResponse:
+        """Devices export get view.
+
+        Devices are fetched by chunks from a server-side cursor and their
+        relations are prefetched per chunk, so that memory stays constant
+        whatever the size of the fleet.
+        """
+        devices = (
+            Device.objects.select_related("certificate")
+            .prefetch_related(
+                # only the uids of the relations are serialized
+                Prefetch(
+                    "grafana_dashboards",
+                    GrafanaDashboard.objects.only("uid"),
+                ),
+                Prefetch(
+                    "foxglove_dashboards",
+                    FoxgloveDashboard.objects.only("uid"),
+                ),
+                Prefetch(
+                    "prometheus_alert_rule_files",
+                    PrometheusAlertRuleFile.objects.only("uid"),
+                ),
+                Prefetch(
+                    "loki_alert_rule_files",
+                    LokiAlertRuleFile.objects.only("uid"),
+                ),
+            )
+            .order_by("pk")
+        )
+        context = {"request": request}
+
+        def export() -> Iterator[str]:
+            for device in devices.iterator(chunk_size=self.chunk_size):
+                data = DeviceSerializer(device, context=context).data
+                yield json.dumps(data, cls=JSONEncoder) + "\n"
+
+        return StreamingHttpResponse(
+            export(), content_type="application/x-ndjson"
+        )
+
+
+def etag_response(request: Request, response: Response) -> HttpResponseBase:
+    """Tag a response with the ETag of its data.
+
+    request: the request.
+    response: the response to the request.
+    return: the response, or a 304 if the client has it already.
+    """
+    etag = json_etag(response.data)
+    tagged: HttpResponseBase = (
+        get_conditional_response(request, etag=etag) or response
+    )
+    tagged["ETag"] = etag
+    return tagged
+
+
+SHARD_PARAMETERS = [
+    OpenApiParameter(
+        name="shard",
+        description="Index of the shard to list, from 0 to of - 1.",
+        required=False,
+        type=OpenApiTypes.INT,
+    ),
+    OpenApiParameter(
+        name="of",
+        description="Number of shards.",
+        required=False,
+        type=OpenApiTypes.INT,
+    ),
+]
+
+
+class PrometheusServiceDiscoveryView(APIView):
+    """Prometheus HTTP service discovery API view."""
+
+    @extend_schema(
+        summary="Prometheus HTTP service discovery",
+        description="List the devices as Prometheus http_sd target groups: "
+        "the device address and the PROMETHEUS_SD_TARGET_PORT, labelled "
+        "with the device uid as device_instance. Devices can be filtered "
+        "like the devices list and split between Prometheus replicas with "
+        "?shard=i&of=n, devices being assigned to shards with jump "
+        "consistent hashing of their uid. "
+        "If-None-Match requests are answered with a 304 when unchanged.",
+        responses={
+            **status.code_200_prometheus_sd,
+            **status.code_400_field_parsing,
+        },
+        parameters=[
+            *SHARD_PARAMETERS,
+            *(
+                parameter
+                for parameter in DEVICE_FILTER_PARAMETERS
+                if parameter.name != "search"
+            ),
+        ],
+    )
+    def get(self, request: Request) -> HttpResponseBase:
+        """Prometheus service discovery get view.
+
+        The ETag is the hash of the target groups, which are cached
+        along with the devices list responses.
+        """
+        return etag_response(request, self.get_target_groups(request))
+
+    @cache_response(Device)
+    def get_target_groups(self, request: Request) -> Response:
+        """List the target groups of the requested shard."""
+        shard = requested_shard(request.query_params)
+        devices = (
+            filter_devices(Device.objects.all(), request.query_params)
+            .order_by("uid")
+            .values_list("uid", "address")
+        )
+        port = settings.PROMETHEUS_SD_TARGET_PORT
+        target_groups = []
+        for uid, address in devices.iterator():
+            if not in_shard(uid, shard):
+                continue
+            host = f"[{address}]" if ":" in address else address
+            target_groups.append(
+                {
+                    "targets": [f"{host}:{port}"],
+                    "labels": {"device_instance": uid},
+                }
+            )
+        return Response(target_groups)
+
+
+class PendingCertificatesView(ListAPIView):  # type: ignore[type-arg]
+    """Pending certificate signing requests API view."""
+
+    serializer_class = PendingCertificateSerializer
+    pagination_class = PendingCertificatesPagination
+
+    @extend_schema(
+        summary="List the pending certificate signing requests",
+        description="List the pending CSRs in arrival order, claimed or not, "
+        "with cursor pagination: follow the next link to get the next page. "
+        "Signers working concurrently should claim requests instead.",
+        parameters=[
+            OpenApiParameter(
+                name="limit",
+                description="Number of requests per page, 100 by default.",
+                required=False,
+                type=OpenApiTypes.INT,
+            ),
+        ],
+    )
+    def get(
+        self, request: Request, *args: Tuple[Any], **kwargs: Dict[str, Any]
+    ) -> Response:
+        """GET the pending certificate signing requests."""
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self) -> "QuerySet[DeviceCertificate]":
+        """Only load the listed fields of the pending requests."""
+        return (
+            pending_certificates()
+            .select_related("device")
+            .only("device__uid", "csr", "created_at", "lease_expires_at")
+        )
+
+
+class PendingCertificatesClaimView(APIView):
+    """Pending certificate signing requests claim API view."""
+
+    @extend_schema(
+        summary="Claim pending certificate signing requests",
+        description="Claim the oldest pending CSRs that aren't claimed by "
+        "another signer. Claimed requests are skipped by the other claims "
+        "until their lease expires, so that several signers can drain the "
+        "queue concurrently without signing a request twice. "
+        "Sign or deny them with the device certificate endpoint, "
+        "sending the lease_id of the claim.",
+        request=CertificateClaimSerializer,
+        responses={
+            **status.code_200_pending_certificates_claim,
+            **status.code_400_field_parsing,
+        },
+    )
+    def post(
+        self, request: Request, *args: Tuple[Any], **kwargs: Dict[str, Any]
+    ) -> Response:
+        """POST a claim of pending certificate signing requests."""
+        serializer = CertificateClaimSerializer(data=request.data)
+        if not serializer.is_valid():
+            raise ValidationError(serializer.errors)
+        lease = serializer.validated_data.get(
+            "lease", settings.CERTIFICATE_LEASE_DURATION
+        )
+        certificates = claim_pending_certificates(
+            serializer.validated_data["limit"], timedelta(seconds=lease)
+        )
+        return Response(
+            ClaimedCertificateSerializer(certificates, many=True).data
+        )
+
 
 class DeviceView(RetrieveUpdateDestroyAPIView):  # type: ignore[type-arg]
     """Device API view."""
@@ -163,6 +644,49 @@ class DeviceView(RetrieveUpdateDestroyAPIView):  # type: ignore[type-arg]
         return super().delete(request, *args, **kwargs)
 
 
+class DeviceBundleView(APIView):
+    """Device bundle API view."""
+
+    @extend_schema(
+        summary="Get the configuration bundle of a device",
+        description="Return everything a booting device and its sidecars "
+        "need in one response: the device record, its certificate status "
+        "and PEMs, the uid, content hash and size of its dashboards and "
+        "its alert rule files, the templated ones rendered for the device. "
+        "If-None-Match requests are answered with a 304 when unchanged.",
+        responses={
+            **status.code_200_device_bundle,
+            **status.code_404_uid_not_found,
+        },
+    )
+    def get(self, request: Request, uid: str) -> HttpResponseBase:
+        """Device bundle get view.
+
+        The device, its certificate and relations are fetched with
+        one select and one prefetch query per relation.
+        """
+        devices = Device.objects.select_related(
+            "certificate"
+        ).prefetch_related(
+            Prefetch(
+                "grafana_dashboards",
+                GrafanaDashboard.objects.only("uid", "blob", "size"),
+            ),
+            Prefetch(
+                "foxglove_dashboards",
+                FoxgloveDashboard.objects.only("uid", "blob", "size"),
+            ),
+            "prometheus_alert_rule_files",
+            "loki_alert_rule_files",
+        )
+        try:
+            device = devices.get(uid=uid)
+        except Device.DoesNotExist:
+            raise NotFound("Object does not exist")
+        record_device_seen(device)
+        return etag_response(request, Response(device_bundle(device)))
+
+
 class DeviceCertificateView(APIView):
     """Device Certificate API view."""
 
@@ -191,6 +715,7 @@ class DeviceCertificateView(APIView):
             device = Device.objects.get(uid=uid)
         except Device.DoesNotExist:
             raise NotFound("Device not found")
+        record_device_seen(device)
 
         serializer = DeviceCertificateSerializer(data=request.data)
         if not serializer.is_valid():
@@ -204,6 +729,9 @@ class DeviceCertificateView(APIView):
                 "certificate": "",
                 "ca": "",
                 "chain": "",
+                # a new request can be claimed by the signers right away
+                "lease_id": None,
+                "lease_expires_at": None,
             },
         )
 
@@ -235,6 +763,7 @@ class DeviceCertificateView(APIView):
             device = Device.objects.get(uid=uid)
         except Device.DoesNotExist:
             raise NotFound("Device or CSR not found")
+        record_device_seen(device)
 
         try:
             certificate = device.certificate
@@ -255,7 +784,10 @@ class DeviceCertificateView(APIView):
         summary="Update certificate status (internal use)",
         description=(
             "Internal endpoint for the charm to update certificate "
-            "status and provide signed certificate."
+            "status and provide signed certificate. Signers that claimed "
+            "the request send the lease_id of their claim, the update is "
+            "then refused with a 409 if the claim was lost meanwhile, "
+            "for instance because the device submitted a new request."
         ),
         request=DeviceCertificateSerializer,
         responses={
@@ -265,6 +797,7 @@ class DeviceCertificateView(APIView):
             ),
             400: OpenApiResponse(description="Invalid request data"),
             404: OpenApiResponse(description="Device not found"),
+            **status.code_409_certificate_lease_lost,
         },
     )
     def patch(
@@ -285,6 +818,13 @@ class DeviceCertificateView(APIView):
         except DeviceCertificate.DoesNotExist:
             raise NotFound("Certificate not found")
 
+        lease_id = None
+        if "lease_id" in request.data:
+            try:
+                lease_id = uuid.UUID(str(request.data["lease_id"]))
+            except ValueError:
+                raise ValidationError({"lease_id": "Must be a UUID."})
+
         new_status = request.data.get("status")
         if "certificate" in request.data and not new_status:
             raise ValidationError(
@@ -312,6 +852,10 @@ class DeviceCertificateView(APIView):
 
         if new_status:
             certificate.status = new_status
+            if new_status == DeviceCertificate.CertificateStatus.PENDING:
+                # back in the queue, claimable by the signers right away
+                certificate.lease_id = None
+                certificate.lease_expires_at = None
         if "certificate" in request.data:
             certificate.certificate = request.data["certificate"]
         if "ca" in request.data:
@@ -319,7 +863,33 @@ class DeviceCertificateView(APIView):
         if "chain" in request.data:
             certificate.chain = request.data["chain"]
 
-        certificate.save()
+        if lease_id is None:
+            certificate.save()
+        else:
+            # only update the request if the claim of the signer still
+            # holds, a resubmission or a new claim changes the lease
+            certificate.updated_at = timezone.now()
+            fields = (
+                "status",
+                "certificate",
+                "ca",
+                "chain",
+                "lease_id",
+                "lease_expires_at",
+                "updated_at",
+            )
+            updated = DeviceCertificate.objects.filter(
+                pk=certificate.pk, lease_id=lease_id
+            ).update(
+                **{field: getattr(certificate, field) for field in fields}
+            )
+            if not updated:
+                return Response(
+                    {"detail": "The certificate request lease was lost."},
+                    status=http_status.HTTP_409_CONFLICT,
+                )
+            # the update doesn't send the post_save signal
+            bump_model_version(DeviceCertificate)
 
         response_data = {
             "status": certificate.status,
@@ -333,6 +903,140 @@ class DeviceCertificateView(APIView):
         return Response(response_data, status=http_status.HTTP_200_OK)
 
 
+def dashboard_download_response(
+    request: Request, dashboard: Any
+) -> HttpResponse:
+    """Build the download response of a dashboard.
+
+    request: the download request.
+    dashboard: a Grafana or Foxglove dashboard.
+    return: the dashboard JSON file, or a 304 if the client has it already.
+    """
+    response = get_conditional_response(request, etag=dashboard.etag)
+    if response is None:
+        response = HttpResponse(
+            dashboard.serialized, content_type="application/json"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{dashboard.uid}.json"'
+        )
+    response["ETag"] = dashboard.etag
+    return response
+
+
+DASHBOARD_LIST_PARAMETERS = [
+    OpenApiParameter(
+        name="fields",
+        description="Filter the fields provided. "
+        "Will only output the fields listed in the parameter. "
+        "Available fields: uid, dashboard, content_hash, size. "
+        "Example: ?fields=uid,content_hash",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="summary",
+        description="List the dashboards uid, content_hash and size "
+        "without the dashboard bodies.",
+        required=False,
+        type=OpenApiTypes.BOOL,
+    ),
+]
+
+
+def only_requested_dashboard_fields(
+    queryset: "QuerySet[Any]", request: Request
+) -> "QuerySet[Any]":
+    """Don't load the dashboard bodies unless they are requested."""
+    fields = requested_dashboard_fields(request)
+    if "dashboard" in fields:
+        return queryset.select_related("blob")
+    # the content hash is the blob foreign key
+    return queryset.only(
+        *("blob" if field == "content_hash" else field for field in fields)
+    )
+
+
+class DashboardJSONPatchMixin:
+    """Apply RFC 6902 JSON patches sent with PATCH to a dashboard.
+
+    A small edit of a large dashboard doesn't require sending the whole
+    dashboard. The patch is applied to the stored dashboard within
+    a transaction, the dashboard row being locked meanwhile.
+    The response only summarizes the patched dashboard.
+    """
+
+    def get_parsers(self) -> Any:
+        """Accept JSON patches on PATCH requests."""
+        parsers = super().get_parsers()  # type: ignore[misc]
+        request = getattr(self, "request", None)
+        if request is not None and request.method == "PATCH":
+            parsers.append(JSONPatchParser())
+        return parsers
+
+    def partial_update(
+        self, request: Request, *args: Any, **kwargs: Any
+    ) -> Response:
+        """Update a dashboard partially, with a JSON patch if sent so."""
+        media_type = request.content_type.split(";")[0].strip().lower()
+        if media_type != JSONPatchParser.media_type:
+            response: Response = super().partial_update(  # type: ignore[misc]
+                request, *args, **kwargs
+            )
+            return response
+
+        view: Any = self
+        with transaction.atomic():
+            dashboards = view.get_queryset().select_for_update()
+            try:
+                dashboard = dashboards.get(uid=kwargs["uid"])
+            except dashboards.model.DoesNotExist:
+                raise NotFound("Object does not exist")
+            try:
+                patched = apply_patch(dashboard.dashboard, request.data)
+            except JSONPatchTestFailed as e:
+                return Response(
+                    {"detail": str(e)}, status=http_status.HTTP_409_CONFLICT
+                )
+            except JSONPatchError as e:
+                raise ValidationError({"patch": str(e)})
+            serializer = view.get_serializer(
+                dashboard, data={"dashboard": patched}, partial=True
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        summary = view.get_serializer_class()(
+            dashboard,
+            context={
+                **view.get_serializer_context(),
+                "fields": DASHBOARD_SUMMARY_FIELDS,
+            },
+        )
+        return Response(summary.data)
+
+
+DASHBOARD_PATCH_DESCRIPTION = (
+    "Update the provided fields of a given {} dashboard. "
+    "The dashboard can also be changed with an RFC 6902 JSON Patch "
+    "sent as application/json-patch+json, the response then only "
+    "provides the uid, content_hash and size of the patched dashboard. "
+    "A failing test operation results in a 409."
+)
+
+
+def dashboard_patch_request(serializer_class: Any) -> Dict[str, Any]:
+    """Document the request bodies accepted by a dashboard PATCH."""
+    return {
+        media_type: serializer_class
+        for media_type in (
+            "application/json",
+            "application/x-www-form-urlencoded",
+            "application/msgpack",
+            "application/cbor",
+        )
+    } | {JSONPatchParser.media_type: JSONPatchOperationSerializer(many=True)}
+
+
 class GrafanaDashboardsView(ListCreateAPIView):  # type: ignore[type-arg]
     """GrafanaDashboards API view."""
 
@@ -357,15 +1061,83 @@ class GrafanaDashboardsView(ListCreateAPIView):  # type: ignore[type-arg]
         summary="List Grafana dashboards",
         description="List all Grafana dashboards and their attribute",
         responses={**status.code_200_grafana_dashboard},
+        parameters=DASHBOARD_LIST_PARAMETERS,
     )
+    @cache_response(GrafanaDashboard)
     def get(
         self, request: Request, *args: Tuple[Any], **kwargs: Dict[str, Any]
     ) -> Response:
         """GET Grafana dashboards."""
         return super().get(request, *args, **kwargs)
 
+    def get_queryset(self) -> "QuerySet[GrafanaDashboard]":
+        """Only load the requested fields of the dashboards."""
+        return only_requested_dashboard_fields(
+            super().get_queryset(), self.request
+        )
+
+
+APPLICATIONS_BUNDLE_PARAMETERS = [
+    OpenApiParameter(
+        name="uid",
+        description="Only bundle the listed uids (comma-separated list). "
+        "Example: ?uid=overview,robot",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="device",
+        description="Only bundle the files attached to the device "
+        "of this uid.",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+]
+
+
+class GrafanaDashboardsBundleView(APIView):
+    """Grafana dashboards bundle API view."""
+
+    @extend_schema(
+        operation_id="applications_grafana_dashboards_bundle_retrieve",
+        summary="Download a Grafana provisioning bundle",
+        description="Stream the Grafana dashboards as a tar.gz archive "
+        "holding one <uid>.json file per dashboard, ready to be extracted "
+        "in a Grafana file provisioning directory. "
+        "If-None-Match requests are answered with a 304 when unchanged.",
+        responses={**status.code_200_dashboards_bundle},
+        parameters=APPLICATIONS_BUNDLE_PARAMETERS,
+    )
+    def get(self, request: Request) -> HttpResponseBase:
+        """Grafana dashboards bundle get view.
+
+        The ETag is computed from the uid and content hash of the
+        dashboards, the archive is only built when it is sent.
+        """
+        dashboards = filter_applications(
+            GrafanaDashboard.objects.all(), request.query_params
+        )
+        snapshot = list(
+            dashboards.order_by("uid").values_list("uid", "blob_id")
+        )
+        etag = bundle_etag(snapshot)
+        response: Optional[HttpResponseBase] = get_conditional_response(
+            request, etag=etag
+        )
+        if response is None:
+            response = StreamingHttpResponse(
+                stream_tar_gz(dashboard_files(snapshot)),
+                content_type="application/gzip",
+            )
+            response["Content-Disposition"] = (
+                'attachment; filename="bundle.tar.gz"'
+            )
+        response["ETag"] = etag
+        return response
+
 
 class GrafanaDashboardView(
+    DashboardJSONPatchMixin,
     DestroyAPIView,  # type: ignore[type-arg]
     UpdateAPIView,  # type: ignore[type-arg]
 ):
@@ -377,7 +1149,12 @@ class GrafanaDashboardView(
 
     def _get_dashboard(self, uid: str) -> GrafanaDashboard:
         try:
-            dashboard = GrafanaDashboard.objects.get(uid=uid)
+            # the download only needs the serialized dashboard
+            dashboard = (
+                GrafanaDashboard.objects.select_related("blob")
+                .only("uid", "blob__data")
+                .get(uid=uid)
+            )
             return dashboard
         except GrafanaDashboard.DoesNotExist:
             raise NotFound("Object does not exist")
@@ -385,7 +1162,8 @@ class GrafanaDashboardView(
     @extend_schema(
         summary="Download Grafana dashboard JSON file",
         description="Returns Grafana dashboard JSON object, "
-        "intended for file download.",
+        "intended for file download. The JSON is compact with sorted keys, "
+        "its SHA-256 is the content_hash and the ETag.",
         responses={
             **status.code_200_dashboard,
             **status.code_404_dashboard_not_found,
@@ -395,17 +1173,11 @@ class GrafanaDashboardView(
         """Grafana dashboard get view.
 
         Retuns the file instead of the model view.
+        The canonical JSON stored on save is sent as is,
+        If-None-Match requests are answered with a 304 when unchanged.
         """
         dashboard = self._get_dashboard(uid)
-        serialized = GrafanaDashboardSerializer(dashboard)
-        response = HttpResponse(
-            json.dumps(serialized.data["dashboard"]),
-            content_type="application/json",
-        )
-        response["Content-Disposition"] = (
-            f'attachment; filename="{serialized.data["uid"]}.json"'
-        )
-        return response
+        return dashboard_download_response(request, dashboard)
 
     @extend_schema(
         summary="Update a Grafana dashboard completely",
@@ -424,11 +1196,13 @@ class GrafanaDashboardView(
 
     @extend_schema(
         summary="Update a Grafana dashboard partially",
-        description="Update the provided fields of a given Grafana dashboard",
+        description=DASHBOARD_PATCH_DESCRIPTION.format("Grafana"),
+        request=dashboard_patch_request(GrafanaDashboardSerializer),
         responses={
             **status.code_201_grafana_dashboard,
             **status.code_400_field_parsing,
             **status.code_404_dashboard_not_found,
+            **status.code_409_json_patch_test_failed,
         },
     )
     def patch(
@@ -477,15 +1251,24 @@ class FoxgloveDashboardsView(ListCreateAPIView):  # type: ignore[type-arg]
         summary="List Foxglove dashboards",
         description="List all Foxglove dashboards and their attribute",
         responses={**status.code_200_foxglove_dashboard},
+        parameters=DASHBOARD_LIST_PARAMETERS,
     )
+    @cache_response(FoxgloveDashboard)
     def get(
         self, request: Request, *args: Tuple[Any], **kwargs: Dict[str, Any]
     ) -> Response:
         """GET Foxglove dashboards."""
         return super().get(request, *args, **kwargs)
 
+    def get_queryset(self) -> "QuerySet[FoxgloveDashboard]":
+        """Only load the requested fields of the dashboards."""
+        return only_requested_dashboard_fields(
+            super().get_queryset(), self.request
+        )
+
 
 class FoxgloveDashboardView(
+    DashboardJSONPatchMixin,
     DestroyAPIView,  # type: ignore[type-arg]
     UpdateAPIView,  # type: ignore[type-arg]
 ):
@@ -497,7 +1280,12 @@ class FoxgloveDashboardView(
 
     def _get_dashboard(self, uid: str) -> FoxgloveDashboard:
         try:
-            dashboard = FoxgloveDashboard.objects.get(uid=uid)
+            # the download only needs the serialized dashboard
+            dashboard = (
+                FoxgloveDashboard.objects.select_related("blob")
+                .only("uid", "blob__data")
+                .get(uid=uid)
+            )
             return dashboard
         except FoxgloveDashboard.DoesNotExist:
             raise NotFound("Object does not exist")
@@ -505,7 +1293,8 @@ class FoxgloveDashboardView(
     @extend_schema(
         summary="Download Foxglove dashboard JSON file",
         description="Returns Foxglove dashboard JSON object, "
-        "intended for file download.",
+        "intended for file download. The JSON is compact with sorted keys, "
+        "its SHA-256 is the content_hash and the ETag.",
         responses={
             **status.code_200_dashboard,
             **status.code_404_dashboard_not_found,
@@ -515,17 +1304,11 @@ class FoxgloveDashboardView(
         """Foxglove dashboard get view.
 
         Retuns the file instead of the model view.
+        The canonical JSON stored on save is sent as is,
+        If-None-Match requests are answered with a 304 when unchanged.
         """
         dashboard = self._get_dashboard(uid)
-        serialized = FoxgloveDashboardSerializer(dashboard)
-        response = HttpResponse(
-            json.dumps(serialized.data["dashboard"]),
-            content_type="application/json",
-        )
-        response["Content-Disposition"] = (
-            f'attachment; filename="{serialized.data["uid"]}.json"'
-        )
-        return response
+        return dashboard_download_response(request, dashboard)
 
     @extend_schema(
         summary="Update a Foxglove dashboard completely",
@@ -544,11 +1327,13 @@ class FoxgloveDashboardView(
 
     @extend_schema(
         summary="Update a Foxglove dashboard partially",
-        description="Update the provided fields of a given Foxglove dashboard",
+        description=DASHBOARD_PATCH_DESCRIPTION.format("Foxglove"),
+        request=dashboard_patch_request(FoxgloveDashboardSerializer),
         responses={
             **status.code_201_foxglove_dashboard,
             **status.code_400_field_parsing,
             **status.code_404_dashboard_not_found,
+            **status.code_409_json_patch_test_failed,
         },
     )
     def patch(
@@ -572,6 +1357,206 @@ class FoxgloveDashboardView(
         return super().delete(request, *args, **kwargs)
 
 
+class DashboardVersionsBaseView(APIView):
+    """Dashboard versions base API view.
+
+    Base class of the Grafana and Foxglove dashboard versions views.
+    """
+
+    dashboard_model: Type[Any]
+
+    def get_dashboard(self, uid: str, for_update: bool = False) -> Any:
+        """Return the dashboard of the url.
+
+        uid: the dashboard uid.
+        for_update: whether to lock the dashboard row.
+        raise: NotFound if the dashboard doesn't exist.
+        """
+        dashboards = self.dashboard_model.objects.all()
+        if for_update:
+            dashboards = dashboards.select_for_update()
+        try:
+            return dashboards.get(uid=uid)
+        except self.dashboard_model.DoesNotExist:
+            raise NotFound("Object does not exist")
+
+    def get_version(self, dashboard: Any, version: int) -> Any:
+        """Return a dashboard version along with its content.
+
+        dashboard: the versioned dashboard.
+        version: the version number.
+        raise: NotFound if the version doesn't exist.
+        """
+        version_model = dashboard.versions.model
+        try:
+            dashboard_version = dashboard.versions.get(version=version)
+            dashboard_version.content = dashboard.get_version_content(version)
+        except version_model.DoesNotExist:
+            raise NotFound("Version does not exist")
+        return dashboard_version
+
+
+class DashboardVersionsView(DashboardVersionsBaseView):
+    """Dashboard versions API view."""
+
+    @extend_schema(
+        summary="List the versions of a dashboard",
+        description="List the versions of a dashboard, the latest last. "
+        "Every change of the dashboard content creates a version.",
+        responses={
+            **status.code_200_dashboard_versions,
+            **status.code_404_dashboard_not_found,
+        },
+    )
+    def get(self, request: Request, uid: str) -> Response:
+        """GET the versions of a dashboard."""
+        dashboard = self.get_dashboard(uid)
+        versions = dashboard.versions.defer("delta")
+        return Response(DashboardVersionSerializer(versions, many=True).data)
+
+
+class DashboardVersionView(DashboardVersionsBaseView):
+    """Dashboard version API view."""
+
+    @extend_schema(
+        summary="Get a version of a dashboard",
+        description="Returns a version of a dashboard with its JSON.",
+        responses={
+            **status.code_200_dashboard_version,
+            **status.code_404_dashboard_version_not_found,
+        },
+    )
+    def get(self, request: Request, uid: str, version: int) -> Response:
+        """GET a version of a dashboard."""
+        dashboard_version = self.get_version(self.get_dashboard(uid), version)
+        return Response(
+            DashboardVersionContentSerializer(dashboard_version).data
+        )
+
+
+class DashboardRollbackView(DashboardVersionsBaseView):
+    """Dashboard rollback API view."""
+
+    serializer_class: Any
+
+    @extend_schema(
+        summary="Roll a dashboard back to a version",
+        description="Restore the content of a dashboard version. "
+        "The rollback is recorded as a new version.",
+        request=None,
+        responses={
+            **status.code_404_dashboard_version_not_found,
+        },
+    )
+    def post(self, request: Request, uid: str, version: int) -> Response:
+        """POST a dashboard rollback."""
+        with transaction.atomic():
+            dashboard = self.get_dashboard(uid, for_update=True)
+            dashboard.dashboard = self.get_version(dashboard, version).content
+            dashboard.save()
+        serializer = self.serializer_class(
+            dashboard, context={"request": request}
+        )
+        return Response(serializer.data)
+
+
+class GrafanaDashboardVersionsView(DashboardVersionsView):
+    """GrafanaDashboard versions API view."""
+
+    dashboard_model = GrafanaDashboard
+
+
+class GrafanaDashboardVersionView(DashboardVersionView):
+    """GrafanaDashboard version API view."""
+
+    dashboard_model = GrafanaDashboard
+
+
+@extend_schema_view(
+    post=extend_schema(
+        responses={
+            **status.code_200_grafana_dashboard,
+            **status.code_404_dashboard_version_not_found,
+        }
+    )
+)
+class GrafanaDashboardRollbackView(DashboardRollbackView):
+    """GrafanaDashboard rollback API view."""
+
+    dashboard_model = GrafanaDashboard
+    serializer_class = GrafanaDashboardSerializer
+
+
+class FoxgloveDashboardVersionsView(DashboardVersionsView):
+    """FoxgloveDashboard versions API view."""
+
+    dashboard_model = FoxgloveDashboard
+
+
+class FoxgloveDashboardVersionView(DashboardVersionView):
+    """FoxgloveDashboard version API view."""
+
+    dashboard_model = FoxgloveDashboard
+
+
+@extend_schema_view(
+    post=extend_schema(
+        responses={
+            **status.code_200_foxglove_dashboard,
+            **status.code_404_dashboard_version_not_found,
+        }
+    )
+)
+class FoxgloveDashboardRollbackView(DashboardRollbackView):
+    """FoxgloveDashboard rollback API view."""
+
+    dashboard_model = FoxgloveDashboard
+    serializer_class = FoxgloveDashboardSerializer
+
+
+class ApplicationsImportView(APIView):
+    """Applications archive import API view."""
+
+    @extend_schema(
+        summary="Import dashboards and alert rule files from an archive",
+        description="Create or update the dashboards and alert rule files "
+        "of a tar, tar.gz or zip archive, sent as the request body. "
+        "Files are recognised by their directory and extension: "
+        "grafana/<uid>.json, foxglove/<uid>.json, prometheus/<uid>.yaml "
+        "and loki/<uid>.yaml. Nothing is imported if a file is invalid.",
+        request={
+            media_type: OpenApiTypes.BINARY
+            for media_type in (
+                "application/x-tar",
+                "application/gzip",
+                "application/zip",
+            )
+        },
+        responses={
+            **status.code_200_archive_import,
+            **status.code_400_archive_import,
+        },
+    )
+    def post(
+        self, request: Request, *args: Tuple[Any], **kwargs: Dict[str, Any]
+    ) -> Response:
+        """POST an archive to import."""
+        if request.stream is None:
+            raise ValidationError("Empty archive.")
+        try:
+            imported, report = import_archive(request.stream)
+        except ArchiveError as e:
+            raise ValidationError(str(e))
+        return Response(
+            {"imported": imported, "files": report},
+            status=(
+                http_status.HTTP_200_OK
+                if imported
+                else http_status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+
 class PrometheusAlertRuleFilesView(CreateAPIView):  # type: ignore[type-arg]
     """PrometheusAlertRuleFiles API view."""
 
@@ -582,15 +1567,28 @@ class PrometheusAlertRuleFilesView(CreateAPIView):  # type: ignore[type-arg]
         summary="List Prometheus alert rule file",
         description="List all Prometheus alert rule file and their attribute."
         "This endpoint returns all the non-templated rules as well as "
-        "the templated rules rendered for the devices that specified them.",
-        responses={**status.code_200_prometheus_alert_rule_file},
+        "the templated rules rendered for the devices that specified them. "
+        "Rulers can split the rules with ?shard=i&of=n: the templated "
+        "rules are only rendered for the devices of the shard, with the "
+        "same consistent hashing as the Prometheus service discovery. "
+        "The non-templated rules apply to the whole fleet, every shard "
+        "lists all of them.",
+        responses={
+            **status.code_200_prometheus_alert_rule_file,
+            **status.code_400_field_parsing,
+        },
+        parameters=SHARD_PARAMETERS,
     )
+    @cache_response(PrometheusAlertRuleFile, Device)
     def get(self, request: Request) -> Response:
         """Prometheus Alert Rules get view.
 
         Return non-templated as well as rendered templated rules.
         """
-        # retrieve alert rules that are not a template and serialize them
+        shard = requested_shard(request.query_params)
+
+        # retrieve alert rules that are not a template and serialize them,
+        # they aren't sharded: rules such as up == 0 apply to every device
         no_template_alert_rules = PrometheusAlertRuleFile.objects.filter(
             template=False
         )
@@ -608,6 +1606,9 @@ class PrometheusAlertRuleFilesView(CreateAPIView):  # type: ignore[type-arg]
         devices = Device.objects.all()
 
         for device in devices:
+            # only render the rules of the devices of the shard
+            if not in_shard(device.uid, shard):
+                continue
             for rule in device.prometheus_alert_rule_files.all():
                 if rule in template_alert_rules:
                     rendered_rule = render_alert_rule_template_for_device(
@@ -724,15 +1725,28 @@ class LokiAlertRuleFilesView(CreateAPIView):  # type: ignore[type-arg]
         summary="List Loki alert rule file",
         description="List all Loki alert rule file and their attribute."
         "This endpoint returns all the non-templated rules as well as "
-        "the templated rules rendered for the devices that specified them.",
-        responses={**status.code_200_loki_alert_rule_file},
+        "the templated rules rendered for the devices that specified them. "
+        "Rulers can split the rules with ?shard=i&of=n: the templated "
+        "rules are only rendered for the devices of the shard, with the "
+        "same consistent hashing as the Prometheus service discovery. "
+        "The non-templated rules apply to the whole fleet, every shard "
+        "lists all of them.",
+        responses={
+            **status.code_200_loki_alert_rule_file,
+            **status.code_400_field_parsing,
+        },
+        parameters=SHARD_PARAMETERS,
     )
+    @cache_response(LokiAlertRuleFile, Device)
     def get(self, request: Request) -> Response:
         """Loki Alert Rules get view.
 
         Return non-templated as well as rendered templated rules.
         """
-        # retrieve alert rules that are not a template and serialize them
+        shard = requested_shard(request.query_params)
+
+        # retrieve alert rules that are not a template and serialize them,
+        # they aren't sharded: rules such as up == 0 apply to every device
         no_template_alert_rules = LokiAlertRuleFile.objects.filter(
             template=False
         )
@@ -748,6 +1762,9 @@ class LokiAlertRuleFilesView(CreateAPIView):  # type: ignore[type-arg]
         devices = Device.objects.all()
 
         for device in devices:
+            # only render the rules of the devices of the shard
+            if not in_shard(device.uid, shard):
+                continue
             for rule in device.loki_alert_rule_files.all():
                 if rule in template_alert_rules:
                     rendered_rule = render_alert_rule_template_for_device(
@@ -851,3 +1868,141 @@ class LokiAlertRuleFileView(
     ) -> Response:
         """DELETE a Loki alert rule file."""
         return super().delete(request, *args, **kwargs)
+
+
+class AlertRuleFilesBundleBaseView(APIView):
+    """Alert rule files bundle base API view.
+
+    Base class of the Prometheus and Loki alert rule files bundle views.
+    """
+
+    rule_file_model: Type[Any]
+
+    def get_files(self, request: Request) -> List[Tuple[str, bytes]]:
+        """Render the files of the requested bundle."""
+        rule_files = filter_applications(
+            self.rule_file_model.objects.all(), request.query_params
+        )
+        devices = Device.objects.all()
+        if device_uid := request.query_params.get("device"):
+            devices = devices.filter(uid=device_uid)
+        return rendered_rule_files(rule_files, devices)
+
+
+class AlertRuleFilesBundleView(AlertRuleFilesBundleBaseView):
+    """Alert rule files bundle API view."""
+
+    @extend_schema(
+        summary="Download an alert rule files bundle",
+        description="Stream the alert rule files as a tar.gz archive "
+        "laid out like the alert rule files list: <uid>.rules files for "
+        "the non-templated rule files and <uid>/<device_uid>.rules files "
+        "for the templated ones rendered for their devices. "
+        "The archive starts with manifest.json, the SHA-256 of each file, "
+        "so that changed files can be found by comparing manifests. "
+        "If-None-Match requests are answered with a 304 when unchanged.",
+        responses={**status.code_200_alert_rules_bundle},
+        parameters=APPLICATIONS_BUNDLE_PARAMETERS,
+    )
+    def get(self, request: Request) -> HttpResponseBase:
+        """Alert rule files bundle get view.
+
+        The ETag is the hash of the manifest. It is cached along with
+        the list responses so that unchanged bundles aren't rendered.
+        """
+        key = response_cache_key(request, (self.rule_file_model, Device))
+        etag = cache.get(key) if settings.API_CACHE_TIMEOUT else None
+        files = None
+        if etag is None:
+            etag, files = with_manifest(self.get_files(request))
+            if settings.API_CACHE_TIMEOUT:
+                cache.set(key, etag, settings.API_CACHE_TIMEOUT)
+
+        response: Optional[HttpResponseBase] = get_conditional_response(
+            request, etag=etag
+        )
+        if response is None:
+            if files is None:
+                etag, files = with_manifest(self.get_files(request))
+            response = StreamingHttpResponse(
+                stream_tar_gz(files), content_type="application/gzip"
+            )
+            response["Content-Disposition"] = (
+                'attachment; filename="bundle.tar.gz"'
+            )
+        response["ETag"] = etag
+        return response
+
+
+class AlertRuleFilesManifestView(AlertRuleFilesBundleBaseView):
+    """Alert rule files manifest API view."""
+
+    @extend_schema(
+        summary="Get the manifest of an alert rule files bundle",
+        description="Return the SHA-256 of each file of the alert rule "
+        "files bundle by path, to compare it with a previous manifest "
+        "and only download the changed rule files.",
+        responses={**status.code_200_alert_rules_manifest},
+        parameters=APPLICATIONS_BUNDLE_PARAMETERS,
+    )
+    def get(self, request: Request) -> Response:
+        """GET the manifest of an alert rule files bundle."""
+        return self.get_manifest(request)
+
+    def get_manifest(self, request: Request) -> Response:
+        """Compute the manifest of the requested bundle."""
+        return Response(bundle_manifest(self.get_files(request)))
+
+
+@extend_schema_view(
+    get=extend_schema(
+        operation_id="applications_prometheus_alert_rules_bundle_retrieve"
+    )
+)
+class PrometheusAlertRuleFilesBundleView(AlertRuleFilesBundleView):
+    """PrometheusAlertRuleFiles bundle API view."""
+
+    rule_file_model = PrometheusAlertRuleFile
+
+
+@extend_schema_view(
+    get=extend_schema(
+        operation_id="applications_prometheus_alert_rules_manifest_retrieve"
+    )
+)
+class PrometheusAlertRuleFilesManifestView(AlertRuleFilesManifestView):
+    """PrometheusAlertRuleFiles manifest API view."""
+
+    rule_file_model = PrometheusAlertRuleFile
+
+    @cache_response(PrometheusAlertRuleFile, Device)
+    def get_manifest(self, request: Request) -> Response:
+        """Compute the manifest, cached with the list responses."""
+        return super().get_manifest(request)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        operation_id="applications_loki_alert_rules_bundle_retrieve"
+    )
+)
+class LokiAlertRuleFilesBundleView(AlertRuleFilesBundleView):
+    """LokiAlertRuleFiles bundle API view."""
+
+    rule_file_model = LokiAlertRuleFile
+
+
+@extend_schema_view(
+    get=extend_schema(
+        operation_id="applications_loki_alert_rules_manifest_retrieve"
+    )
+)
+class LokiAlertRuleFilesManifestView(AlertRuleFilesManifestView):
+    """LokiAlertRuleFiles manifest API view."""
+
+    rule_file_model = LokiAlertRuleFile
+
+    @cache_response(LokiAlertRuleFile, Device)
+    def get_manifest(self, request: Request) -> Response:
+        """Compute the manifest, cached with the list responses."""
+        return super().get_manifest(request)
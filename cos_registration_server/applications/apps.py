@@ -8,3 +8,9 @@ class ApplicationsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "applications"
+
+    def ready(self) -> None:
+        """Connect the applications signals once the models are loaded."""
+        from applications.signals import connect_signals
+
+        connect_signals()
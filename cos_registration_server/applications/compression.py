@@ -0,0 +1,109 @@
+"""Compressed at-rest storage.
+
+Dashboards and alert rule files are stored gzip compressed when
+settings.STORAGE_COMPRESSION is enabled. Stored values are
+self-describing: compressed values start with the gzip magic number,
+which neither a JSON nor a YAML document can start with, so that plain
+and compressed rows can coexist and the mode can be switched at any time.
+
+Decompressed values are kept in a LRU cache keyed by the digest of the
+stored bytes, so that hot dashboards and rule files are not decompressed
+on every read.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Type
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.functions import Cast
+
+GZIP_MAGIC = b"\x1f\x8b"
+RECOMPRESS_BATCH_SIZE = 500
+
+_decompressed: "OrderedDict[bytes, bytes]" = OrderedDict()
+_decompressed_lock = threading.Lock()
+
+
+def is_compressed(data: bytes) -> bool:
+    """Return whether stored data is compressed."""
+    return data.startswith(GZIP_MAGIC)
+
+
+def compress_value(data: bytes) -> bytes:
+    """Return the data to store, compressed if the storage mode says so.
+
+    The modification time is left out of the gzip header so that
+    identical values are compressed to identical bytes.
+    """
+    if not settings.STORAGE_COMPRESSION or is_compressed(data):
+        return data
+    return gzip.compress(data, mtime=0)
+
+
+def _decompress(data: bytes) -> bytes:
+    key = hashlib.sha256(data).digest()
+    with _decompressed_lock:
+        if key in _decompressed:
+            _decompressed.move_to_end(key)
+            return _decompressed[key]
+    plain = gzip.decompress(data)
+    with _decompressed_lock:
+        _decompressed[key] = plain
+        while len(_decompressed) > settings.STORAGE_DECOMPRESSED_CACHE_SIZE:
+            _decompressed.popitem(last=False)
+    return plain
+
+
+def decompress_value(data: bytes) -> bytes:
+    """Return the plain content of stored data.
+
+    data: the stored data, compressed or not.
+    """
+    if not is_compressed(data):
+        return data
+    return _decompress(data)
+
+
+def recompress_field(
+    model: Type[Any],
+    field_name: str,
+    batch_size: int = RECOMPRESS_BATCH_SIZE,
+) -> int:
+    """Rewrite the stored values of a field in the current storage mode.
+
+    Values are rewritten byte for byte, without being parsed again.
+
+    model: the model storing the values.
+    field_name: name of the compressed field.
+    batch_size: number of rows rewritten at once.
+    return: the number of rows rewritten.
+    """
+    # cast to a plain binary field to read the stored bytes as is
+    stored = model.objects.annotate(
+        stored=Cast(field_name, models.BinaryField())
+    )
+    pks = list(model.objects.order_by("pk").values_list("pk", flat=True))
+    rewritten = 0
+    for start in range(0, len(pks), batch_size):
+        batch = pks[start : start + batch_size]  # noqa: E203
+        with transaction.atomic():
+            for pk, data in stored.filter(pk__in=batch).values_list(
+                "pk", "stored"
+            ):
+                data = bytes(data)
+                target = compress_value(decompress_value(data))
+                if target == data:
+                    continue
+                model.objects.filter(pk=pk).update(
+                    **{
+                        field_name: models.Value(
+                            target, output_field=models.BinaryField()
+                        )
+                    }
+                )
+                rewritten += 1
+    return rewritten
@@ -1,16 +1,20 @@
-"""Custom YAML field.
+"""Custom fields.
 
-TODO: add a license, this code was taken from
+TODO: add a license, the YAML field code was taken from
 https://github.com/palewire/django-yamlfield
 """
 
-from typing import Any, Optional
+import json
+from typing import Any, Optional, Tuple
 
 import yaml
+from django import forms
 from django.core.serializers.pyyaml import DjangoSafeDumper
 from django.db import models
 from rest_framework import serializers
 
+from .compression import compress_value, decompress_value
+
 
 class YAMLField(models.TextField):  # type: ignore[type-arg]
     """A Django database field for storing YAML data."""
@@ -58,3 +62,123 @@ class YAMLField(models.TextField):  # type: ignore[type-arg]
         return yaml.dump(
             value, Dumper=DjangoSafeDumper, default_flow_style=False
         )
+
+
+class CompressedYAMLField(YAMLField):
+    """A YAML field stored as bytes, compressed depending on the settings.
+
+    See applications.compression for the storage format.
+    """
+
+    def get_internal_type(self) -> str:
+        """Store the YAML in a binary column."""
+        return "BinaryField"
+
+    def from_db_value(
+        self,
+        value: Any,
+        expression: Any,
+        connection: Any,
+        context: Optional[Any] = None,
+    ) -> Any:
+        """Retrieve python object from database."""
+        if value is None:
+            return value
+        return self.to_python(decompress_value(bytes(value)).decode())
+
+    def get_db_prep_value(
+        self, value: Any, connection: Any, prepared: bool = False
+    ) -> Any:
+        """Convert Python object to the stored YAML bytes."""
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return value
+        return connection.Database.Binary(compress_value(value.encode()))
+
+
+class CompressedBinaryField(models.BinaryField):  # type: ignore[type-arg]
+    """A binary field compressed depending on the settings.
+
+    See applications.compression for the storage format.
+    """
+
+    def from_db_value(
+        self,
+        value: Any,
+        expression: Any,
+        connection: Any,
+        context: Optional[Any] = None,
+    ) -> Any:
+        """Return the decompressed bytes."""
+        if value is None:
+            return value
+        return decompress_value(bytes(value))
+
+    def get_db_prep_value(
+        self, value: Any, connection: Any, prepared: bool = False
+    ) -> Any:
+        """Compress the bytes to store."""
+        if value is not None:
+            value = compress_value(bytes(value))
+        return super().get_db_prep_value(value, connection, prepared)
+
+
+class _BlobJSONDescriptor:
+    """Load the JSON of a BlobJSONField on first access."""
+
+    def __init__(self, field: "BlobJSONField") -> None:
+        self.field = field
+
+    def __get__(self, instance: Any, owner: Any) -> Any:
+        if instance is None:
+            return self
+        if self.field.attname not in instance.__dict__:
+            blob = getattr(instance, self.field.blob_field)
+            instance.__dict__[self.field.attname] = json.loads(
+                bytes(blob.data)
+            )
+        return instance.__dict__[self.field.attname]
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        instance.__dict__[self.field.attname] = value
+
+
+class BlobJSONField(models.Field):  # type: ignore[type-arg]
+    """A virtual field exposing the JSON stored in a related blob.
+
+    The field has no column, the JSON is loaded from the data of the
+    blob_field foreign key on first access and kept on the instance.
+    The model is responsible for storing the blob of a changed value.
+    """
+
+    def __init__(self, *args: Any, blob_field: str, **kwargs: Any) -> None:
+        """Init the field.
+
+        blob_field: name of the foreign key to the blob model.
+        """
+        self.blob_field = blob_field
+        kwargs["serialize"] = False
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self) -> Any:
+        """Deconstruct the field with its blob field."""
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["blob_field"] = self.blob_field
+        del kwargs["serialize"]
+        return name, path, args, kwargs
+
+    def get_attname_column(self) -> Tuple[str, None]:
+        """Return the attribute name, without column."""
+        return self.get_attname(), None
+
+    def contribute_to_class(
+        self, cls: Any, name: str, private_only: bool = False
+    ) -> None:
+        """Add the field as a private field with its descriptor."""
+        super().contribute_to_class(cls, name, private_only=True)
+        setattr(cls, self.attname, _BlobJSONDescriptor(self))
+
+    def formfield(self, **kwargs: Any) -> Any:
+        """Edit the JSON in forms."""
+        return super().formfield(**{"form_class": forms.JSONField, **kwargs})
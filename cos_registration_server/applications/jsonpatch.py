@@ -0,0 +1,206 @@
+"""JSON Patch.
+
+Minimal RFC 6902 implementation used to store the dashboard versions
+as deltas and to apply partial dashboard updates.
+"""
+
+import copy
+from typing import Any, Dict, List, Tuple
+
+JSONPatch = List[Dict[str, Any]]
+
+
+class JSONPatchError(ValueError):
+    """Raised when a JSON patch is invalid or cannot be applied."""
+
+
+class JSONPatchTestFailed(JSONPatchError):
+    """Raised when a test operation of a JSON patch fails."""
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _pointer_tokens(pointer: Any) -> List[str]:
+    if not isinstance(pointer, str) or (
+        pointer and not pointer.startswith("/")
+    ):
+        raise JSONPatchError(f"Invalid JSON pointer {pointer!r}.")
+    if not pointer:
+        return []
+    return [_unescape(token) for token in pointer[1:].split("/")]
+
+
+def _list_index(container: List[Any], token: str, adding: bool) -> int:
+    if adding and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JSONPatchError(f"Invalid array index {token!r}.")
+    index = int(token)
+    if index > len(container) or (not adding and index == len(container)):
+        raise JSONPatchError(f"Array index {index} out of range.")
+    return index
+
+
+def _resolve(document: Any, pointer: Any) -> Tuple[Any, str]:
+    """Return the container and the last token of a pointer."""
+    tokens = _pointer_tokens(pointer)
+    if not tokens:
+        raise JSONPatchError("The operation cannot target the whole document.")
+    container = document
+    for token in tokens[:-1]:
+        container = _get(container, token)
+    return container, tokens[-1]
+
+
+def _get(container: Any, token: str) -> Any:
+    if isinstance(container, dict):
+        if token not in container:
+            raise JSONPatchError(f"Member {token!r} not found.")
+        return container[token]
+    if isinstance(container, list):
+        return container[_list_index(container, token, adding=False)]
+    raise JSONPatchError(f"Cannot reference {token!r} in a scalar value.")
+
+
+def get_pointer(document: Any, pointer: Any) -> Any:
+    """Return the value a JSON pointer references in a document."""
+    value = document
+    for token in _pointer_tokens(pointer):
+        value = _get(value, token)
+    return value
+
+
+def _add(document: Any, pointer: Any, value: Any) -> Any:
+    if pointer == "":
+        return value
+    container, token = _resolve(document, pointer)
+    if isinstance(container, dict):
+        container[token] = value
+    elif isinstance(container, list):
+        container.insert(_list_index(container, token, adding=True), value)
+    else:
+        raise JSONPatchError(f"Cannot add {token!r} to a scalar value.")
+    return document
+
+
+def _remove(document: Any, pointer: Any) -> Any:
+    container, token = _resolve(document, pointer)
+    value = _get(container, token)
+    if isinstance(container, dict):
+        del container[token]
+    else:
+        del container[_list_index(container, token, adding=False)]
+    return value
+
+
+def apply_patch(document: Any, patch: Any) -> Any:
+    """Apply a JSON patch to a document.
+
+    The document is left untouched, a patched copy is returned.
+
+    document: the JSON document.
+    patch: list of RFC 6902 operations.
+    return: the patched document.
+    raise:
+      JSONPatchError if the patch is invalid or cannot be applied.
+      JSONPatchTestFailed if a test operation fails.
+    """
+    if not isinstance(patch, list):
+        raise JSONPatchError("A JSON patch must be a list of operations.")
+    document = copy.deepcopy(document)
+    for operation in patch:
+        if not isinstance(operation, dict) or "path" not in operation:
+            raise JSONPatchError(f"Invalid operation {operation!r}.")
+        op = operation.get("op")
+        path = operation["path"]
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JSONPatchError(f"Operation {op} requires a value.")
+        if op in ("move", "copy") and "from" not in operation:
+            raise JSONPatchError(f"Operation {op} requires from.")
+
+        if op == "add":
+            value = copy.deepcopy(operation["value"])
+            document = _add(document, path, value)
+        elif op == "remove":
+            _remove(document, path)
+        elif op == "replace":
+            value = copy.deepcopy(operation["value"])
+            if path == "":
+                document = value
+            else:
+                _remove(document, path)
+                document = _add(document, path, value)
+        elif op == "move":
+            source = operation["from"]
+            if path != source and path.startswith(f"{source}/"):
+                raise JSONPatchError("Cannot move a value into itself.")
+            document = _add(document, path, _remove(document, source))
+        elif op == "copy":
+            value = copy.deepcopy(get_pointer(document, operation["from"]))
+            document = _add(document, path, value)
+        elif op == "test":
+            if get_pointer(document, path) != operation["value"]:
+                raise JSONPatchTestFailed(f"Test failed at {path!r}.")
+        else:
+            raise JSONPatchError(f"Unknown operation {op!r}.")
+    return document
+
+
+def make_patch(source: Any, target: Any, path: str = "") -> JSONPatch:
+    """Compute a JSON patch turning source into target.
+
+    Objects and arrays are compared recursively so that changing
+    a nested value results in a single operation.
+
+    source: the original document.
+    target: the changed document.
+    path: JSON pointer of the compared values.
+    return: the list of add, remove and replace operations.
+    """
+    if type(source) is not type(target):
+        return [{"op": "replace", "path": path, "value": target}]
+
+    if isinstance(source, dict):
+        patch: JSONPatch = []
+        for key in source:
+            if key not in target:
+                patch.append(
+                    {"op": "remove", "path": f"{path}/{_escape(key)}"}
+                )
+        for key, value in target.items():
+            member = f"{path}/{_escape(key)}"
+            if key not in source:
+                patch.append({"op": "add", "path": member, "value": value})
+            else:
+                patch.extend(make_patch(source[key], value, member))
+        return patch
+
+    if isinstance(source, list):
+        patch = []
+        common = min(len(source), len(target))
+        for index in range(common):
+            patch.extend(
+                make_patch(source[index], target[index], f"{path}/{index}")
+            )
+        # remove from the end so that the indexes stay valid
+        for index in reversed(range(common, len(source))):
+            patch.append({"op": "remove", "path": f"{path}/{index}"})
+        for index in range(common, len(target)):
+            patch.append(
+                {
+                    "op": "add",
+                    "path": f"{path}/{index}",
+                    "value": target[index],
+                }
+            )
+        return patch
+
+    if source != target:
+        return [{"op": "replace", "path": path, "value": target}]
+    return []
@@ -0,0 +1,38 @@
+"""Rewrite the stored dashboards and alert rule files."""
+
+from typing import Any
+
+from applications.compression import recompress_field
+from applications.models import (
+    DashboardBlob,
+    LokiAlertRuleFile,
+    PrometheusAlertRuleFile,
+)
+from django.core.management.base import BaseCommand
+
+COMPRESSED_FIELDS = (
+    (DashboardBlob, "data"),
+    (PrometheusAlertRuleFile, "rules"),
+    (LokiAlertRuleFile, "rules"),
+)
+
+
+class Command(BaseCommand):
+    """Rewrite the stored values in the current storage mode.
+
+    To run after switching settings.STORAGE_COMPRESSION,
+    the values stored before remain readable either way.
+    """
+
+    help = (
+        "Compress or decompress the stored dashboards and alert rule "
+        "files according to the STORAGE_COMPRESSION setting."
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Rewrite every compressed field."""
+        for model, field_name in COMPRESSED_FIELDS:
+            rewritten = recompress_field(model, field_name)
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {rewritten} rewritten"
+            )
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:12
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def compute_content_metadata(apps, schema_editor):
+    for model_name in ("GrafanaDashboard", "FoxgloveDashboard"):
+        model = apps.get_model("applications", model_name)
+        dashboards = list(model.objects.all())
+        for dashboard in dashboards:
+            serialized = json.dumps(
+                dashboard.dashboard, sort_keys=True, separators=(",", ":")
+            ).encode()
+            dashboard.content_hash = hashlib.sha256(serialized).hexdigest()
+            dashboard.size = len(serialized)
+        model.objects.bulk_update(dashboards, ["content_hash", "size"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0003_lokialertrulefile_prometheusalertrulefile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="foxglovedashboard",
+            name="content_hash",
+            field=models.CharField(
+                default="",
+                editable=False,
+                max_length=64,
+                verbose_name="Dashboard content SHA-256",
+            ),
+        ),
+        migrations.AddField(
+            model_name="foxglovedashboard",
+            name="size",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="Dashboard size in bytes",
+            ),
+        ),
+        migrations.AddField(
+            model_name="grafanadashboard",
+            name="content_hash",
+            field=models.CharField(
+                default="",
+                editable=False,
+                max_length=64,
+                verbose_name="Dashboard content SHA-256",
+            ),
+        ),
+        migrations.AddField(
+            model_name="grafanadashboard",
+            name="size",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="Dashboard size in bytes",
+            ),
+        ),
+        migrations.RunPython(
+            compute_content_metadata, migrations.RunPython.noop
+        ),
+    ]
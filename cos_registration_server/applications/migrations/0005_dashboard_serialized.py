@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:14
+
+import json
+
+from django.db import migrations, models
+
+
+def serialize_dashboards(apps, schema_editor):
+    for model_name in ("GrafanaDashboard", "FoxgloveDashboard"):
+        model = apps.get_model("applications", model_name)
+        dashboards = list(model.objects.all())
+        for dashboard in dashboards:
+            dashboard.serialized = json.dumps(
+                dashboard.dashboard, sort_keys=True, separators=(",", ":")
+            ).encode()
+        model.objects.bulk_update(dashboards, ["serialized"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0004_dashboard_content_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="foxglovedashboard",
+            name="serialized",
+            field=models.BinaryField(
+                default=b"", verbose_name="Dashboard canonical JSON"
+            ),
+        ),
+        migrations.AddField(
+            model_name="grafanadashboard",
+            name="serialized",
+            field=models.BinaryField(
+                default=b"", verbose_name="Dashboard canonical JSON"
+            ),
+        ),
+        migrations.RunPython(serialize_dashboards, migrations.RunPython.noop),
+    ]
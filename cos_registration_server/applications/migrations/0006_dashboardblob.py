@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def store_dashboard_blobs(apps, schema_editor):
+    DashboardBlob = apps.get_model("applications", "DashboardBlob")
+    for model_name in ("GrafanaDashboard", "FoxgloveDashboard"):
+        model = apps.get_model("applications", model_name)
+        dashboards = list(model.objects.all())
+        for dashboard in dashboards:
+            DashboardBlob.objects.get_or_create(
+                hash=dashboard.content_hash,
+                defaults={"data": bytes(dashboard.serialized)},
+            )
+            dashboard.blob_id = dashboard.content_hash
+        model.objects.bulk_update(dashboards, ["blob"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0005_dashboard_serialized"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardBlob",
+            fields=[
+                (
+                    "hash",
+                    models.CharField(
+                        max_length=64, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "data",
+                    models.BinaryField(
+                        verbose_name="Dashboard canonical JSON"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="foxglovedashboard",
+            name="blob",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="applications.dashboardblob",
+            ),
+        ),
+        migrations.AddField(
+            model_name="grafanadashboard",
+            name="blob",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="applications.dashboardblob",
+            ),
+        ),
+        migrations.RunPython(store_dashboard_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:15
+
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def restore_inline_dashboards(apps, schema_editor):
+    DashboardBlob = apps.get_model("applications", "DashboardBlob")
+    for model_name in ("GrafanaDashboard", "FoxgloveDashboard"):
+        model = apps.get_model("applications", model_name)
+        dashboards = list(model.objects.all())
+        blobs = DashboardBlob.objects.in_bulk(
+            {dashboard.blob_id for dashboard in dashboards}
+        )
+        for dashboard in dashboards:
+            data = bytes(blobs[dashboard.blob_id].data)
+            dashboard.dashboard = json.loads(data)
+            dashboard.serialized = data
+            dashboard.content_hash = dashboard.blob_id
+        model.objects.bulk_update(
+            dashboards, ["dashboard", "serialized", "content_hash"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0006_dashboardblob"),
+    ]
+
+    operations = [
+        # the dashboards are nullable while removed so that, when migrating
+        # backwards, the column can be added back and filled from the blobs
+        migrations.AlterField(
+            model_name="foxglovedashboard",
+            name="dashboard",
+            field=models.JSONField(
+                null=True, verbose_name="Dashboard json field"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="grafanadashboard",
+            name="dashboard",
+            field=models.JSONField(
+                null=True, verbose_name="Dashboard json field"
+            ),
+        ),
+        migrations.RunPython(
+            migrations.RunPython.noop, restore_inline_dashboards
+        ),
+        migrations.RemoveField(
+            model_name="foxglovedashboard",
+            name="content_hash",
+        ),
+        migrations.RemoveField(
+            model_name="foxglovedashboard",
+            name="dashboard",
+        ),
+        migrations.RemoveField(
+            model_name="foxglovedashboard",
+            name="serialized",
+        ),
+        migrations.RemoveField(
+            model_name="grafanadashboard",
+            name="content_hash",
+        ),
+        migrations.RemoveField(
+            model_name="grafanadashboard",
+            name="dashboard",
+        ),
+        migrations.RemoveField(
+            model_name="grafanadashboard",
+            name="serialized",
+        ),
+        migrations.AlterField(
+            model_name="foxglovedashboard",
+            name="blob",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="applications.dashboardblob",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="grafanadashboard",
+            name="blob",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="applications.dashboardblob",
+            ),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:40
+
+import gzip
+
+import applications.fields
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Cast
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def store_rules(apps, schema_editor):
+    for model_name in ("PrometheusAlertRuleFile", "LokiAlertRuleFile"):
+        model = apps.get_model("applications", model_name)
+        # read the YAML as stored rather than parsing and dumping it again
+        rule_files = model.objects.annotate(
+            raw_rules=Cast("rules", models.TextField())
+        ).values_list("pk", "raw_rules")
+        for pk, raw_rules in list(rule_files):
+            stored = raw_rules.encode()
+            if settings.STORAGE_COMPRESSION:
+                stored = gzip.compress(stored, mtime=0)
+            model.objects.filter(pk=pk).update(stored_rules=stored)
+
+
+def restore_rules(apps, schema_editor):
+    for model_name in ("PrometheusAlertRuleFile", "LokiAlertRuleFile"):
+        model = apps.get_model("applications", model_name)
+        rule_files = model.objects.values_list("pk", "stored_rules")
+        for pk, stored in list(rule_files):
+            stored = bytes(stored)
+            if stored.startswith(GZIP_MAGIC):
+                stored = gzip.decompress(stored)
+            model.objects.filter(pk=pk).update(rules=stored.decode())
+
+
+def store_dashboard_blobs(apps, schema_editor):
+    DashboardBlob = apps.get_model("applications", "DashboardBlob")
+    # the blob data is compressed on save depending on the settings
+    blobs = list(DashboardBlob.objects.all())
+    DashboardBlob.objects.bulk_update(blobs, ["data"], batch_size=500)
+
+
+def restore_dashboard_blobs(apps, schema_editor):
+    DashboardBlob = apps.get_model("applications", "DashboardBlob")
+    # the blob data is decompressed on read, store it as is
+    for blob_hash, data in list(
+        DashboardBlob.objects.values_list("hash", "data")
+    ):
+        DashboardBlob.objects.filter(hash=blob_hash).update(
+            data=models.Value(bytes(data), output_field=models.BinaryField())
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0007_dashboard_blob_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lokialertrulefile",
+            name="stored_rules",
+            field=models.BinaryField(default=b""),
+        ),
+        migrations.AddField(
+            model_name="prometheusalertrulefile",
+            name="stored_rules",
+            field=models.BinaryField(default=b""),
+        ),
+        migrations.RunPython(store_rules, restore_rules),
+        migrations.RemoveField(
+            model_name="lokialertrulefile",
+            name="rules",
+        ),
+        migrations.RemoveField(
+            model_name="prometheusalertrulefile",
+            name="rules",
+        ),
+        migrations.RenameField(
+            model_name="lokialertrulefile",
+            old_name="stored_rules",
+            new_name="rules",
+        ),
+        migrations.RenameField(
+            model_name="prometheusalertrulefile",
+            old_name="stored_rules",
+            new_name="rules",
+        ),
+        migrations.AlterField(
+            model_name="lokialertrulefile",
+            name="rules",
+            field=applications.fields.CompressedYAMLField(),
+        ),
+        migrations.AlterField(
+            model_name="prometheusalertrulefile",
+            name="rules",
+            field=applications.fields.CompressedYAMLField(),
+        ),
+        migrations.AlterField(
+            model_name="dashboardblob",
+            name="data",
+            field=applications.fields.CompressedBinaryField(
+                verbose_name="Dashboard canonical JSON"
+            ),
+        ),
+        migrations.RunPython(store_dashboard_blobs, restore_dashboard_blobs),
+    ]
@@ -0,0 +1,178 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def record_first_versions(apps, schema_editor):
+    for model_name in ("GrafanaDashboard", "FoxgloveDashboard"):
+        model = apps.get_model("applications", model_name)
+        version_model = apps.get_model("applications", f"{model_name}Version")
+        version_model.objects.bulk_create(
+            [
+                version_model(
+                    dashboard_id=pk,
+                    version=1,
+                    content_hash=blob_id,
+                    size=size,
+                    checkpoint_id=blob_id,
+                )
+                for pk, blob_id, size in model.objects.values_list(
+                    "pk", "blob_id", "size"
+                )
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0008_compressed_storage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GrafanaDashboardVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveIntegerField(verbose_name="Version number"),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Version creation date"
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(
+                        max_length=64, verbose_name="Dashboard content SHA-256"
+                    ),
+                ),
+                (
+                    "size",
+                    models.PositiveIntegerField(
+                        verbose_name="Dashboard size in bytes"
+                    ),
+                ),
+                (
+                    "delta",
+                    models.JSONField(
+                        null=True,
+                        verbose_name="Patch from the previous version",
+                    ),
+                ),
+                (
+                    "checkpoint",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="applications.dashboardblob",
+                    ),
+                ),
+                (
+                    "dashboard",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="versions",
+                        to="applications.grafanadashboard",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["version"],
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="FoxgloveDashboardVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveIntegerField(verbose_name="Version number"),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Version creation date"
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(
+                        max_length=64, verbose_name="Dashboard content SHA-256"
+                    ),
+                ),
+                (
+                    "size",
+                    models.PositiveIntegerField(
+                        verbose_name="Dashboard size in bytes"
+                    ),
+                ),
+                (
+                    "delta",
+                    models.JSONField(
+                        null=True,
+                        verbose_name="Patch from the previous version",
+                    ),
+                ),
+                (
+                    "checkpoint",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="applications.dashboardblob",
+                    ),
+                ),
+                (
+                    "dashboard",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="versions",
+                        to="applications.foxglovedashboard",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["version"],
+                "abstract": False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="grafanadashboardversion",
+            constraint=models.UniqueConstraint(
+                fields=("dashboard", "version"),
+                name="applications_grafanadashboardversion_unique_version",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="foxglovedashboardversion",
+            constraint=models.UniqueConstraint(
+                fields=("dashboard", "version"),
+                name="applications_foxglovedashboardversion_unique_version",
+            ),
+        ),
+        migrations.RunPython(record_first_versions, migrations.RunPython.noop),
+    ]
@@ -1,21 +1,117 @@
 """Applications DB model."""
 
-from django.db import models
+import hashlib
+import json
+from typing import Any, Optional, Sequence
 
-from .fields import YAMLField
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
+
+from .fields import BlobJSONField, CompressedBinaryField, CompressedYAMLField
+from .jsonpatch import apply_patch, make_patch
+from .validators import validate_uid
+
+
+def serialize_dashboard(dashboard: Any) -> bytes:
+    """Serialize a dashboard to its canonical JSON bytes.
+
+    Keys are sorted so that the serialization, and thus the content hash,
+    doesn't depend on the key order of the provided or stored JSON.
+    """
+    return json.dumps(
+        dashboard, sort_keys=True, separators=(",", ":")
+    ).encode()
+
+
+def hash_dashboard(serialized: bytes) -> str:
+    """Return the SHA-256 of a serialized dashboard."""
+    return hashlib.sha256(serialized).hexdigest()
+
+
+class DashboardBlob(models.Model):
+    """Dashboard blob.
+
+    Content addressed storage of the dashboards JSON,
+    identical dashboards share the same blob.
+
+    hash: SHA-256 of the canonical dashboard JSON.
+    data: The canonical dashboard JSON, stored compressed
+        if settings.STORAGE_COMPRESSION is enabled.
+    """
+
+    hash = models.CharField(max_length=64, primary_key=True)
+    data = CompressedBinaryField("Dashboard canonical JSON")
+
+    def __str__(self) -> str:
+        """Str representation of a dashboard blob."""
+        return self.hash
+
+    @classmethod
+    def store(cls, data: bytes) -> "DashboardBlob":
+        """Return the blob of the data, created if it doesn't exist yet.
+
+        The blob row is locked until the end of the transaction, so that
+        delete_if_unused can't delete it before the dashboard referencing
+        it is saved. Must be called within the transaction saving the
+        dashboard.
+
+        data: canonical dashboard JSON, see serialize_dashboard.
+        """
+        blob, _ = cls.objects.select_for_update().get_or_create(
+            hash=hash_dashboard(data), defaults={"data": data}
+        )
+        return blob
+
+    @classmethod
+    def delete_if_unused(cls, blob_hash: str) -> None:
+        """Delete a blob unless a dashboard still references it.
+
+        Waits for the transactions that stored the blob, see store.
+
+        blob_hash: hash of the blob.
+        """
+        try:
+            with transaction.atomic():
+                blob = cls.objects.select_for_update().filter(hash=blob_hash)
+                if blob.exists():
+                    blob.delete()
+        except models.ProtectedError:
+            pass
 
 
 class Dashboard(models.Model):
     """Application dashboard.
 
     This class represent an application dashboard in the DB.
+    The dashboard JSON is stored in a DashboardBlob shared by the
+    dashboards with the same content.
+
+    Every content change is recorded as a new version, see DashboardVersion.
 
     uid: Unique ID of the dashboard.
-    dashboard: Dashboard JSON.
+    dashboard: Dashboard JSON, loaded from the blob on access.
+    content_hash: SHA-256 of the canonical dashboard JSON.
+    size: Size of the canonical dashboard JSON in bytes.
+    blob: The dashboard blob.
     """
 
-    uid = models.CharField(max_length=200, unique=True)
-    dashboard = models.JSONField("Dashboard json field")
+    # reverse relation of the version model of the concrete dashboards
+    versions: Any
+
+    uid = models.CharField(
+        max_length=200, unique=True, validators=[validate_uid]
+    )
+    dashboard = BlobJSONField("Dashboard json field", blob_field="blob")
+    size = models.PositiveIntegerField(
+        "Dashboard size in bytes", default=0, editable=False
+    )
+    blob = models.ForeignKey(
+        DashboardBlob,
+        on_delete=models.PROTECT,
+        related_name="+",
+        editable=False,
+    )
 
     class Meta:
         """Model Meta class overwritting."""
@@ -26,6 +122,169 @@ class Dashboard(models.Model):
         """Str representation of a dashboard."""
         return self.uid
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save the dashboard along with its blob and version.
+
+        The previous blob is deleted if nothing else uses it.
+        """
+        previous_blob_hash = self.blob_id
+        # the dashboard is only serialized again if it was accessed
+        if "dashboard" not in self.__dict__:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            self.update_content_metadata()
+            super().save(*args, **kwargs)
+            if previous_blob_hash == self.blob_id:
+                return
+            self.record_version(previous_blob_hash)
+        if previous_blob_hash:
+            DashboardBlob.delete_if_unused(previous_blob_hash)
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of the canonical dashboard JSON."""
+        return str(self.blob_id)
+
+    @property
+    def serialized(self) -> bytes:
+        """The canonical dashboard JSON, served as is on download."""
+        return bytes(self.blob.data)
+
+    @property
+    def etag(self) -> str:
+        """The ETag of the dashboard download."""
+        return f'"{self.content_hash}"'
+
+    def refresh_from_db(self, *args: Any, **kwargs: Any) -> None:
+        """Reload the dashboard from the database."""
+        super().refresh_from_db(*args, **kwargs)
+        # the dashboard JSON is loaded again from the blob on access
+        self.__dict__.pop("dashboard", None)
+
+    def update_content_metadata(self) -> None:
+        """Store the dashboard blob and compute its size.
+
+        Called on save, must be called explicitly before bulk writes,
+        within their transaction.
+        Nothing is written if the dashboard content is unchanged.
+        """
+        serialized = serialize_dashboard(self.dashboard)
+        if hash_dashboard(serialized) != self.blob_id:
+            self.blob = DashboardBlob.store(serialized)
+        self.size = len(serialized)
+
+    def record_version(self, previous_blob_hash: Optional[str]) -> None:
+        """Record the current content as a new version.
+
+        The version stores the JSON patch from the previous version,
+        or the whole dashboard every DASHBOARD_CHECKPOINT_INTERVAL versions
+        so that reconstructing a version applies a bounded number of patches.
+        Must be called explicitly after bulk writes, within their
+        transaction, or see record_versions.
+
+        previous_blob_hash: hash of the content before the change.
+        """
+        type(self).record_versions([self], [previous_blob_hash])
+
+    @classmethod
+    def record_versions(
+        cls,
+        dashboards: Sequence["Dashboard"],
+        previous_blob_hashes: Sequence[Optional[str]],
+    ) -> None:
+        """Record the current content of dashboards as new versions.
+
+        Like record_version, with a few statements for all the dashboards.
+        The dashboards are locked so that concurrent changes are numbered
+        one after the other. Must be called within the transaction writing
+        the dashboards.
+
+        dashboards: the changed dashboards.
+        previous_blob_hashes: hash of the content of each dashboard
+            before the change.
+        """
+        version_model: Any = cls._meta.get_field("versions").related_model
+        latest_versions = version_model.objects.filter(
+            dashboard=OuterRef("pk")
+        ).order_by("-version")
+        latest = {
+            pk: (number, content_hash)
+            for pk, number, content_hash in cls._default_manager.filter(
+                pk__in=[dashboard.pk for dashboard in dashboards]
+            )
+            .select_for_update()
+            .annotate(
+                latest_version=Subquery(latest_versions.values("version")[:1]),
+                latest_hash=Subquery(
+                    latest_versions.values("content_hash")[:1]
+                ),
+            )
+            .values_list("pk", "latest_version", "latest_hash")
+        }
+
+        interval = settings.DASHBOARD_CHECKPOINT_INTERVAL
+        versions = []
+        deltas = []
+        for dashboard, previous_blob_hash in zip(
+            dashboards, previous_blob_hashes
+        ):
+            latest_number, latest_hash = latest[dashboard.pk]
+            number = (latest_number or 0) + 1
+            version = version_model(
+                dashboard=dashboard,
+                version=number,
+                content_hash=dashboard.content_hash,
+                size=dashboard.size,
+            )
+            if (
+                latest_number is None
+                or latest_hash != previous_blob_hash
+                or (number - 1) % interval == 0
+            ):
+                version.checkpoint_id = dashboard.blob_id
+            else:
+                deltas.append((version, dashboard, previous_blob_hash))
+            versions.append(version)
+
+        previous_blobs = DashboardBlob.objects.in_bulk(
+            {previous_blob_hash for _, _, previous_blob_hash in deltas}
+        )
+        for version, dashboard, previous_blob_hash in deltas:
+            previous = previous_blobs[previous_blob_hash]
+            version.delta = make_patch(
+                json.loads(bytes(previous.data)), dashboard.dashboard
+            )
+        version_model.objects.bulk_create(versions)
+
+    def get_version_content(self, number: int) -> Any:
+        """Reconstruct the dashboard JSON of a version.
+
+        number: the version number.
+        return: the dashboard JSON.
+        raise: DoesNotExist of the version model.
+        """
+        versions = self.versions.filter(version__lte=number)
+        checkpoint = (
+            versions.filter(checkpoint__isnull=False)
+            .select_related("checkpoint")
+            .latest("version")
+        )
+        content = json.loads(bytes(checkpoint.checkpoint.data))
+        deltas = (
+            versions.filter(version__gt=checkpoint.version)
+            .order_by("version")
+            .values_list("version", "delta")
+        )
+        last = checkpoint.version
+        for last, delta in deltas:
+            content = apply_patch(content, delta)
+        if last != number:
+            raise self.versions.model.DoesNotExist(
+                f"Version {number} does not exist."
+            )
+        return content
+
 
 class GrafanaDashboard(Dashboard):  # noqa: DJ08
     """Grafana dashboard.
@@ -47,20 +306,94 @@ class FoxgloveDashboard(Dashboard):  # noqa: DJ08
     """
 
 
+class DashboardVersion(models.Model):
+    """Application dashboard version.
+
+    This class represent a version of an application dashboard in the DB.
+    A version either stores the JSON patch from the previous version
+    or, for checkpoints, refers to the blob of the whole dashboard.
+
+    version: Number of the version, starting from 1.
+    created: Creation date of the version.
+    content_hash: SHA-256 of the canonical dashboard JSON.
+    size: Size of the canonical dashboard JSON in bytes.
+    delta: JSON patch from the previous version, null for checkpoints.
+    checkpoint: The dashboard blob, null for deltas.
+    """
+
+    version = models.PositiveIntegerField("Version number")
+    created = models.DateTimeField("Version creation date", auto_now_add=True)
+    content_hash = models.CharField("Dashboard content SHA-256", max_length=64)
+    size = models.PositiveIntegerField("Dashboard size in bytes")
+    delta = models.JSONField("Patch from the previous version", null=True)
+    checkpoint = models.ForeignKey(
+        DashboardBlob,
+        on_delete=models.PROTECT,
+        related_name="+",
+        null=True,
+    )
+
+    class Meta:
+        """Model Meta class overwritting."""
+
+        abstract = True
+        ordering = ["version"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dashboard", "version"],
+                name="%(app_label)s_%(class)s_unique_version",
+            )
+        ]
+
+    def __str__(self) -> str:
+        """Str representation of a dashboard version."""
+        return str(self.version)
+
+    @property
+    def is_checkpoint(self) -> bool:
+        """Whether the version stores the whole dashboard."""
+        return self.checkpoint_id is not None
+
+
+class GrafanaDashboardVersion(DashboardVersion):  # noqa: DJ08
+    """Grafana dashboard version.
+
+    dashboard: The versioned Grafana dashboard.
+    """
+
+    dashboard = models.ForeignKey(
+        GrafanaDashboard, on_delete=models.CASCADE, related_name="versions"
+    )
+
+
+class FoxgloveDashboardVersion(DashboardVersion):  # noqa: DJ08
+    """Foxglove dashboard version.
+
+    dashboard: The versioned Foxglove dashboard.
+    """
+
+    dashboard = models.ForeignKey(
+        FoxgloveDashboard, on_delete=models.CASCADE, related_name="versions"
+    )
+
+
 class AlertRuleFile(models.Model):
     """Application alert rule file.
 
     This class represent an application alert rule file in the DB.
 
     uid: Unique ID of the alert rule file.
-    rules: The rules in YAML format.
+    rules: The rules in YAML format, stored compressed
+        if settings.STORAGE_COMPRESSION is enabled.
     template = Boolean stating whether the rule file is \
                a template and must be rendered.
 
     """
 
-    uid = models.CharField(max_length=200, unique=True)
-    rules = YAMLField()
+    uid = models.CharField(
+        max_length=200, unique=True, validators=[validate_uid]
+    )
+    rules = CompressedYAMLField()
     template = models.BooleanField(
         "Whether this rules file is \
                                    a template and must be rendered",
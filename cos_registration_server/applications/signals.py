@@ -0,0 +1,46 @@
+"""Applications signals."""
+
+from typing import Any, Type
+
+from django.db.models.signals import post_delete
+
+from .models import (
+    Dashboard,
+    DashboardBlob,
+    DashboardVersion,
+    FoxgloveDashboard,
+    FoxgloveDashboardVersion,
+    GrafanaDashboard,
+    GrafanaDashboardVersion,
+)
+
+
+def dashboard_deleted(
+    sender: Type[Dashboard], instance: Dashboard, **kwargs: Any
+) -> None:
+    """Delete the blob of a deleted dashboard if no longer used."""
+    DashboardBlob.delete_if_unused(instance.blob_id)
+
+
+def dashboard_version_deleted(
+    sender: Type[DashboardVersion], instance: DashboardVersion, **kwargs: Any
+) -> None:
+    """Delete the blob of a deleted checkpoint if no longer used."""
+    if instance.checkpoint_id is not None:
+        DashboardBlob.delete_if_unused(instance.checkpoint_id)
+
+
+def connect_signals() -> None:
+    """Connect the dashboard blobs clean up signals."""
+    for model in (GrafanaDashboard, FoxgloveDashboard):
+        post_delete.connect(
+            dashboard_deleted,
+            sender=model,
+            dispatch_uid=f"dashboard_blob_{model._meta.label_lower}",
+        )
+    for version_model in (GrafanaDashboardVersion, FoxgloveDashboardVersion):
+        post_delete.connect(
+            dashboard_version_deleted,
+            sender=version_model,
+            dispatch_uid=f"dashboard_blob_{version_model._meta.label_lower}",
+        )
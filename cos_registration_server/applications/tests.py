@@ -1,10 +1,25 @@
+from io import StringIO
+from typing import Any, Dict
+from unittest.mock import patch
+
 from devices.models import Device
+from django.core.management import call_command
+from django.db import connection
 from django.db.utils import IntegrityError
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
+from .compression import GZIP_MAGIC, _decompressed, recompress_field
+from .jsonpatch import (
+    JSONPatchError,
+    JSONPatchTestFailed,
+    apply_patch,
+    make_patch,
+)
 from .models import (
+    DashboardBlob,
     FoxgloveDashboard,
     GrafanaDashboard,
+    GrafanaDashboardVersion,
     LokiAlertRuleFile,
     PrometheusAlertRuleFile,
 )
@@ -94,6 +109,56 @@ class GrafanaDashboardModelTests(TestCase):
 
         self.assertEqual(grafana_dashboard.devices.all()[0].uid, "robot")
 
+    def test_identical_dashboards_share_a_blob(self) -> None:
+        first = GrafanaDashboard.objects.create(
+            uid="first", dashboard=SIMPLE_GRAFANA_DASHBOARD
+        )
+        second = GrafanaDashboard.objects.create(
+            uid="second", dashboard=dict(SIMPLE_GRAFANA_DASHBOARD)
+        )
+        FoxgloveDashboard.objects.create(
+            uid="third", dashboard=SIMPLE_GRAFANA_DASHBOARD
+        )
+
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(DashboardBlob.objects.count(), 1)
+        self.assertEqual(
+            GrafanaDashboard.objects.get(uid="second").dashboard,
+            SIMPLE_GRAFANA_DASHBOARD,
+        )
+
+    def test_unused_blob_is_deleted(self) -> None:
+        first = GrafanaDashboard.objects.create(
+            uid="first", dashboard=SIMPLE_GRAFANA_DASHBOARD
+        )
+        second = GrafanaDashboard.objects.create(
+            uid="second", dashboard=SIMPLE_GRAFANA_DASHBOARD
+        )
+        blob_hash = first.blob_id
+
+        first.dashboard = {"title": "changed"}
+        first.save()
+        self.assertTrue(DashboardBlob.objects.filter(hash=blob_hash).exists())
+
+        second.delete()
+        # still used by the first version of the first dashboard
+        self.assertTrue(DashboardBlob.objects.filter(hash=blob_hash).exists())
+        first.delete()
+        self.assertFalse(DashboardBlob.objects.exists())
+
+    def test_save_without_dashboard_access_keeps_blob(self) -> None:
+        GrafanaDashboard.objects.create(
+            uid="first", dashboard=SIMPLE_GRAFANA_DASHBOARD
+        )
+        dashboard = GrafanaDashboard.objects.get(uid="first")
+        dashboard.uid = "renamed"
+        with self.assertNumQueries(1):
+            dashboard.save()
+        self.assertEqual(
+            GrafanaDashboard.objects.get(uid="renamed").dashboard,
+            SIMPLE_GRAFANA_DASHBOARD,
+        )
+
 
 class FoxgloveDashboardModelTests(TestCase):
     def test_creation_of_a_dashboard(self) -> None:
@@ -163,3 +228,224 @@ class LokiAlertRuleFileModelTests(TestCase):
         device.loki_alert_rule_files.add(loki_alert_rule)
 
         self.assertEqual(loki_alert_rule.devices.all()[0].uid, "robot")
+
+
+class CompressedStorageTests(TestCase):
+    def stored(self, table: str, column: str) -> bytes:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {column} FROM {table}")
+            (value,) = cursor.fetchone()
+        return bytes(value)
+
+    def test_plain_storage(self) -> None:
+        GrafanaDashboard.objects.create(
+            uid="first", dashboard=SIMPLE_GRAFANA_DASHBOARD
+        )
+        PrometheusAlertRuleFile.objects.create(
+            uid="rules", rules="groups: []\n"
+        )
+
+        self.assertEqual(
+            self.stored("applications_dashboardblob", "data")[:1], b"{"
+        )
+        self.assertEqual(
+            self.stored("applications_prometheusalertrulefile", "rules"),
+            b"groups: []\n",
+        )
+
+    @override_settings(STORAGE_COMPRESSION=True)
+    def test_compressed_storage(self) -> None:
+        GrafanaDashboard.objects.create(
+            uid="first", dashboard=SIMPLE_GRAFANA_DASHBOARD
+        )
+        PrometheusAlertRuleFile.objects.create(
+            uid="rules", rules="groups: []\n"
+        )
+
+        self.assertTrue(
+            self.stored("applications_dashboardblob", "data").startswith(
+                GZIP_MAGIC
+            )
+        )
+        self.assertTrue(
+            self.stored(
+                "applications_prometheusalertrulefile", "rules"
+            ).startswith(GZIP_MAGIC)
+        )
+        self.assertEqual(
+            GrafanaDashboard.objects.get().dashboard, SIMPLE_GRAFANA_DASHBOARD
+        )
+        self.assertEqual(
+            PrometheusAlertRuleFile.objects.get().rules, {"groups": []}
+        )
+
+    @override_settings(STORAGE_COMPRESSION=True)
+    def test_decompressed_values_are_cached(self) -> None:
+        GrafanaDashboard.objects.create(
+            uid="first", dashboard=SIMPLE_GRAFANA_DASHBOARD
+        )
+        GrafanaDashboard.objects.get().dashboard
+        with patch("applications.compression.gzip.decompress") as decompress:
+            GrafanaDashboard.objects.get().dashboard
+        decompress.assert_not_called()
+        # the cache is keyed by digest rather than by the stored bytes
+        self.assertTrue(all(len(key) == 32 for key in _decompressed))
+
+    @override_settings(
+        STORAGE_COMPRESSION=True, STORAGE_DECOMPRESSED_CACHE_SIZE=1
+    )
+    def test_decompressed_cache_is_bounded(self) -> None:
+        for uid in ("first", "second"):
+            GrafanaDashboard.objects.create(
+                uid=uid, dashboard={**SIMPLE_GRAFANA_DASHBOARD, "uid": uid}
+            )
+            GrafanaDashboard.objects.get(uid=uid).dashboard
+        self.assertEqual(len(_decompressed), 1)
+
+    def test_recompress_field(self) -> None:
+        LokiAlertRuleFile.objects.create(uid="rules", rules="groups: []\n")
+        stored = self.stored("applications_lokialertrulefile", "rules")
+
+        with override_settings(STORAGE_COMPRESSION=True):
+            self.assertEqual(recompress_field(LokiAlertRuleFile, "rules"), 1)
+            self.assertEqual(recompress_field(LokiAlertRuleFile, "rules"), 0)
+        self.assertTrue(
+            self.stored("applications_lokialertrulefile", "rules").startswith(
+                GZIP_MAGIC
+            )
+        )
+        self.assertEqual(LokiAlertRuleFile.objects.get().rules, {"groups": []})
+
+        self.assertEqual(recompress_field(LokiAlertRuleFile, "rules"), 1)
+        self.assertEqual(
+            self.stored("applications_lokialertrulefile", "rules"), stored
+        )
+
+    @override_settings(STORAGE_COMPRESSION=True)
+    def test_compress_storage_command(self) -> None:
+        with override_settings(STORAGE_COMPRESSION=False):
+            GrafanaDashboard.objects.create(
+                uid="first", dashboard=SIMPLE_GRAFANA_DASHBOARD
+            )
+        out = StringIO()
+        call_command("compress_storage", stdout=out)
+
+        self.assertIn("dashboard blobs: 1 rewritten", out.getvalue())
+        self.assertTrue(
+            self.stored("applications_dashboardblob", "data").startswith(
+                GZIP_MAGIC
+            )
+        )
+
+
+class DashboardVersionTests(TestCase):
+    def dashboard_version(self, version: int) -> Dict[str, Any]:
+        return {"title": f"version {version}", "panels": list(range(version))}
+
+    @override_settings(DASHBOARD_CHECKPOINT_INTERVAL=3)
+    def test_versions_are_deltas_between_checkpoints(self) -> None:
+        dashboard = GrafanaDashboard.objects.create(
+            uid="first", dashboard=self.dashboard_version(1)
+        )
+        for version in range(2, 8):
+            dashboard.dashboard = self.dashboard_version(version)
+            dashboard.save()
+
+        versions = dashboard.versions.all()
+        self.assertEqual(
+            [version.is_checkpoint for version in versions],
+            [True, False, False, True, False, False, True],
+        )
+        self.assertEqual(
+            versions[1].delta,
+            [
+                {"op": "replace", "path": "/title", "value": "version 2"},
+                {"op": "add", "path": "/panels/1", "value": 1},
+            ],
+        )
+        for version in range(1, 8):
+            with self.assertNumQueries(2):
+                content = dashboard.get_version_content(version)
+            self.assertEqual(content, self.dashboard_version(version))
+
+        with self.assertRaises(GrafanaDashboardVersion.DoesNotExist):
+            dashboard.get_version_content(8)
+
+    def test_unchanged_save_records_no_version(self) -> None:
+        dashboard = GrafanaDashboard.objects.create(
+            uid="first", dashboard=SIMPLE_GRAFANA_DASHBOARD
+        )
+        dashboard.dashboard = dict(SIMPLE_GRAFANA_DASHBOARD)
+        dashboard.save()
+
+        self.assertEqual(dashboard.versions.count(), 1)
+
+    def test_deleting_dashboard_deletes_versions_blobs(self) -> None:
+        dashboard = GrafanaDashboard.objects.create(
+            uid="first", dashboard=self.dashboard_version(1)
+        )
+        dashboard.dashboard = self.dashboard_version(2)
+        dashboard.save()
+
+        dashboard.delete()
+        self.assertFalse(GrafanaDashboardVersion.objects.exists())
+        self.assertFalse(DashboardBlob.objects.exists())
+
+
+class JSONPatchTests(TestCase):
+    def test_make_and_apply_patch(self) -> None:
+        source = {
+            "a/b": 1,
+            "c~d": {"e": [1, 2, 3], "f": "g"},
+            "removed": True,
+            "list": [{"x": 1}, {"x": 2}],
+        }
+        target = {
+            "a/b": 2,
+            "c~d": {"e": [1, 4], "f": "g"},
+            "added": None,
+            "list": [{"x": 1}, {"x": 3}, {"x": 4}],
+        }
+        patch = make_patch(source, target)
+
+        self.assertIn({"op": "replace", "path": "/a~1b", "value": 2}, patch)
+        self.assertIn({"op": "remove", "path": "/c~0d/e/2"}, patch)
+        self.assertEqual(apply_patch(source, patch), target)
+        self.assertEqual(make_patch(target, target), [])
+        self.assertEqual(apply_patch(source, make_patch(source, [1])), [1])
+
+    def test_apply_patch_operations(self) -> None:
+        document = {"a": {"b": [1, 2]}, "c": "d"}
+        patch = [
+            {"op": "test", "path": "/c", "value": "d"},
+            {"op": "add", "path": "/a/b/-", "value": 3},
+            {"op": "add", "path": "/a/b/0", "value": 0},
+            {"op": "copy", "from": "/a/b", "path": "/e"},
+            {"op": "move", "from": "/c", "path": "/a/c"},
+            {"op": "replace", "path": "/e/0", "value": "zero"},
+            {"op": "remove", "path": "/a/b/1"},
+        ]
+
+        self.assertEqual(
+            apply_patch(document, patch),
+            {"a": {"b": [0, 2, 3], "c": "d"}, "e": ["zero", 1, 2, 3]},
+        )
+        self.assertEqual(document, {"a": {"b": [1, 2]}, "c": "d"})
+
+    def test_apply_invalid_patch(self) -> None:
+        document = {"a": [1]}
+        for patch in (
+            {"op": "add"},
+            [{"op": "unknown", "path": "/a"}],
+            [{"op": "add", "path": "/a/01", "value": 1}],
+            [{"op": "add", "path": "a", "value": 1}],
+            [{"op": "remove", "path": "/b"}],
+            [{"op": "remove", "path": "/a/1"}],
+            [{"op": "replace", "path": "/a/0"}],
+            [{"op": "move", "from": "/a", "path": "/a/0"}],
+        ):
+            with self.assertRaises(JSONPatchError):
+                apply_patch(document, patch)
+
+        with self.assertRaises(JSONPatchTestFailed):
+            apply_patch(document, [{"op": "test", "path": "/a", "value": 2}])
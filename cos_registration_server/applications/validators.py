@@ -0,0 +1,23 @@
+"""Applications validators."""
+
+import re
+
+from django.core.validators import RegexValidator
+
+# uids name the files of the bundles and of the rule directory,
+# so they must be plain file names: no separator, no "." nor ".."
+UID_REGEX = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*\Z")
+
+validate_uid = RegexValidator(
+    UID_REGEX,
+    "Enter a valid uid consisting of letters, numbers, underscores, "
+    "hyphens or dots, not starting with a dot.",
+)
+
+
+def is_valid_uid(uid: str) -> bool:
+    """Return whether a uid can be used as a file name.
+
+    Rows written before the uids were validated may not be.
+    """
+    return UID_REGEX.match(uid) is not None
@@ -59,6 +59,16 @@ REST_FRAMEWORK = {
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
         "rest_framework.parsers.FormParser",
+        "api.parsers.MessagePackParser",
+        "api.parsers.CBORParser",
+    ],
+    # JSON stays first so that it remains the default format,
+    # binary formats are only used when explicitly requested.
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "api.renderers.MessagePackRenderer",
+        "api.renderers.CBORRenderer",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
@@ -79,8 +89,14 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.middleware.DecompressRequestMiddleware",
 ]
 
+# Maximum size in bytes of a compressed request body once decompressed.
+DECOMPRESSED_REQUEST_MAX_SIZE = env.int(
+    "DECOMPRESSED_REQUEST_MAX_SIZE", default=50 * 1024 * 1024
+)
+
 ROOT_URLCONF = "cos_registration_server.urls"
 
 TEMPLATES = [
@@ -114,6 +130,65 @@ if DATABASES["default"].get("NAME") == ":memory:":
     )
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Use a shared backend such as "file:///var/tmp/django_cache"
+# or "db://cache_table" so that the gunicorn workers share the cache.
+CACHES = {
+    "default": env.dj_cache_url("CACHE_URL", default="locmem://"),
+}
+
+# Time in seconds the API list responses are cached, 0 disables it.
+API_CACHE_TIMEOUT = env.int("API_CACHE_TIMEOUT", default=0)
+
+# Time in seconds the fleet summary is cached.
+FLEET_SUMMARY_CACHE_TIMEOUT = env.int(
+    "FLEET_SUMMARY_CACHE_TIMEOUT", default=10
+)
+
+# Maximum time in seconds a request waits for an identical request
+# computed by another worker before computing the response itself.
+API_COALESCE_TIMEOUT = env.int("API_COALESCE_TIMEOUT", default=30)
+
+
+# Interval in seconds at which the devices last seen timestamps
+# are written to the database, 0 writes them on every request.
+DEVICE_LAST_SEEN_FLUSH_INTERVAL = env.int(
+    "DEVICE_LAST_SEEN_FLUSH_INTERVAL", default=30
+)
+
+# Default time in seconds a signer claims pending certificate requests for.
+CERTIFICATE_LEASE_DURATION = env.int("CERTIFICATE_LEASE_DURATION", default=300)
+
+# Maximum time in seconds a signer can claim pending certificate requests for.
+CERTIFICATE_LEASE_MAX_DURATION = env.int(
+    "CERTIFICATE_LEASE_MAX_DURATION", default=86400
+)
+
+# Maximum number of devices returned by a uid search.
+DEVICE_SEARCH_LIMIT = env.int("DEVICE_SEARCH_LIMIT", default=50)
+
+# Number of dashboard versions between two full copies of the dashboard,
+# the other versions store the changes from the previous version.
+DASHBOARD_CHECKPOINT_INTERVAL = env.int(
+    "DASHBOARD_CHECKPOINT_INTERVAL", default=10
+)
+
+# Number of threads validating the files of an imported archive.
+ARCHIVE_IMPORT_WORKERS = env.int("ARCHIVE_IMPORT_WORKERS", default=4)
+
+# Port of the device targets listed by the Prometheus service discovery.
+PROMETHEUS_SD_TARGET_PORT = env.int("PROMETHEUS_SD_TARGET_PORT", default=9100)
+
+# Whether the dashboards and alert rule files are stored compressed.
+STORAGE_COMPRESSION = env.bool("STORAGE_COMPRESSION", default=False)
+
+# Number of decompressed dashboards and alert rule files kept in memory.
+STORAGE_DECOMPRESSED_CACHE_SIZE = env.int(
+    "STORAGE_DECOMPRESSED_CACHE_SIZE", default=256
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -8,3 +8,9 @@ class DevicesConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "devices"
+
+    def ready(self) -> None:
+        """Connect the search signals once the models are loaded."""
+        from devices.search import connect_signals
+
+        connect_signals()
@@ -0,0 +1,135 @@
+"""Device bulk operations.
+
+Bulk operations work on sets of devices with a few statements per batch
+instead of a few statements per device. They don't send the model
+signals, the caller is responsible for invalidating what depends on
+the devices.
+"""
+
+from typing import Any, Iterator, List, Mapping, Sequence, Type
+
+from django.db import transaction
+from django.db.models import CASCADE, DO_NOTHING, Model, QuerySet
+
+from .models import DEVICE_RELATIONS, Device
+from .search import unindex_devices
+
+
+def _batches(pks: List[int], batch_size: int) -> Iterator[List[int]]:
+    for start in range(0, len(pks), batch_size):
+        yield pks[start : start + batch_size]  # noqa: E203
+
+
+def _locked_pks(queryset: "QuerySet[Device]") -> "QuerySet[Any]":
+    # filters such as certificate_status=none outer join the certificates,
+    # PostgreSQL can't lock the nullable side of an outer join
+    return queryset.select_for_update(of=("self",)).values_list(
+        "pk", flat=True
+    )
+
+
+def _device_references() -> List[Any]:
+    # the foreign keys to devices, including the many to many tables
+    references: List[Any] = [
+        field.remote_field
+        for field in Device._meta.get_fields(include_hidden=True)
+        if field.auto_created
+        and not field.concrete
+        and field.is_relation
+        and not field.many_to_many
+    ]
+    for reference in references:
+        if reference.remote_field.on_delete not in (CASCADE, DO_NOTHING):
+            raise ValueError(
+                f"{reference.model._meta.label}.{reference.name} can't be "
+                "deleted in bulk, only CASCADE relations are supported"
+            )
+    return references
+
+
+def delete_devices(queryset: "QuerySet[Device]", batch_size: int) -> int:
+    """Delete a set of devices with their certificate and relations.
+
+    Each batch is deleted with one DELETE statement per table referencing
+    the devices, found from the model relations, then one for the search
+    index and one for the devices, all batches within one transaction.
+    The relations must cascade, the rows referencing the devices are
+    deleted without looking for their own references.
+
+    queryset: the devices to delete.
+    batch_size: number of devices deleted per statement.
+    return: the number of deleted devices.
+    raise: ValueError if a relation to devices doesn't cascade.
+    """
+    using = queryset.db
+    references = _device_references()
+    deleted = 0
+    with transaction.atomic(using=using):
+        pks = list(_locked_pks(queryset))
+        for batch in _batches(pks, batch_size):
+            for reference in references:
+                if reference.remote_field.on_delete is CASCADE:
+                    reference.model._base_manager.using(using).filter(
+                        **{f"{reference.name}__in": batch}
+                    )._raw_delete(using)
+            unindex_devices(batch, using)
+            deleted += (
+                Device._base_manager.using(using)
+                .filter(pk__in=batch)
+                ._raw_delete(using)
+            )
+    return deleted
+
+
+def update_device_relations(
+    queryset: "QuerySet[Device]",
+    changes: Mapping[str, Mapping[str, Sequence[Model]]],
+    batch_size: int,
+) -> int:
+    """Add and remove related applications to a set of devices.
+
+    Each batch is updated with one INSERT and one DELETE statement
+    per relation table, all batches within one transaction.
+    Adding an application a device already has is a no-op.
+
+    queryset: the devices to update.
+    changes: per relation name, such as grafana_dashboards,
+        the instances to "add" and to "remove".
+    batch_size: number of devices updated per statement.
+    return: the number of updated devices.
+    """
+    using = queryset.db
+    with transaction.atomic(using=using):
+        pks = list(_locked_pks(queryset))
+        for batch in _batches(pks, batch_size):
+            for relation in DEVICE_RELATIONS:
+                change = changes.get(relation.field.name)
+                if not change:
+                    continue
+                through: Type[Any] = relation.through
+                device_column = relation.field.m2m_column_name()
+                related_column = relation.field.m2m_reverse_name()
+                removed = [related.pk for related in change.get("remove", [])]
+                added = [related.pk for related in change.get("add", [])]
+                if removed:
+                    through.objects.using(using).filter(
+                        **{
+                            f"{device_column}__in": batch,
+                            f"{related_column}__in": removed,
+                        }
+                    ).delete()
+                if added:
+                    through.objects.using(using).bulk_create(
+                        [
+                            through(
+                                **{
+                                    device_column: device_pk,
+                                    related_column: related_pk,
+                                }
+                            )
+                            for device_pk in batch
+                            for related_pk in added
+                        ],
+                        ignore_conflicts=True,
+                    )
+    return len(pks)
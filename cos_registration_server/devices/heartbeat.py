@@ -0,0 +1,107 @@
+"""Device heartbeat.
+
+Devices polling the server update their last_seen timestamp.
+To avoid turning every poll into a row write, timestamps are buffered
+in memory and flushed in bulk every DEVICE_LAST_SEEN_FLUSH_INTERVAL
+seconds with a single UPDATE ... CASE statement.
+"""
+
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Device
+
+logger = logging.getLogger(__name__)
+
+
+class LastSeenBuffer:
+    """Buffer of device last seen timestamps.
+
+    Timestamps are keyed by device primary key so that a device polling
+    several times between two flushes results in a single update.
+    """
+
+    def __init__(self) -> None:
+        """Init the buffer."""
+        self._lock = threading.Lock()
+        self._pending: Dict[int, datetime] = {}
+        self._timer: Optional[threading.Timer] = None
+
+    def record(self, device: Device) -> None:
+        """Record that a device reached the server now.
+
+        device: the device instance.
+        """
+        interval = settings.DEVICE_LAST_SEEN_FLUSH_INTERVAL
+        with self._lock:
+            self._pending[device.pk] = timezone.now()
+            if interval and self._timer is None:
+                self._timer = threading.Timer(interval, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if not interval:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write the buffered timestamps to the database.
+
+        return: the number of devices updated.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        # never move last_seen backwards, another worker
+        # may have flushed a newer timestamp meanwhile
+        devices = []
+        for pk, last_seen in pending.items():
+            value = Value(last_seen, output_field=DateTimeField())
+            devices.append(
+                Device(
+                    pk=pk,
+                    last_seen=Greatest(Coalesce(F("last_seen"), value), value),
+                )
+            )
+        # bulk_update doesn't send signals, the heartbeat
+        # doesn't invalidate the API response cache.
+        return Device.objects.bulk_update(devices, ["last_seen"])
+
+    def _flush_on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception("Failed to flush the devices last seen")
+        finally:
+            # the timer thread has its own database connection
+            connections.close_all()
+
+
+last_seen_buffer = LastSeenBuffer()
+
+
+def record_device_seen(device: Device) -> None:
+    """Record the activity of a device, see LastSeenBuffer."""
+    last_seen_buffer.record(device)
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    try:
+        last_seen_buffer.flush()
+    except DatabaseError:
+        logger.exception("Failed to flush the devices last seen")
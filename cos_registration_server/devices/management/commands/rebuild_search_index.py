@@ -0,0 +1,33 @@
+"""Rebuild the device uid search table."""
+
+from typing import Any
+
+from devices.search import rebuild_search_index
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    """Rebuild the SQLite search table from the devices table.
+
+    To run if devices were written without going through the ORM signals
+    nor devices.search.index_devices, see devices.search.
+    """
+
+    help = (
+        "Rebuild the device uid search table (SQLite only, PostgreSQL "
+        "indexes the uids directly)."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the database option."""
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to rebuild the search table of.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Rebuild the search table and print the number of devices."""
+        indexed = rebuild_search_index(options["database"])
+        self.stdout.write(f"devices: {indexed} indexed")
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0006_devicecertificate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="device",
+            name="last_seen",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="last seen"
+            ),
+        ),
+    ]
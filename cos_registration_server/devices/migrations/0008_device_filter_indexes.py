@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:00
+
+from django.db import migrations, models
+
+ADDRESS_HOST_INDEX = "device_address_host_idx"
+
+
+def create_address_host_index(apps, schema_editor):
+    # PostgreSQL stores addresses as inet, prefix lookups
+    # are done on HOST(address) and need their own index.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX {ADDRESS_HOST_INDEX} ON devices_device "
+        "(HOST(address) text_pattern_ops)"
+    )
+
+
+def drop_address_host_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {ADDRESS_HOST_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0007_device_last_seen"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="device",
+            index=models.Index(
+                fields=["creation_date"], name="device_creation_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="device",
+            index=models.Index(fields=["address"], name="device_address_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="devicecertificate",
+            index=models.Index(
+                fields=["status"], name="device_certificate_status_idx"
+            ),
+        ),
+        migrations.RunPython(
+            create_address_host_index, drop_address_host_index
+        ),
+    ]
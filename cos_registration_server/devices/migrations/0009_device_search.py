@@ -0,0 +1,43 @@
+from django.db import migrations
+
+SEARCH_TABLE = "devices_device_search"
+TRIGRAM_INDEX = "device_uid_trgm_idx"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # matches the UPPER(uid::text) LIKE of icontains lookups
+        schema_editor.execute(
+            f"CREATE INDEX {TRIGRAM_INDEX} ON devices_device "
+            "USING gin (UPPER(uid::text) gin_trgm_ops)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} "
+            "USING fts5(uid, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, uid) "
+            "SELECT id, uid FROM devices_device"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0008_device_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
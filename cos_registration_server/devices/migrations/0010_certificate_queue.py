@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0009_device_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="devicecertificate",
+            name="lease_expires_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="signer lease expiration"
+            ),
+        ),
+        migrations.AddField(
+            model_name="devicecertificate",
+            name="lease_id",
+            field=models.UUIDField(
+                blank=True, null=True, verbose_name="signer lease id"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="devicecertificate",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["created_at", "device"],
+                name="device_certificate_pending_idx",
+            ),
+        ),
+    ]
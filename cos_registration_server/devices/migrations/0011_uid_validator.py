@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:24
+
+import re
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0010_certificate_queue"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="device",
+            name="uid",
+            field=models.CharField(
+                max_length=200,
+                unique=True,
+                validators=[
+                    django.core.validators.RegexValidator(
+                        re.compile("^[A-Za-z0-9_][A-Za-z0-9_.-]*\\Z"),
+                        "Enter a valid uid consisting of letters, numbers, underscores, hyphens or dots, not starting with a dot.",
+                    )
+                ],
+            ),
+        ),
+    ]
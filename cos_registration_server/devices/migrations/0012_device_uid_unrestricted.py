@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0011_uid_validator"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="device",
+            name="uid",
+            field=models.CharField(max_length=200, unique=True),
+        ),
+    ]
@@ -1,5 +1,7 @@
 """Device DB model."""
 
+from typing import Any
+
 from applications.models import (
     FoxgloveDashboard,
     GrafanaDashboard,
@@ -18,6 +20,7 @@ class Device(models.Model):
     creation_date: Creation date of the device.
     address: IP address of the device.
     public_ssh_key: device public SSH key.
+    last_seen: last time the device reached the server.
     grafana_dashboards: Grafana dashboards relations.
     foxglove_dashboards: Foxglove dashboards relations.
     prometheus_alert_rule_files: Prometheus alert rules files relations.
@@ -27,6 +30,7 @@ class Device(models.Model):
     creation_date = models.DateTimeField("creation date", auto_now_add=True)
     address = models.GenericIPAddressField("device IP")
     public_ssh_key = models.TextField("device public SSH key", default="")
+    last_seen = models.DateTimeField("last seen", null=True, blank=True)
     grafana_dashboards = models.ManyToManyField(
         GrafanaDashboard, related_name="devices"
     )
@@ -40,10 +44,49 @@ class Device(models.Model):
         LokiAlertRuleFile, related_name="devices"
     )
 
+    class Meta:
+        """Model Meta class overwritting."""
+
+        indexes = [
+            models.Index(
+                fields=["creation_date"], name="device_creation_date_idx"
+            ),
+            models.Index(fields=["address"], name="device_address_idx"),
+        ]
+
     def __str__(self) -> str:
         """Str representation of a device."""
         return self.uid
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save the device.
+
+        last_seen is written by the heartbeat buffer only, updates leave it
+        out so that an instance loaded before a flush doesn't overwrite a
+        newer heartbeat.
+        """
+        if (
+            not self._state.adding
+            and not args
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "last_seen"
+            ]
+        super().save(*args, **kwargs)
+
+
+# the many to many relations between devices and applications
+DEVICE_RELATIONS = (
+    Device.grafana_dashboards,
+    Device.foxglove_dashboards,
+    Device.prometheus_alert_rule_files,
+    Device.loki_alert_rule_files,
+)
+
 
 class DeviceCertificate(models.Model):
     """Device Certificate model.
@@ -58,6 +101,8 @@ class DeviceCertificate(models.Model):
     status: Current status of the certificate request.
     created_at: Timestamp when certificate request was created.
     updated_at: Timestamp when certificate was last updated.
+    lease_id: Identifies the claim of a signer on a pending request.
+    lease_expires_at: Time until which the request is claimed.
     """
 
     class CertificateStatus(models.TextChoices):
@@ -95,6 +140,25 @@ class DeviceCertificate(models.Model):
     updated_at = models.DateTimeField(
         "Device Certificate last updated", auto_now=True
     )
+    lease_id = models.UUIDField("signer lease id", null=True, blank=True)
+    lease_expires_at = models.DateTimeField(
+        "signer lease expiration", null=True, blank=True
+    )
+
+    class Meta:
+        """Model Meta class overwritting."""
+
+        indexes = [
+            models.Index(
+                fields=["status"], name="device_certificate_status_idx"
+            ),
+            # the queue of the requests to sign, in arrival order
+            models.Index(
+                fields=["created_at", "device"],
+                condition=models.Q(status="pending"),
+                name="device_certificate_pending_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         """Str representation of a certificate."""
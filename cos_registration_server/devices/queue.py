@@ -0,0 +1,58 @@
+"""Pending certificate signing requests queue.
+
+Signers drain the pending requests in arrival order. To let several
+signers work concurrently without signing a request twice, a signer
+claims a batch of requests for a lease duration: claimed requests are
+skipped by the other signers until the lease expires, so that the
+requests of a signer that died are eventually claimed again.
+
+Claims lock the candidate rows with SELECT ... FOR UPDATE SKIP LOCKED
+where supported (PostgreSQL), so that concurrent signers pick different
+requests instead of waiting for each other. The claim itself is a
+conditional UPDATE, so that a request is never claimed twice on the
+databases without row locks either.
+"""
+
+import uuid
+from datetime import timedelta
+from typing import List
+
+from django.db import connections, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from .models import DeviceCertificate
+
+PENDING_ORDERING = ("created_at", "device")
+
+
+def pending_certificates() -> "QuerySet[DeviceCertificate]":
+    """Return the pending requests in arrival order."""
+    return DeviceCertificate.objects.filter(
+        status=DeviceCertificate.CertificateStatus.PENDING
+    ).order_by(*PENDING_ORDERING)
+
+
+def claim_pending_certificates(
+    limit: int, lease: timedelta
+) -> List[DeviceCertificate]:
+    """Claim the oldest pending requests that aren't claimed.
+
+    limit: maximum number of requests to claim.
+    lease: how long the requests are claimed for.
+    return: the claimed requests, their lease set, in arrival order.
+    """
+    now = timezone.now()
+    lease_id = uuid.uuid4()
+    queryset = pending_certificates()
+    available = Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now)
+    with transaction.atomic(using=queryset.db):
+        candidates = queryset.filter(available)
+        features = connections[queryset.db].features
+        if features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        pks = list(candidates.values_list("pk", flat=True)[:limit])
+        queryset.filter(available, pk__in=pks).update(
+            lease_id=lease_id, lease_expires_at=now + lease
+        )
+    return list(queryset.filter(lease_id=lease_id).select_related("device"))
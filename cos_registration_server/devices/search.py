@@ -0,0 +1,152 @@
+"""Device uid search.
+
+Searching devices by partial uid with icontains scans the whole table.
+On PostgreSQL, the uids are indexed with a pg_trgm GIN index and the
+results are ranked by trigram similarity.
+On SQLite, the uids are copied to an FTS5 table with the trigram
+tokenizer and the results are ranked by bm25. The table is kept in sync
+by signals, paths that don't send them (bulk_create, QuerySet.update of
+the uids, raw deletions) must call index_devices and unindex_devices,
+rebuild_search_index (the rebuild_search_index command) repairs it.
+Trigram indexes can't match terms shorter than 3 characters, these are
+searched with icontains.
+"""
+
+from typing import Any, Iterable, Type
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections, transaction
+from django.db.models import QuerySet
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length
+from django.db.models.signals import post_delete, post_save
+
+from .models import Device
+
+SEARCH_TABLE = "devices_device_search"
+TRIGRAM_LENGTH = 3
+
+
+def _fts_phrase(term: str) -> str:
+    # quote the term so FTS5 matches it as a substring
+    # instead of parsing it as a query
+    return '"{}"'.format(term.replace('"', '""'))
+
+
+def search_devices(
+    queryset: "QuerySet[Device]", term: str
+) -> "QuerySet[Device]":
+    """Search devices by partial uid.
+
+    queryset: the devices queryset to search.
+    term: the case insensitive substring to look for in the uids.
+    return: the matching devices, best matches first,
+        limited to settings.DEVICE_SEARCH_LIMIT.
+    """
+    limit = settings.DEVICE_SEARCH_LIMIT
+    vendor = connections[queryset.db].vendor
+    if len(term) >= TRIGRAM_LENGTH and vendor == "postgresql":
+        # UPPER(uid) LIKE uses the device_uid_trgm_idx index
+        return (
+            queryset.filter(uid__icontains=term)
+            .annotate(search_rank=TrigramSimilarity("uid", term))
+            .order_by("-search_rank", "uid")[:limit]
+        )
+    if len(term) >= TRIGRAM_LENGTH and vendor == "sqlite":
+        phrase = _fts_phrase(term)
+        return (
+            queryset.filter(
+                pk__in=RawSQL(
+                    f"SELECT rowid FROM {SEARCH_TABLE} "
+                    f"WHERE {SEARCH_TABLE} MATCH %s",
+                    (phrase,),
+                )
+            )
+            .annotate(
+                search_rank=RawSQL(
+                    f"SELECT rank FROM {SEARCH_TABLE} "
+                    f"WHERE {SEARCH_TABLE} MATCH %s "
+                    f"AND rowid = {Device._meta.db_table}.id",
+                    (phrase,),
+                )
+            )
+            .order_by("search_rank", "uid")[:limit]
+        )
+    return queryset.filter(uid__icontains=term).order_by(Length("uid"), "uid")[
+        :limit
+    ]
+
+
+def index_devices(devices: Iterable[Device], using: str) -> None:
+    """Add or refresh devices in the SQLite search table.
+
+    devices: the devices to index.
+    using: the database alias.
+    """
+    rows = [(device.pk, device.uid) for device in devices]
+    if not rows or connections[using].vendor != "sqlite":
+        return
+    unindex_devices([pk for pk, _ in rows], using)
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, uid) VALUES (%s, %s)", rows
+        )
+
+
+def unindex_devices(pks: Iterable[int], using: str) -> None:
+    """Remove devices from the SQLite search table.
+
+    pks: the primary keys of the devices.
+    using: the database alias.
+    """
+    pks = list(pks)
+    if not pks or connections[using].vendor != "sqlite":
+        return
+    placeholders = ", ".join(["%s"] * len(pks))
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})",
+            pks,
+        )
+
+
+def rebuild_search_index(using: str) -> int:
+    """Rebuild the SQLite search table from the devices table.
+
+    using: the database alias.
+    return: the number of devices indexed, 0 on other databases.
+    """
+    if connections[using].vendor != "sqlite":
+        return 0
+    with transaction.atomic(using=using), connections[
+        using
+    ].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, uid) "
+            f"SELECT id, uid FROM {Device._meta.db_table}"
+        )
+        return int(cursor.rowcount)
+
+
+def _index_device(
+    sender: Type[Device], instance: Device, using: str, **kwargs: Any
+) -> None:
+    index_devices([instance], using)
+
+
+def _unindex_device(
+    sender: Type[Device], instance: Device, using: str, **kwargs: Any
+) -> None:
+    unindex_devices([instance.pk], using)
+
+
+def connect_signals() -> None:
+    """Keep the SQLite search table in sync with the devices."""
+    post_save.connect(
+        _index_device, sender=Device, dispatch_uid="devices_search_save"
+    )
+    post_delete.connect(
+        _unindex_device, sender=Device, dispatch_uid="devices_search_delete"
+    )
@@ -1,20 +1,35 @@
 import re
 from datetime import timedelta
 from html import escape
+from io import StringIO
+from typing import Any, List
+from unittest.mock import patch
 
 import yaml
+from api.filters import filter_devices
 from applications.models import (
     FoxgloveDashboard,
     GrafanaDashboard,
     LokiAlertRuleFile,
     PrometheusAlertRuleFile,
 )
+from django.core.management import call_command
+from django.db import connection
 from django.db.utils import IntegrityError
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
-from .models import Device
+from .bulk import _locked_pks, delete_devices, update_device_relations
+from .heartbeat import LastSeenBuffer
+from .models import Device, DeviceCertificate
+from .queue import claim_pending_certificates, pending_certificates
+from .search import (
+    SEARCH_TABLE,
+    index_devices,
+    search_devices,
+    unindex_devices,
+)
 
 SIMPLE_GRAFANA_DASHBOARD = {
     "id": None,
@@ -282,6 +297,191 @@ def create_device(uid: str, address: str) -> Device:
     return Device.objects.create(uid=uid, address=address)
 
 
+@override_settings(DEVICE_LAST_SEEN_FLUSH_INTERVAL=3600)
+class LastSeenBufferTests(TestCase):
+    def setUp(self) -> None:
+        self.buffer = LastSeenBuffer()
+        self.devices = [
+            Device.objects.create(uid=f"robot-{i}", address="127.0.0.1")
+            for i in range(3)
+        ]
+
+    def tearDown(self) -> None:
+        self.buffer.flush()
+
+    def test_record_is_buffered(self) -> None:
+        for device in self.devices:
+            self.buffer.record(device)
+            self.buffer.record(device)
+        self.assertFalse(
+            Device.objects.filter(last_seen__isnull=False).exists()
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 3)
+        for device in Device.objects.all():
+            assert device.last_seen is not None
+            self.assertAlmostEqual(
+                device.last_seen, timezone.now(), delta=timedelta(seconds=10)
+            )
+
+    def test_flush_nothing(self) -> None:
+        with self.assertNumQueries(0):
+            self.assertEqual(self.buffer.flush(), 0)
+
+    @override_settings(DEVICE_LAST_SEEN_FLUSH_INTERVAL=0)
+    def test_record_without_interval(self) -> None:
+        self.buffer.record(self.devices[0])
+        self.assertIsNotNone(Device.objects.get(uid="robot-0").last_seen)
+        self.assertIsNone(Device.objects.get(uid="robot-1").last_seen)
+
+    def test_flush_deleted_device(self) -> None:
+        self.buffer.record(self.devices[0])
+        self.devices[0].delete()
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_save_keeps_newer_last_seen(self) -> None:
+        stale = Device.objects.get(uid="robot-0")
+        self.buffer.record(self.devices[0])
+        self.buffer.flush()
+        last_seen = Device.objects.get(uid="robot-0").last_seen
+        self.assertIsNotNone(last_seen)
+
+        stale.address = "192.168.0.1"
+        stale.save()
+        device = Device.objects.get(uid="robot-0")
+        self.assertEqual(device.address, "192.168.0.1")
+        self.assertEqual(device.last_seen, last_seen)
+
+    def test_flush_keeps_newer_last_seen(self) -> None:
+        newer = timezone.now() + timedelta(hours=1)
+        Device.objects.filter(uid="robot-0").update(last_seen=newer)
+        self.buffer.record(self.devices[0])
+        self.buffer.record(self.devices[1])
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(Device.objects.get(uid="robot-0").last_seen, newer)
+        self.assertIsNotNone(Device.objects.get(uid="robot-1").last_seen)
+
+
+class DeviceSearchTests(TestCase):
+    def setUp(self) -> None:
+        for uid in ["robot-alpha", "Robot-ALPHA-2", "beta", "alphabet"]:
+            create_device(uid, "192.168.0.1")
+
+    def search(self, term: str) -> list[str]:
+        return [
+            device.uid for device in search_devices(Device.objects.all(), term)
+        ]
+
+    def test_search_substring(self) -> None:
+        self.assertCountEqual(
+            self.search("ALPHA"), ["robot-alpha", "Robot-ALPHA-2", "alphabet"]
+        )
+        self.assertEqual(self.search("bet"), ["beta", "alphabet"])
+        self.assertEqual(self.search("gamma"), [])
+
+    def test_search_short_term(self) -> None:
+        self.assertEqual(self.search("be"), ["beta", "alphabet"])
+
+    def test_search_quotes(self) -> None:
+        create_device('robot-"quoted"', "192.168.0.1")
+        self.assertEqual(self.search('"quoted"'), ['robot-"quoted"'])
+
+    def test_search_follows_updates(self) -> None:
+        device = Device.objects.get(uid="beta")
+        device.uid = "gamma"
+        device.save()
+        self.assertEqual(self.search("bet"), ["alphabet"])
+        self.assertEqual(self.search("gamma"), ["gamma"])
+
+        device.delete()
+        self.assertEqual(self.search("gamma"), [])
+
+    @override_settings(DEVICE_SEARCH_LIMIT=2)
+    def test_search_limit(self) -> None:
+        self.assertEqual(len(self.search("alpha")), 2)
+        self.assertEqual(len(self.search("al")), 2)
+
+    def test_search_bulk_paths(self) -> None:
+        Device.objects.bulk_create(
+            [Device(uid="gamma-1", address="192.168.0.1")]
+        )
+        Device.objects.filter(uid="beta").update(uid="gamma-2")
+        if connection.vendor == "sqlite":
+            self.assertEqual(self.search("gamma"), [])
+        index_devices(
+            Device.objects.filter(uid__startswith="gamma"), "default"
+        )
+        self.assertCountEqual(self.search("gamma"), ["gamma-1", "gamma-2"])
+
+        pks = list(
+            Device.objects.filter(uid__icontains="alpha").values_list(
+                "pk", flat=True
+            )
+        )
+        with self.assertNumQueries(1 if connection.vendor == "sqlite" else 0):
+            unindex_devices(pks, "default")
+        if connection.vendor == "sqlite":
+            self.assertEqual(self.search("alpha"), [])
+
+    def test_rebuild_search_index(self) -> None:
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            self.assertEqual(self.search("alpha"), [])
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertEqual(len(self.search("alpha")), 3)
+        if connection.vendor == "sqlite":
+            self.assertIn("devices: 4 indexed", out.getvalue())
+
+    def test_search_uses_index(self) -> None:
+        plan = search_devices(Device.objects.all(), "alpha").explain()
+        if connection.vendor == "sqlite":
+            self.assertIn("devices_device_search VIRTUAL TABLE", plan)
+        self.assertNotRegex(plan, r"\bSCAN devices_device\b")
+
+
+class DeviceBulkLockTests(TestCase):
+    def test_lock_only_devices(self) -> None:
+        try:
+            from django.db.backends.postgresql.base import DatabaseWrapper
+        except ImportError:
+            self.skipTest("psycopg isn't installed")
+        postgresql = DatabaseWrapper(
+            {
+                **connection.settings_dict,
+                "ENGINE": "django.db.backends.postgresql",
+            },
+            "postgresql",
+        )
+        # certificate_status=none outer joins the certificates
+        queryset = filter_devices(
+            Device.objects.all(), {"certificate_status": "none"}
+        )
+        with patch.object(postgresql, "get_autocommit", return_value=False):
+            sql, _ = (
+                _locked_pks(queryset)
+                .query.get_compiler(connection=postgresql)
+                .as_sql()
+            )
+        self.assertIn("LEFT OUTER JOIN", sql)
+        self.assertTrue(sql.endswith('FOR UPDATE OF "devices_device"'), sql)
+
+    def test_bulk_operations_lock_only_devices(self) -> None:
+        device = Device.objects.create(uid="robot-1", address="127.0.0.1")
+        queryset = filter_devices(
+            Device.objects.all(), {"certificate_status": "none"}
+        )
+        with patch(
+            "devices.bulk._locked_pks", wraps=_locked_pks
+        ) as locked_pks:
+            self.assertEqual(update_device_relations(queryset, {}, 10), 1)
+            self.assertEqual(delete_devices(queryset, 10), 1)
+        self.assertEqual(locked_pks.call_count, 2)
+        self.assertFalse(Device.objects.filter(pk=device.pk).exists())
+
+
 class DevicesViewTests(TestCase):
     def test_no_devices(self) -> None:
         response = self.client.get(reverse("devices:devices"))
@@ -342,6 +542,31 @@ class DevicesViewTests(TestCase):
             total_number_of_devices - max_devices_per_page,
         )
 
+    def test_devices_search(self) -> None:
+        device_1 = create_device("robot-1", "192.168.0.1")
+        create_device("drone-1", "192.168.0.2")
+
+        response = self.client.get(
+            reverse("devices:devices"), {"search": "robot"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'value="robot"')
+        self.assertQuerySetEqual(response.context["devices_list"], [device_1])
+
+        response = self.client.get(
+            reverse("devices:devices"), {"search": "plane"}
+        )
+        self.assertContains(response, "No devices match plane.")
+
+    def test_devices_search_pagination(self) -> None:
+        for i in range(0, 30):
+            create_device(f"robot-{i}", "192.168.0.1")
+
+        response = self.client.get(
+            reverse("devices:devices"), {"search": "robot"}
+        )
+        self.assertContains(response, "?page=2&amp;search=robot")
+
 
 @override_settings(COS_MODEL_NAME="cos")
 class DeviceViewTests(TestCase):
@@ -463,3 +688,65 @@ class DeviceViewTests(TestCase):
             response,
             'href="https://127.0.0.1:8080/cos-ros2bag-fileserver/hello-123/"',
         )
+
+
+class PendingCertificatesQueueTests(TestCase):
+    def setUp(self) -> None:
+        now = timezone.now()
+        for i in range(5):
+            device = Device.objects.create(
+                uid=f"robot-{i}", address="127.0.0.1"
+            )
+            DeviceCertificate.objects.create(
+                device=device,
+                csr=f"csr-{i}",
+                status=DeviceCertificate.CertificateStatus.PENDING,
+            )
+            # the queue is ordered by arrival, not by uid
+            DeviceCertificate.objects.filter(device=device).update(
+                created_at=now - timedelta(minutes=i)
+            )
+        signed = Device.objects.create(uid="signed", address="127.0.0.1")
+        DeviceCertificate.objects.create(
+            device=signed,
+            csr="csr",
+            status=DeviceCertificate.CertificateStatus.SIGNED,
+        )
+
+    def uids(self, certificates: Any) -> List[str]:
+        return [certificate.device.uid for certificate in certificates]
+
+    def test_pending_certificates(self) -> None:
+        self.assertEqual(
+            self.uids(pending_certificates()),
+            ["robot-4", "robot-3", "robot-2", "robot-1", "robot-0"],
+        )
+
+    def test_claims_are_disjoint(self) -> None:
+        first = claim_pending_certificates(2, timedelta(minutes=5))
+        second = claim_pending_certificates(2, timedelta(minutes=5))
+        third = claim_pending_certificates(2, timedelta(minutes=5))
+        self.assertEqual(self.uids(first), ["robot-4", "robot-3"])
+        self.assertEqual(self.uids(second), ["robot-2", "robot-1"])
+        self.assertEqual(self.uids(third), ["robot-0"])
+        self.assertEqual(
+            claim_pending_certificates(2, timedelta(minutes=5)), []
+        )
+        self.assertNotEqual(first[0].lease_id, second[0].lease_id)
+        assert first[0].lease_expires_at is not None
+        self.assertGreater(first[0].lease_expires_at, timezone.now())
+
+    def test_expired_lease_is_claimed_again(self) -> None:
+        claim_pending_certificates(5, timedelta(minutes=5))
+        DeviceCertificate.objects.filter(device__uid="robot-2").update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        claimed = claim_pending_certificates(5, timedelta(minutes=5))
+        self.assertEqual(self.uids(claimed), ["robot-2"])
+
+    def test_signed_requests_leave_the_queue(self) -> None:
+        DeviceCertificate.objects.filter(device__uid="robot-4").update(
+            status=DeviceCertificate.CertificateStatus.DENIED
+        )
+        claimed = claim_pending_certificates(1, timedelta(minutes=5))
+        self.assertEqual(self.uids(claimed), ["robot-3"])
@@ -9,6 +9,7 @@ from django.utils.http import urlencode
 from django.views import generic
 
 from .models import Device
+from .search import search_devices
 
 
 class devices(generic.ListView):  # type: ignore[type-arg]
@@ -19,8 +20,17 @@ class devices(generic.ListView):  # type: ignore[type-arg]
     paginate_by = 20
 
     def get_queryset(self) -> Any:
-        """Return all devices on GET."""
-        return Device.objects.all()
+        """Return all devices on GET, or the devices matching a search."""
+        queryset = Device.objects.all()
+        if search := self.request.GET.get("search"):
+            queryset = search_devices(queryset, search)
+        return queryset
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        """Add the search term to the context."""
+        context = super().get_context_data(**kwargs)
+        context["search"] = self.request.GET.get("search", "")
+        return context
 
 
 def device(request: HttpRequest, uid: str) -> HttpResponse:
@@ -7,3 +7,6 @@ export SECRET_KEY_DJANGO=$(cat /server_data/secret_key)
 # migrate the database
 /bin/python3 manage.py migrate
 
+
+# create the cache table when using the database cache backend
+/bin/python3 manage.py createcachetable